@@ -0,0 +1,89 @@
+import logging
+
+from selenium.common.exceptions import JavascriptException, NoSuchElementException
+from selenium.webdriver.common.by import By
+
+import metrics
+
+# Reads every .srp-jobtuple-wrapper on the page in one WebDriver round trip.
+# innerText matches what WebElement.text returns for these inline nodes.
+LISTING_TUPLES_SCRIPT = """
+return Array.from(document.querySelectorAll('.srp-jobtuple-wrapper')).map(function (job) {
+    function text(selector) {
+        var el = job.querySelector(selector);
+        return el ? el.innerText.trim() : null;
+    }
+    var title = job.querySelector('.title');
+    var salary = job.querySelector('.sal-wrap .ni-job-tuple-icon span');
+    return {
+        title: title ? title.innerText.trim() : null,
+        href: title ? title.href : null,
+        company: text('.comp-name'),
+        experience: text('.exp-wrap .exp'),
+        location: text('.locWdth'),
+        salary: salary ? (salary.getAttribute('title') || '').trim() : null,
+        walkin: job.querySelector('.ttc__walk-in') !== null
+    };
+});
+"""
+
+
+def _to_job_fields(raw):
+    return {
+        'Job Title': raw['title'],
+        'Company': raw['company'],
+        'Experience': raw['experience'] if raw['experience'] is not None else "N/A",
+        'Location': raw['location'] if raw['location'] is not None else "N/A",
+        'Salary': raw['salary'] if raw['salary'] is not None else "Not disclosed",
+        'Apply URL': raw['href'],
+        'Walk-in': "Yes" if raw['walkin'] else "No",
+    }
+
+
+def read_job_tuple(job):
+    """Per-element extraction of one tuple (about ten WebDriver round trips)."""
+    job_title = job.find_element(By.CSS_SELECTOR, '.title').text
+    company = job.find_element(By.CSS_SELECTOR, '.comp-name').text
+    experience = job.find_element(By.CSS_SELECTOR, '.exp-wrap .exp').text if job.find_elements(By.CSS_SELECTOR, '.exp-wrap .exp') else "N/A"
+    location = job.find_element(By.CSS_SELECTOR, '.locWdth').text if job.find_elements(By.CSS_SELECTOR, '.locWdth') else "N/A"
+    salary_elements = job.find_elements(By.CSS_SELECTOR, '.sal-wrap .ni-job-tuple-icon span')
+    salary = salary_elements[0].get_attribute('title').strip() if salary_elements else "Not disclosed"
+    apply_url = job.find_element(By.CSS_SELECTOR, '.title').get_attribute('href')
+    walkin = "Yes" if job.find_elements(By.CSS_SELECTOR, '.ttc__walk-in') else "No"
+
+    return {
+        'Job Title': job_title,
+        'Company': company,
+        'Experience': experience,
+        'Location': location,
+        'Salary': salary,
+        'Apply URL': apply_url,
+        'Walk-in': walkin,
+    }
+
+
+def extract_listing_tuples_per_element(driver):
+    """Extract tuples one WebDriver call at a time; kept as fallback and benchmark baseline."""
+    jobs = []
+    for job in driver.find_elements(By.CSS_SELECTOR, '.srp-jobtuple-wrapper'):
+        try:
+            jobs.append(read_job_tuple(job))
+        except NoSuchElementException as e:
+            logging.info(f"Skipping job tuple without title or company: {e}")
+    return jobs
+
+
+@metrics.timed_function('extract_listing')
+def extract_listing_tuples(driver):
+    """Extract every job tuple on the loaded listing page with a single execute_script.
+
+    Returns plain dicts with the same keys and "N/A"/"Not disclosed" defaults as
+    read_job_tuple. Tuples without a title link or company (ads and placeholders)
+    are skipped, as read_job_tuple's NoSuchElementException skips them.
+    """
+    try:
+        raw_jobs = driver.execute_script(LISTING_TUPLES_SCRIPT) or []
+    except JavascriptException as e:
+        logging.warning(f"Batched tuple extraction failed, using per-element path: {e}")
+        return extract_listing_tuples_per_element(driver)
+    return [_to_job_fields(raw) for raw in raw_jobs if raw['href'] and raw['company'] is not None]
@@ -0,0 +1,70 @@
+import argparse
+import statistics
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from batch_extract import extract_listing_tuples, extract_listing_tuples_per_element
+from scrapper import setup_driver
+
+DEFAULT_URL = 'https://www.naukri.com/walkin-jobs-1?wfhType=0&jobPostType=1&jobAge=1'
+
+
+def count_round_trips(driver):
+    """Wrap driver.execute so every WebDriver command is counted."""
+    counter = {'calls': 0}
+    execute = driver.execute
+
+    def counting_execute(driver_command, params=None):
+        counter['calls'] += 1
+        return execute(driver_command, params)
+
+    driver.execute = counting_execute
+    return counter
+
+
+def measure(driver, counter, extract, repeats):
+    latencies = []
+    calls = []
+    jobs = []
+    for _ in range(repeats):
+        counter['calls'] = 0
+        started = time.perf_counter()
+        jobs = extract(driver)
+        latencies.append(time.perf_counter() - started)
+        calls.append(counter['calls'])
+    return jobs, calls, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batched and per-element job tuple extraction.")
+    parser.add_argument('--url', default=DEFAULT_URL, help="Listing page to load")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    driver = setup_driver()
+    try:
+        driver.get(args.url)
+        WebDriverWait(driver, 30).until(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, '.srp-jobtuple-wrapper'))
+        )
+        counter = count_round_trips(driver)
+
+        results = {}
+        for name, extract in (('per-element', extract_listing_tuples_per_element), ('batched', extract_listing_tuples)):
+            jobs, calls, latencies = measure(driver, counter, extract, args.repeats)
+            results[name] = jobs
+            print(f"{name:12} tuples={len(jobs):3d} round_trips={calls[-1]:4d} "
+                  f"median={statistics.median(latencies) * 1000:8.1f} ms "
+                  f"min={min(latencies) * 1000:8.1f} ms")
+
+        if results['per-element'] != results['batched']:
+            print("WARNING: batched and per-element extraction returned different tuples.")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
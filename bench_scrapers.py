@@ -0,0 +1,204 @@
+import argparse
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from fixture_server import FixtureServer
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+LISTING_FIELDNAMES = ['CITY ID', 'City', 'INDUSTRY ID', 'Job Title', 'Company', 'Experience', 'Location', 'Salary', 'Apply URL', 'Walk-in', 'Time', 'Venue']
+CITIES = ('Bengaluru', 'Chennai', 'Pune', 'Hyderabad', 'Mumbai', 'Noida')
+RSS_INTERVAL = 0.2
+
+
+def prepare_scrapper(directory, origin, queries, jobs_per_query):
+    with open(os.path.join(directory, 'params_input.csv'), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['query', 'City Key', 'City', 'INDUSTRY ID'])
+        for n in range(queries):
+            writer.writerow([f'?k=walkin%20jobs&jobPostType=1&cityTypeGid={n}', n, CITIES[n % len(CITIES)], n % 12])
+
+
+def prepare_scrape_jobs_thread(directory, origin, queries, jobs_per_query):
+    with open(os.path.join(directory, 'WalkinJobs-Input.csv'), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['CITY ID', 'City', 'INDUSTRY ID', 'URL'])
+        for n in range(queries):
+            city = CITIES[n % len(CITIES)]
+            writer.writerow([n, city, n % 12, f'{origin}/walkin-jobs-in-{city.lower()}{n}'])
+
+
+def prepare_job_desc_scrape(directory, origin, queries, jobs_per_query):
+    """Listings whose Apply URLs are detail pages on the fixture server."""
+    with open(os.path.join(directory, 'all_job_listings_thread.csv'), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=LISTING_FIELDNAMES)
+        writer.writeheader()
+        for n in range(queries * jobs_per_query):
+            writer.writerow({
+                'CITY ID': n % queries, 'City': CITIES[n % len(CITIES)], 'INDUSTRY ID': n % 12,
+                'Job Title': 'Title', 'Company': 'Company', 'Experience': '1-3 Yrs', 'Location': 'Location',
+                'Salary': 'Not disclosed', 'Apply URL': f'{origin}/job-listings-bench-{n:08x}-{n}',
+                'Walk-in': 'Yes', 'Time': 'N/A', 'Venue': 'N/A',
+            })
+
+
+# name -> (script, input preparation, output whose rows count as jobs)
+ENTRY_POINTS = {
+    'scrapper': ('scrapper.py', prepare_scrapper, 'output_scrap.csv'),
+    'scrape_jobs_thread': ('scrape_jobs_thread.py', prepare_scrape_jobs_thread, 'all_job_listings_thread.csv'),
+    'job_desc_scrape': ('job_desc_scrape.py', prepare_job_desc_scrape, 'all_job_listings_with_descriptions.csv'),
+}
+
+
+def tree_rss(root_pid):
+    """Resident bytes of a process and all its descendants (the browsers), from /proc."""
+    parents = {}
+    rss = {}
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as file:
+                # Fields after the parenthesised command name: state, ppid, ..., rss is the 22nd
+                fields = file.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        parents[int(entry)] = int(fields[1])
+        rss[int(entry)] = int(fields[21]) * page_size
+    tree = {root_pid}
+    changed = True
+    while changed:
+        children = {pid for pid, parent in parents.items() if parent in tree} - tree
+        changed = bool(children)
+        tree |= children
+    return sum(rss.get(pid, 0) for pid in tree)
+
+
+class PeakRss(threading.Thread):
+    """Samples the RSS of a process tree until stopped; `peak` is the largest sample."""
+
+    def __init__(self, pid):
+        super().__init__(name='rss sampler', daemon=True)
+        self.pid = pid
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(RSS_INTERVAL):
+            self.peak = max(self.peak, tree_rss(self.pid))
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def count_rows(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, newline='', encoding='utf-8') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+def run_entry_point(name, server, queries, jobs_per_query, timeout, profile):
+    """Run one scraper against the fixture server in a scratch directory and measure it."""
+    script, prepare, output = ENTRY_POINTS[name]
+    with tempfile.TemporaryDirectory(prefix=f'bench-{name}-') as directory:
+        prepare(directory, server.origin, queries, jobs_per_query)
+        env = dict(os.environ)
+        env.update({
+            'PYTHONPATH': REPO_DIR + os.pathsep + env.get('PYTHONPATH', ''),
+            'SCRAPER_BASE_URL': f'{server.origin}/walkin-jobs',
+            'SCRAPER_BROWSER_PROFILE': profile,
+        })
+        server.reset_metrics()
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, script)], cwd=directory, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        sampler = PeakRss(process.pid)
+        sampler.start()
+        try:
+            _, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            _, stderr = process.communicate()
+        finally:
+            sampler.stop()
+        elapsed = time.perf_counter() - started
+        jobs = count_rows(os.path.join(directory, output))
+
+    pages = [(kind, status, seconds) for kind, status, seconds in server.requests() if kind != 'other']
+    latencies = [seconds for _, _, seconds in pages]
+    peak_rss = sampler.peak or resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+    result = {
+        'entry_point': name,
+        'exit_code': process.returncode,
+        'seconds': round(elapsed, 3),
+        'listing_pages': sum(1 for kind, _, _ in pages if kind == 'listing'),
+        'detail_pages': sum(1 for kind, _, _ in pages if kind == 'detail'),
+        'errors': sum(1 for _, status, _ in pages if status != 200),
+        'jobs': jobs,
+        'pages_per_sec': round(len(pages) / elapsed, 2),
+        'jobs_per_sec': round(jobs / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'peak_rss_mb': round(peak_rss / 1024 / 1024, 1),
+    }
+    if process.returncode:
+        result['stderr_tail'] = stderr[-2000:]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against the local fixture server.")
+    parser.add_argument('--entry-points', nargs='+', default=list(ENTRY_POINTS), choices=list(ENTRY_POINTS))
+    parser.add_argument('--queries', type=int, default=3, help="Queries (cities) per run")
+    parser.add_argument('--jobs-per-query', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=50.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--walkin-ratio', type=float, default=1.0)
+    parser.add_argument('--banner-ratio', type=float, default=0.5)
+    parser.add_argument('--fixtures', help="Directory of saved pages to serve instead of generated ones")
+    parser.add_argument('--profile', default='lean', help="SCRAPER_BROWSER_PROFILE for the runs")
+    parser.add_argument('--timeout', type=float, default=1800, help="Seconds before a run is killed")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    server = FixtureServer(jobs_per_query=args.jobs_per_query, latency=args.latency_ms / 1000,
+                           jitter=args.jitter_ms / 1000, error_rate=args.error_rate,
+                           walkin_ratio=args.walkin_ratio, banner_ratio=args.banner_ratio,
+                           fixtures_dir=args.fixtures)
+    results = []
+    with server:
+        for name in args.entry_points:
+            result = run_entry_point(name, server, args.queries, args.jobs_per_query, args.timeout, args.profile)
+            results.append(result)
+            # Latencies are measured by the server, so they cover injected delay and serving, not rendering
+            print(f"{name:18} exit={result['exit_code']:<3} time={result['seconds']:8.2f} s "
+                  f"pages={result['listing_pages'] + result['detail_pages']:6d} errors={result['errors']:4d} "
+                  f"jobs={result['jobs']:6d} pages/s={result['pages_per_sec']:7.2f} jobs/s={result['jobs_per_sec']:7.2f} "
+                  f"p50={result['p50_ms']:7.1f} ms p95={result['p95_ms']:7.1f} ms peak_rss={result['peak_rss_mb']:8.1f} MB")
+            if 'stderr_tail' in result:
+                print(result['stderr_tail'], file=sys.stderr)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
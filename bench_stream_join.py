@@ -0,0 +1,98 @@
+import argparse
+import csv
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from sinks import CsvSink
+from stream_join import stream_join
+
+JOB_FIELDNAMES = ['CITY ID', 'City', 'INDUSTRY ID', 'Job Title', 'Company', 'Experience', 'Location', 'Salary', 'Apply URL', 'Walk-in', 'Time', 'Venue']
+DESCRIPTION_FIELDNAMES = ['Apply URL', 'Job Description']
+WORDS = ('walk-in interview java python developer sql sales support bpo voice process '
+         'fresher graduate salary incentives chennai bangalore pune hyderabad shift').split()
+
+
+def generate(directory, rows, description_bytes, seed=0):
+    """Synthetic listings and descriptions CSVs; about 10% of listings have no description."""
+    rng = random.Random(seed)
+    listings = os.path.join(directory, 'listings.csv')
+    descriptions = os.path.join(directory, 'descriptions.csv')
+    with open(listings, 'w', newline='', encoding='utf-8') as job_file, \
+            open(descriptions, 'w', newline='', encoding='utf-8') as description_file:
+        job_writer = csv.writer(job_file)
+        description_writer = csv.writer(description_file)
+        job_writer.writerow(JOB_FIELDNAMES)
+        description_writer.writerow(DESCRIPTION_FIELDNAMES)
+        words = description_bytes // 7
+        for n in range(rows):
+            url = f'https://www.naukri.com/job-listings-{n:09d}'
+            job_writer.writerow([n % 40, 'City', n % 12, 'Title', f'Company {n % 500}', '1-3 Yrs',
+                                 'Location', 'Not disclosed', url, 'Yes', '10 AM', 'Venue'])
+            if rng.random() < 0.9:
+                description_writer.writerow([url, ' '.join(rng.choice(WORDS) for _ in range(words))])
+    return listings, descriptions
+
+
+def run_memory(listings, descriptions, output):
+    merged = pd.merge(pd.read_csv(listings), pd.read_csv(descriptions), on='Apply URL', how='left')
+    merged.to_csv(output, index=False, encoding='utf-8')
+    return len(merged)
+
+
+def run_stream(listings, descriptions, output, memory_mb):
+    return stream_join(listings, descriptions, lambda fieldnames: CsvSink(output, fieldnames),
+                       memory_budget=memory_mb * 1024 * 1024)
+
+
+def run_once(mode, listings, descriptions, output, memory_mb):
+    """Child process entry point: run one join and report rows, seconds and peak RSS."""
+    started = time.perf_counter()
+    if mode == 'memory':
+        rows = run_memory(listings, descriptions, output)
+    else:
+        rows = run_stream(listings, descriptions, output, memory_mb)
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{rows} {elapsed:.3f} {peak_mb:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare in-memory pandas merge and the streaming join.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000, 200000])
+    parser.add_argument('--description-bytes', type=int, default=2000)
+    parser.add_argument('--memory-mb', type=int, default=64, help="Memory budget for the streaming join")
+    parser.add_argument('--modes', nargs='+', default=['memory', 'stream'], choices=['memory', 'stream'])
+    parser.add_argument('--run-once', nargs=4, metavar=('MODE', 'LISTINGS', 'DESCRIPTIONS', 'OUTPUT'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_once:
+        run_once(*args.run_once, args.memory_mb)
+        return
+
+    with tempfile.TemporaryDirectory(prefix='bench-join-') as directory:
+        for rows in args.rows:
+            listings, descriptions = generate(directory, rows, args.description_bytes)
+            size_mb = (os.path.getsize(listings) + os.path.getsize(descriptions)) / 1024 / 1024
+            for mode in args.modes:
+                output = os.path.join(directory, f'merged-{mode}.csv')
+                # Each join runs in its own process so peak RSS is not shared between runs
+                result = subprocess.run(
+                    [sys.executable, __file__, '--memory-mb', str(args.memory_mb),
+                     '--run-once', mode, listings, descriptions, output],
+                    check=True, capture_output=True, text=True,
+                )
+                merged_rows, seconds, peak_mb = result.stdout.split()[-3:]
+                print(f"rows={rows:9d} input={size_mb:8.1f} MB mode={mode:6} merged={merged_rows:>9} "
+                      f"time={float(seconds):7.2f} s peak_rss={float(peak_mb):8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import logging
+import os
+import re
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_manager.chrome import ChromeDriverManager
+
+import metrics
+from navigation import log_navigation_summary, record as record_navigation
+from page_cache import get_cache, log_cache_stats
+
+# SCRAPER_BROWSER_PROFILE=lean selects the headless, resource-blocking profile
+PROFILE = os.environ.get('SCRAPER_BROWSER_PROFILE', 'default')
+# SCRAPER_CHROMEDRIVER=/path/to/chromedriver skips webdriver-manager (offline runs)
+CHROMEDRIVER_PATH = os.environ.get('SCRAPER_CHROMEDRIVER')
+# SCRAPER_PAGE_STATS=1 logs bytes downloaded and load time for every page
+PAGE_STATS = os.environ.get('SCRAPER_PAGE_STATS', '0') == '1'
+
+LEAN_WINDOW_SIZE = '1280,800'
+
+# Resources the scrapers never read: images (including the banner), media, fonts
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.mp3',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    # Third-party analytics, ads and trackers
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*facebook.net*', '*facebook.com/tr*',
+    '*hotjar.com*', '*clarity.ms*', '*linkedin.com/px*', '*bing.com/bat*',
+    '*criteo.net*', '*taboola.com*', '*moengage.com*',
+]
+
+PAGE_STATS_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var bytes = nav ? nav.transferSize : 0;
+for (var i = 0; i < resources.length; i++) {
+    bytes += resources[i].transferSize || 0;
+}
+return {
+    bytes: bytes,
+    resources: resources.length,
+    dom_ready_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : null
+};
+"""
+
+REPLAY_SCRIPT = """
+document.open();
+document.write(arguments[0]);
+document.close();
+"""
+
+_totals = {'pages': 0, 'bytes': 0, 'load_seconds': 0.0}
+_totals_lock = threading.Lock()
+# id(driver) -> URL it last loaded live, i.e. not replayed from the cache
+_live_loads = {}
+
+_resolved_chromedriver = None
+_chromedriver_lock = threading.Lock()
+
+
+def chromedriver_path(default_path=None):
+    """Resolve the chromedriver binary once per process.
+
+    SCRAPER_CHROMEDRIVER wins, then default_path, then a single
+    ChromeDriverManager().install() whose result is reused by every later call.
+    """
+    global _resolved_chromedriver
+    if CHROMEDRIVER_PATH:
+        return CHROMEDRIVER_PATH
+    if default_path:
+        return default_path
+    if _resolved_chromedriver is None:
+        with _chromedriver_lock:
+            if _resolved_chromedriver is None:
+                _resolved_chromedriver = ChromeDriverManager().install()
+                logging.info(f"Resolved chromedriver at {_resolved_chromedriver}")
+    return _resolved_chromedriver
+
+
+def chrome_service(default_path=None):
+    """A chromedriver Service using the memoized binary path."""
+    return Service(chromedriver_path(default_path))
+
+
+def chrome_options(profile=None):
+    """Build Chrome options for the default or lean profile."""
+    profile = profile or PROFILE
+    options = Options()
+    options.add_argument("--incognito")
+    if profile == 'lean':
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-gpu")
+        options.add_argument(f"--window-size={LEAN_WINDOW_SIZE}")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.page_load_strategy = 'eager'
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.managed_default_content_settings.fonts': 2,
+        })
+    elif profile != 'default':
+        raise ValueError(f"Unknown browser profile: {profile}")
+    return options
+
+
+def apply_profile(driver, profile=None):
+    """Install per-driver settings that cannot be passed as options (CDP URL blocking)."""
+    profile = profile or PROFILE
+    if profile != 'lean':
+        return driver
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    except WebDriverException as e:
+        logging.warning(f"Could not enable request blocking: {e}")
+    return driver
+
+
+class TimedWait(WebDriverWait):
+    """WebDriverWait whose until() is timed as the 'wait' phase and counts timeouts."""
+
+    def until(self, method, message=''):
+        with metrics.timed('wait'):
+            try:
+                return super().until(method, message)
+            except TimeoutException:
+                metrics.count('timeouts', phase='wait')
+                raise
+
+
+def page_stats(driver):
+    """Bytes transferred and DOM-ready time of the currently loaded page."""
+    return driver.execute_script(PAGE_STATS_SCRIPT)
+
+
+def replay_page(driver, url, page_html):
+    """Show cached HTML in the browser: a blank page whose document is the cached markup.
+
+    Cached pages have no scripts, and a <base> tag keeps relative links
+    resolving against `url`, so selectors and hrefs read as on the live page.
+    """
+    base = f'<base href="{url}">'
+    page_html, found = re.subn(r'(<head\b[^>]*>)', lambda match: match.group(1) + base, page_html, count=1,
+                               flags=re.IGNORECASE)
+    if not found:
+        page_html = base + page_html
+    driver.get('about:blank')
+    driver.execute_script(REPLAY_SCRIPT, page_html)
+
+
+def load_page(driver, url):
+    """driver.get with optional per-page transfer and timing stats; every call is counted.
+
+    With SCRAPER_PAGE_CACHE a fresh cached copy is replayed instead. Live
+    loads are not stored here: the caller calls cache_page() once its wait
+    confirmed the content rendered, so half-loaded or bot-check pages are
+    never replayed.
+    """
+    cache = get_cache()
+    if cache:
+        cached = cache.get(url, 'browser')
+        if cached is not None:
+            _live_loads.pop(id(driver), None)
+            replay_page(driver, url, cached)
+            return
+    record_navigation(url, 'browser')
+    started = time.perf_counter()
+    with metrics.timed('navigation'):
+        driver.get(url)
+    if cache:
+        _live_loads[id(driver)] = url
+    if not PAGE_STATS:
+        return
+    elapsed = time.perf_counter() - started
+    try:
+        stats = page_stats(driver)
+    except WebDriverException as e:
+        logging.info(f"Page stats unavailable for {url}: {e}")
+        return
+    with _totals_lock:
+        _totals['pages'] += 1
+        _totals['bytes'] += stats['bytes']
+        _totals['load_seconds'] += elapsed
+    logging.info(
+        f"Page stats for {url}: {stats['bytes']} bytes in {stats['resources']} resources, "
+        f"get {elapsed * 1000:.0f} ms, DOM ready {stats['dom_ready_ms'] or 0:.0f} ms ({PROFILE} profile)"
+    )
+
+
+def cache_page(driver, url):
+    """Store the page `driver` loaded live from `url`; call it only after the content was found.
+
+    Replayed pages are not stored again, so a cached copy expires on schedule.
+    """
+    cache = get_cache()
+    if cache and _live_loads.pop(id(driver), None) == url:
+        cache.put(url, driver.page_source, source='browser')
+
+
+def page_stats_summary():
+    """Totals accumulated by load_page across all drivers in this process."""
+    with _totals_lock:
+        summary = dict(_totals)
+    pages = summary['pages']
+    summary['avg_bytes'] = summary['bytes'] / pages if pages else 0
+    summary['avg_load_seconds'] = summary['load_seconds'] / pages if pages else 0.0
+    return summary
+
+
+def log_page_stats_summary():
+    """Log navigation counts, cache hits and phase timings, and transfer totals when SCRAPER_PAGE_STATS is set."""
+    log_navigation_summary()
+    log_cache_stats()
+    metrics.log_metrics_summary()
+    if PAGE_STATS:
+        logging.info(f"Page stats summary ({PROFILE} profile): {page_stats_summary()}")
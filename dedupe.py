@@ -0,0 +1,212 @@
+import argparse
+import logging
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+# SCRAPER_DEDUPE=1 skips detail fetches for listings that match an already queued posting
+ENABLED = os.environ.get('SCRAPER_DEDUPE', '0') == '1'
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands of 8 rows: pairs above ~0.7 Jaccard almost always share a bucket
+SHINGLE_SIZE = 5
+THRESHOLD = 0.7
+# Listing tuples are short, so they must agree more closely to count as the same posting
+LISTING_THRESHOLD = 0.8
+
+# Location is part of the fingerprint and must also match exactly: the same employer runs
+# identical-looking walk-ins in several cities, each at its own venue
+LISTING_FIELDS = ('Job Title', 'Company', 'Experience', 'Salary', 'Location')
+POSTING_FIELDS = ('Job Title', 'Company', 'Job Description')
+CLUSTER_COLUMN = 'Cluster ID'
+DUPLICATE_COLUMN = 'Duplicate Of'
+
+_PRIME = np.uint64(4294967311)  # Smallest prime above 2**32
+_MAX_HASH = np.uint64(2 ** 32 - 1)
+
+
+def _permutations(num_perm, seed=1):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+
+def normalize_text(text):
+    """Lowercase alphanumeric words; HTML tags (innerHTML descriptions) are dropped."""
+    text = re.sub(r'<[^>]+>', ' ', text or '')
+    return re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """32-bit hashes of the character n-grams of normalized text."""
+    text = normalize_text(text)
+    if len(text) < size:
+        grams = {text} if text else set()
+    else:
+        grams = {text[i:i + size] for i in range(len(text) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    """MinHash signatures from NUM_PERM universal hash functions, computed with numpy."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        self.num_perm = num_perm
+        self._a, self._b = _permutations(num_perm, seed)
+
+    def signature(self, text):
+        hashes = shingles(text)
+        if not len(hashes):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # a * x + b stays below 2**64 because a, b and x are all below 2**32
+        return ((self._a * hashes[None, :] + self._b) % _PRIME).min(axis=1)
+
+
+def similarity(left, right):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(left == right))
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures that assigns each item a cluster id.
+
+    An item joins the cluster of the first earlier item it shares a band bucket
+    with and whose estimated similarity reaches `threshold`; otherwise it
+    starts a new cluster. Lookups touch only the item's BANDS buckets, so cost
+    does not grow with the number of items indexed. Not thread safe.
+    """
+
+    def __init__(self, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = []
+        self._clusters = []
+        self._keys = []
+        self._next_cluster = 0
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def query(self, signature, accept=None):
+        """(cluster id, key) of the closest earlier match, or None.
+
+        `accept(key)` can veto candidates, e.g. ones that differ in a field that must match exactly.
+        """
+        best, best_score = None, self.threshold
+        seen = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            for item in self._buckets[band].get(band_key, ()):
+                if item in seen:
+                    continue
+                seen.add(item)
+                if accept and not accept(self._keys[item]):
+                    continue
+                score = similarity(signature, self._signatures[item])
+                if score >= best_score:
+                    best, best_score = item, score
+        if best is None:
+            return None
+        return self._clusters[best], self._keys[best]
+
+    def add(self, key, signature, accept=None):
+        """Index an item and return (cluster id, key of the item it duplicates or None)."""
+        match = self.query(signature, accept)
+        if match:
+            cluster, duplicate_of = match
+        else:
+            cluster, duplicate_of = self._next_cluster, None
+            self._next_cluster += 1
+        item = len(self._signatures)
+        self._signatures.append(signature)
+        self._clusters.append(cluster)
+        self._keys.append(key)
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(band_key, []).append(item)
+        return cluster, duplicate_of
+
+    def __len__(self):
+        return len(self._signatures)
+
+    @property
+    def cluster_count(self):
+        return self._next_cluster
+
+
+def posting_text(row, fields):
+    return ' | '.join(str(row.get(field) or '') for field in fields)
+
+
+class ListingDeduper:
+    """Listing-level near-duplicate check used before a detail page is fetched."""
+
+    def __init__(self, threshold=LISTING_THRESHOLD):
+        self.hasher = MinHasher()
+        self.index = LSHIndex(threshold)
+        self.duplicates = 0
+        self._locations = {}  # Apply URL -> normalized location
+        self._lock = threading.Lock()
+
+    def check(self, job_fields):
+        """(cluster id, Apply URL of the earlier posting or None) for a listing tuple.
+
+        Only a posting in the same location counts as a duplicate.
+        """
+        signature = self.hasher.signature(posting_text(job_fields, LISTING_FIELDS))
+        location = normalize_text(job_fields.get('Location'))
+        # Sub-queries of a split query queue their listings from several threads
+        with self._lock:
+            cluster, duplicate_of = self.index.add(job_fields['Apply URL'], signature,
+                                                   lambda url: self._locations.get(url) == location)
+            self._locations[job_fields['Apply URL']] = location
+            if duplicate_of:
+                self.duplicates += 1
+        return cluster, duplicate_of
+
+
+def cluster_frame(df, fields=POSTING_FIELDS, threshold=THRESHOLD):
+    """Tag every row with a near-duplicate cluster id over title, company and description."""
+    hasher = MinHasher()
+    index = LSHIndex(threshold)
+    fields = [field for field in fields if field in df]
+    clusters = []
+    duplicates = []
+    for row in df[fields].to_dict('records'):
+        cluster, duplicate_of = index.add(len(clusters), hasher.signature(posting_text(row, fields)))
+        clusters.append(cluster)
+        duplicates.append(duplicate_of)
+    df = df.copy()
+    df[CLUSTER_COLUMN] = clusters
+    if 'Apply URL' in df:
+        urls = df['Apply URL'].tolist()
+        df[DUPLICATE_COLUMN] = [urls[item] if item is not None else None for item in duplicates]
+    logging.info(f"{len(df)} rows in {index.cluster_count} clusters")
+    return df
+
+
+def main():
+    from sinks import read_output
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Tag near-duplicate postings with a cluster id.")
+    parser.add_argument('input', help="Scraper output (.csv, .parquet, .arrow or .db)")
+    parser.add_argument('output', nargs='?', help="Output CSV (default: <input>_clustered.csv)")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    df = read_output(args.input)
+    df = cluster_frame(df, threshold=args.threshold)
+    output = args.output or os.path.splitext(args.input)[0] + '_clustered.csv'
+    df.to_csv(output, index=False, encoding='utf-8')
+    logging.info(f"Clustered output saved as '{output}'.")
+
+
+if __name__ == "__main__":
+    main()
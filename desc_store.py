@@ -0,0 +1,210 @@
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# SCRAPER_DESCRIPTION_STORE=1 stores descriptions once in DESCRIPTION_DB; rows carry only the hash
+ENABLED = os.environ.get('SCRAPER_DESCRIPTION_STORE', '0') == '1'
+DESCRIPTION_DB = os.environ.get('SCRAPER_DESCRIPTION_DB', 'descriptions.db')
+DESCRIPTION_COLUMN = 'Job Description'
+HASH_COLUMN = 'Job Description Hash'
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+DICTIONARY_SIZE = 110 * 1024
+TRAINING_SAMPLES = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS descriptions (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+
+def description_hash(text):
+    """Content address of a description: 128-bit blake2b of its UTF-8 text."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def row_fieldnames(fieldnames):
+    """Output columns with the description column replaced by its hash."""
+    return [HASH_COLUMN if name == DESCRIPTION_COLUMN else name for name in fieldnames]
+
+
+class DescriptionStore:
+    """Descriptions keyed by content hash, each stored once and compressed.
+
+    Blobs are zstd compressed, using the newest dictionary trained with
+    train_dictionary() when there is one, or zlib when zstandard is not
+    installed. The codec is recorded per blob so older blobs stay readable.
+    Hashes already in the store are kept in memory and never re-written.
+    """
+
+    def __init__(self, path=DESCRIPTION_DB):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._known = {row[0] for row in self._conn.execute('SELECT hash FROM descriptions')}
+        self._dictionaries = {}
+        self._stats = {'puts': 0, 'stored': 0, 'raw_bytes': 0, 'stored_bytes': 0}
+        self._compress = self._compressor()
+
+    def _dictionary(self, dict_id):
+        if dict_id not in self._dictionaries:
+            with self._lock:
+                row = self._conn.execute('SELECT data FROM dictionaries WHERE id = ?', (dict_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown compression dictionary {dict_id}")
+            self._dictionaries[dict_id] = zstandard.ZstdCompressionDict(row[0])
+        return self._dictionaries[dict_id]
+
+    def _compressor(self):
+        """(codec, compress) for new blobs."""
+        if zstandard is None:
+            return 'zlib', lambda data: zlib.compress(data, ZLIB_LEVEL)
+        row = self._conn.execute('SELECT MAX(id) FROM dictionaries').fetchone()
+        if row[0] is None:
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+            return 'zstd', compressor.compress
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self._dictionary(row[0]))
+        return f'zstd:{row[0]}', compressor.compress
+
+    def _decompress(self, codec, data):
+        if codec == 'zlib':
+            return zlib.decompress(data)
+        if zstandard is None:
+            raise RuntimeError(f"Description stored with {codec} needs zstandard: pip install zstandard")
+        if codec == 'zstd':
+            return zstandard.ZstdDecompressor().decompress(data)
+        dict_id = int(codec.split(':', 1)[1])
+        return zstandard.ZstdDecompressor(dict_data=self._dictionary(dict_id)).decompress(data)
+
+    def put(self, text):
+        """Store `text` if it is new and return its hash."""
+        if text is None:
+            return None
+        key = description_hash(text)
+        with self._lock:
+            self._stats['puts'] += 1
+        if key in self._known:
+            return key
+        raw = text.encode('utf-8')
+        # zstd compressors are not safe for concurrent use, so compression happens under the lock
+        with self._lock, self._conn:
+            if key in self._known:
+                return key
+            codec, compress = self._compress
+            data = compress(raw)
+            self._conn.execute(
+                'INSERT OR IGNORE INTO descriptions (hash, codec, size, data) VALUES (?, ?, ?, ?)',
+                (key, codec, len(raw), data),
+            )
+            self._known.add(key)
+            self._stats['stored'] += 1
+            self._stats['raw_bytes'] += len(raw)
+            self._stats['stored_bytes'] += len(data)
+        return key
+
+    def get(self, key):
+        """The description stored under `key`, or None."""
+        with self._lock:
+            row = self._conn.execute('SELECT codec, data FROM descriptions WHERE hash = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return self._decompress(*row).decode('utf-8')
+
+    def __contains__(self, key):
+        return key in self._known
+
+    def store_row(self, row):
+        """Replace a row's description with its hash, storing the text."""
+        row = dict(row)
+        row[HASH_COLUMN] = self.put(row.pop(DESCRIPTION_COLUMN, None))
+        return row
+
+    def expand(self, df):
+        """Add the description column back to a DataFrame of hashed rows."""
+        df = df.copy()
+        df[DESCRIPTION_COLUMN] = [self.get(key) if isinstance(key, str) else None for key in df[HASH_COLUMN]]
+        return df
+
+    def train_dictionary(self, size=DICTIONARY_SIZE, samples=TRAINING_SAMPLES):
+        """Train a zstd dictionary on stored descriptions; later puts use it."""
+        if zstandard is None:
+            raise RuntimeError("Dictionary training needs zstandard: pip install zstandard")
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT codec, data FROM descriptions ORDER BY RANDOM() LIMIT ?', (samples,)
+            ).fetchall()
+        texts = [self._decompress(codec, data) for codec, data in rows]
+        dictionary = zstandard.train_dictionary(size, texts)
+        with self._lock, self._conn:
+            cursor = self._conn.execute('INSERT INTO dictionaries (data) VALUES (?)', (dictionary.as_bytes(),))
+        self._dictionaries[cursor.lastrowid] = dictionary
+        compressor = self._compressor()
+        with self._lock:
+            self._compress = compressor
+        logging.info(f"Trained description dictionary {cursor.lastrowid} on {len(texts)} samples")
+        return cursor.lastrowid
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['unique'] = len(self._known)
+        snapshot['codec'] = self._compress[0]
+        snapshot['ratio'] = snapshot['raw_bytes'] / snapshot['stored_bytes'] if snapshot['stored_bytes'] else 0.0
+        return snapshot
+
+    def close(self):
+        logging.info(f"Description store {self.path}: {self.stats()}")
+        with self._lock:
+            self._conn.close()
+
+
+def open_store():
+    """The configured description store, or None when SCRAPER_DESCRIPTION_STORE is off."""
+    return DescriptionStore(DESCRIPTION_DB) if ENABLED else None
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed description store.")
+    parser.add_argument('command', choices=['train', 'stats', 'get'])
+    parser.add_argument('hash', nargs='?', help="Description hash for the get command")
+    parser.add_argument('--db', default=DESCRIPTION_DB)
+    parser.add_argument('--size', type=int, default=DICTIONARY_SIZE, help="Dictionary size in bytes")
+    parser.add_argument('--samples', type=int, default=TRAINING_SAMPLES)
+    args = parser.parse_args()
+
+    store = DescriptionStore(args.db)
+    try:
+        if args.command == 'train':
+            store.train_dictionary(args.size, args.samples)
+        elif args.command == 'get':
+            print(store.get(args.hash))
+        else:
+            print(store.stats())
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Queue, Empty
+
+from selenium.common.exceptions import WebDriverException
+
+# SCRAPER_PREWARM=N starts N browsers in parallel before the crawl begins
+PREWARM = int(os.environ.get('SCRAPER_PREWARM', '0'))
+
+
+class DriverPool:
+    """Bounded pool of WebDriver instances shared by worker threads.
+
+    Drivers are created lazily up to `size`, health checked on checkout and
+    recycled after `recycle_after` pages or whenever a WebDriverException is
+    raised while a caller holds one.
+    """
+
+    def __init__(self, create_driver, size=5, recycle_after=50):
+        self.create_driver = create_driver
+        self.size = size
+        self.recycle_after = recycle_after
+        self._idle = Queue()
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._live = 0
+        self._closed = False
+        self._stats = {
+            'created': 0,
+            'recycled': 0,
+            'unhealthy': 0,
+            'checkouts': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+        }
+
+    def _healthy(self, driver):
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def _discard(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            self._live -= 1
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            logging.warning(f"Error while quitting recycled driver: {e}")
+
+    def prewarm(self, count=None):
+        """Start up to `count` browsers in parallel and park them as idle.
+
+        Defaults to SCRAPER_PREWARM; does nothing when that is 0.
+        """
+        count = PREWARM if count is None else count
+        with self._lock:
+            count = max(0, min(count, self.size - self._live))
+            self._live += count
+        if not count:
+            return 0
+
+        started = time.monotonic()
+        ready = 0
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(self.create_driver) for _ in range(count)]
+            for future in futures:
+                try:
+                    driver = future.result()
+                except Exception as e:
+                    logging.error(f"Failed to prewarm WebDriver: {e}")
+                    with self._lock:
+                        self._live -= 1
+                    continue
+                with self._lock:
+                    self._pages[id(driver)] = 0
+                    self._stats['created'] += 1
+                self._idle.put(driver)
+                ready += 1
+        logging.info(f"Prewarmed {ready} WebDriver(s) in {time.monotonic() - started:.1f}s")
+        return ready
+
+    def checkout(self, timeout=None):
+        """Return a healthy driver, blocking while all drivers are in use."""
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+        started = time.monotonic()
+        while True:
+            driver = None
+            create = False
+            try:
+                driver = self._idle.get_nowait()
+            except Empty:
+                with self._lock:
+                    if self._live < self.size:
+                        self._live += 1
+                        create = True
+                if not create:
+                    remaining = None if timeout is None else max(0, timeout - (time.monotonic() - started))
+                    try:
+                        driver = self._idle.get(timeout=remaining)
+                    except Empty:
+                        raise TimeoutError(f"No WebDriver available after {timeout} seconds")
+
+            if create:
+                try:
+                    driver = self.create_driver()
+                except Exception:
+                    with self._lock:
+                        self._live -= 1
+                    raise
+                with self._lock:
+                    self._pages[id(driver)] = 0
+                    self._stats['created'] += 1
+            elif not self._healthy(driver):
+                logging.warning("Discarding unhealthy WebDriver from pool.")
+                with self._lock:
+                    self._stats['unhealthy'] += 1
+                self._discard(driver)
+                continue
+
+            waited = time.monotonic() - started
+            with self._lock:
+                self._stats['checkouts'] += 1
+                self._stats['wait_total'] += waited
+                self._stats['wait_max'] = max(self._stats['wait_max'], waited)
+            return driver
+
+    def checkin(self, driver, pages=1, broken=False):
+        """Return a driver to the pool, recycling it if it is worn out or broken."""
+        with self._lock:
+            used = self._pages.get(id(driver), 0) + pages
+            self._pages[id(driver)] = used
+        if broken or self._closed or used >= self.recycle_after:
+            if not self._closed:
+                with self._lock:
+                    self._stats['recycled'] += 1
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Context manager around checkout/checkin."""
+        driver = self.checkout(timeout)
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.checkin(driver, broken=broken)
+
+    def stats(self):
+        """Return a snapshot of pool counters."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['size'] = self.size
+            snapshot['recycle_after'] = self.recycle_after
+            snapshot['live'] = self._live
+        snapshot['idle'] = self._idle.qsize()
+        snapshot['in_use'] = snapshot['live'] - snapshot['idle']
+        checkouts = snapshot['checkouts']
+        snapshot['wait_avg'] = snapshot['wait_total'] / checkouts if checkouts else 0.0
+        return snapshot
+
+    def close(self):
+        """Quit every idle driver; drivers still checked out are quit on checkin."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(driver)
+        logging.info(f"DriverPool closed. Stats: {self.stats()}")
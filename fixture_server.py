@@ -0,0 +1,301 @@
+import argparse
+import html
+import logging
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+JOBS_PER_PAGE = 20
+JOB_PATH = '/job-listings-'
+# /walkin-jobs, /walkin-jobs-2, /walkin-jobs-bengaluru-3: a listing name with an optional page number
+LISTING_PATTERN = re.compile(r'^/(?P<name>[A-Za-z0-9-]+?)(?:-(?P<page>\d+))?$')
+LIVE_ORIGIN = 'https://www.naukri.com'
+
+TITLES = ('Customer Support Executive', 'Java Developer', 'Python Developer', 'Sales Officer',
+          'Voice Process Associate', 'Data Analyst', 'Field Sales Executive', 'Accountant')
+COMPANIES = ('Acme Services', 'Globex', 'Initech', 'Umbrella BPO', 'Hooli', 'Stark Industries')
+CITIES = ('Bengaluru', 'Chennai', 'Pune', 'Hyderabad', 'Mumbai', 'Noida')
+MONTHS = ('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+          'October', 'November', 'December')
+WORDS = ('walk-in interview candidates graduates freshers experience communication skills shift '
+         'rotational salary incentives process voice non-voice customer support documents resume '
+         'apply venue contact hr team growth training').split()
+
+LISTING_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>{name} - page {page}</title></head>
+<body><div id="root"><div><main>
+<div class="styles_count-container"><span class="styles_count-string__DlPaZ">{first} - {last} of {total:,}</span></div>
+<div class="styles_jlc__main__VdwtF">
+{tuples}
+</div>
+</main></div></div></body></html>
+"""
+
+TUPLE_TEMPLATE = """<div class="srp-jobtuple-wrapper" data-job-id="{job_id}"><div class="cust-job-tuple">
+<div class="row1"><a class="title" href="{href}" title="{title}">{title}</a></div>
+<div class="row2"><span class="comp-dtls-wrap"><a class="comp-name" href="#">{company}</a></span></div>
+<div class="row3"><div class="job-details">
+<span class="exp-wrap"><span class="ni-job-tuple-icon ni-job-tuple-icon-srp-experience"><span class="expwdth exp" title="{experience}">{experience}</span></span></span>
+<span class="sal-wrap"><span class="ni-job-tuple-icon ni-job-tuple-icon-srp-rupee"><span title="{salary}">{salary}</span></span></span>
+<span class="loc-wrap"><span class="ni-job-tuple-icon ni-job-tuple-icon-srp-location"><span class="locWdth" title="{location}">{location}</span></span></span>
+</div></div>
+{walkin}
+</div></div>"""
+
+# Matches the XPaths in http_fetch.DETAIL_XPATHS and scrapper.extract_job_details for both layouts
+DETAIL_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>{title} - {company}</title>
+<style>.styles_JDC__dang-inner-html__h0K4t.collapsed {{ max-height: 60px; overflow: hidden; }}</style>
+</head>
+<body><div id="root"><div><main>
+{banner}<div class="styles_left-section-container__btAcB"><div class="styles_jd-container__uqUJN">
+<section class="styles_job-header-container___0wLZ">
+<div class="styles_jhc__top__BUxpc">
+<div class="styles_jhc__jd-top-head__MFoZl">
+<header><h1 class="styles_jd-header-title__rZwM1" title="{title}">{title}</h1></header>
+<div class="styles_jd-header-comp-name__MvqAI"><a href="#">{company}</a></div>
+</div>
+<div class="styles_jhc__bottom__2kdfi">
+<div class="styles_jhc__exp-salary-container__NXsVd">
+<div class="styles_jhc__exp__k_giM"><span>{experience}</span></div>
+<div class="styles_jhc__salary__jdfEC"><span>{salary}</span></div>
+</div>
+<div class="styles_jhc__loc___Du2H"><span>{location}</span></div>
+<div class="styles_jhc__stat__PgY67"><span>Posted: 1 day ago</span></div>
+{walkin}
+</div>
+</div>
+</section>
+<section class="styles_job-desc-container__txpYf">
+<div class="styles_JDC__dang-inner-html__h0K4t collapsed" id="jd">{description}</div>
+<p class="styles_read-more__MyWkb"><a class="styles_read-more-link__dD_5h" href="javascript:void(0)"
+onclick="document.getElementById('jd').classList.remove('collapsed'); this.parentNode.style.display = 'none';">read more</a></p>
+</section>
+</div></div>
+</main></div></div></body></html>
+"""
+
+BANNER = '<div class="styles_banner-container__bYQEf"><img src="/banner.png" alt="banner"></div>\n'
+WALKIN_BLOCK = ('<div class="styles_jhc__walkin__57j_D"><span>{time}</span></div>\n'
+                '<div class="styles_jhc__venue__2cqi5"><span>{venue}</span></div>')
+
+
+def _rng(*parts):
+    """Deterministic randomness per page, so a job looks the same on every request."""
+    return random.Random(zlib.crc32('|'.join(str(part) for part in parts).encode('utf-8')))
+
+
+def _ordinal(day):
+    suffix = 'th' if 10 <= day % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
+    return f'{day}{suffix}'
+
+
+def job_fields(job_id, walkin_ratio=1.0):
+    """The listing-level fields of a synthetic job."""
+    rng = _rng('job', job_id)
+    low = rng.randint(0, 8)
+    pay = rng.randint(1, 9)
+    return {
+        'title': rng.choice(TITLES),
+        'company': rng.choice(COMPANIES),
+        'experience': f'{low}-{low + rng.randint(1, 5)} Yrs',
+        'salary': rng.choice(('Not disclosed', f'{pay}-{pay + rng.randint(1, 4)} Lacs PA')),
+        'location': rng.choice(CITIES),
+        'walkin': rng.random() < walkin_ratio,
+    }
+
+
+def listing_page(name, page, query, total, walkin_ratio=1.0):
+    """Listing page `page` of a query with `total` jobs; pages past the last job have no tuples."""
+    query_id = format(zlib.crc32(f'{name}?{query}'.encode('utf-8')), '08x')
+    first = (page - 1) * JOBS_PER_PAGE
+    count = max(0, min(JOBS_PER_PAGE, total - first))
+    tuples = []
+    for index in range(count):
+        job_id = f'{query_id}-{first + index}'
+        fields = job_fields(job_id, walkin_ratio)
+        slug = re.sub(r'[^a-z0-9]+', '-', f"{fields['title']} {fields['company']}".lower()).strip('-')
+        tuples.append(TUPLE_TEMPLATE.format(
+            job_id=job_id,
+            href=f'{JOB_PATH}{slug}-{job_id}?src=jobsearchDesk&sid=1&xp={index + 1}&px={page}',
+            walkin='<span class="ttc__walk-in">Walk-in</span>' if fields['walkin'] else '',
+            **{key: html.escape(str(value)) for key, value in fields.items() if key != 'walkin'},
+        ))
+    return LISTING_TEMPLATE.format(name=html.escape(name), page=page, first=first + 1 if count else 0,
+                                   last=first + count, total=total, tuples='\n'.join(tuples))
+
+
+def detail_page(job_id, walkin_ratio=1.0, banner_ratio=0.5, description_words=300):
+    """A job detail page; about `banner_ratio` of jobs use the banner layout."""
+    fields = job_fields(job_id, walkin_ratio)
+    rng = _rng('detail', job_id)
+    walkin = ''
+    if fields['walkin']:
+        month = rng.choice(MONTHS)
+        start = rng.randint(1, 20)
+        walkin = WALKIN_BLOCK.format(
+            time=f'{_ordinal(start)} {month} - {_ordinal(start + rng.randint(0, 7))} {month} , '
+                 f'{rng.randint(9, 11)}.{rng.choice(("00", "30"))} AM - {rng.randint(1, 5)}.{rng.choice(("00", "30"))} PM',
+            venue=f'{rng.randint(1, 99)}, Tech Park, {fields["location"]} - {rng.randint(400000, 699999)} (View on map)',
+        )
+    paragraphs = []
+    for _ in range(max(1, description_words // 60)):
+        paragraphs.append('<p>' + ' '.join(rng.choice(WORDS) for _ in range(60)) + '.</p>')
+    return DETAIL_TEMPLATE.format(
+        banner=BANNER if rng.random() < banner_ratio else '',
+        walkin=walkin,
+        description='\n'.join(paragraphs),
+        **{key: html.escape(str(value)) for key, value in fields.items() if key != 'walkin'},
+    )
+
+
+class FixtureServer:
+    """Local stand-in for the job site that serves synthetic or saved pages.
+
+    Listing URLs (/<name> and /<name>-<page>) and detail URLs (/job-listings-...)
+    are generated deterministically, so every scraper can run against it
+    unchanged apart from its base URL. A saved page in `fixtures_dir`, named
+    after the URL path (walkin-jobs-2.html, job-listings-foo-123.html), is
+    served instead of a generated one, with links to the live site rewritten
+    to this server. Every response waits `latency` plus up to `jitter`
+    seconds, and `error_rate` of page requests get a 503.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, jobs_per_query=100, latency=0.0, jitter=0.0, error_rate=0.0,
+                 walkin_ratio=1.0, banner_ratio=0.5, fixtures_dir=None, seed=0):
+        self.jobs_per_query = jobs_per_query
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.walkin_ratio = walkin_ratio
+        self.banner_ratio = banner_ratio
+        self.fixtures_dir = fixtures_dir
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests = []
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def origin(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._serve(self)
+
+            def log_message(self, format, *args):
+                logging.debug(f"fixture server: {format % args}")
+
+        return Handler
+
+    def _page(self, path, query):
+        """(kind, status, body) for a request path."""
+        if self.fixtures_dir:
+            saved = os.path.join(self.fixtures_dir, path.strip('/') + '.html')
+            if os.path.isfile(saved):
+                with open(saved, encoding='utf-8') as file:
+                    body = file.read().replace(LIVE_ORIGIN, self.origin)
+                return ('detail' if path.startswith(JOB_PATH) else 'listing'), 200, body
+        if path.startswith(JOB_PATH):
+            job_id = '-'.join(path.rsplit('-', 2)[-2:])
+            return 'detail', 200, detail_page(job_id, self.walkin_ratio, self.banner_ratio)
+        match = LISTING_PATTERN.match(path)
+        if match:
+            page = int(match.group('page') or 1)
+            return 'listing', 200, listing_page(match.group('name'), page, query, self.jobs_per_query,
+                                                self.walkin_ratio)
+        return 'other', 404, '<html><body>Not found</body></html>'
+
+    def _serve(self, request):
+        started = time.perf_counter()
+        parts = urlsplit(request.path)
+        if parts.path.endswith(('.png', '.ico')):
+            request.send_response(204)
+            request.send_header('Content-Length', '0')
+            request.end_headers()
+            return
+        kind, status, body = self._page(parts.path, parts.query)
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = kind != 'other' and self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            status, body = 503, '<html><body>Service Unavailable</body></html>'
+        data = body.encode('utf-8')
+        request.send_response(status)
+        request.send_header('Content-Type', 'text/html; charset=utf-8')
+        request.send_header('Content-Length', str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+        with self._lock:
+            self._requests.append((kind, status, time.perf_counter() - started))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fixture server', daemon=True)
+        self._thread.start()
+        logging.info(f"Fixture server listening on {self.origin}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def reset_metrics(self):
+        with self._lock:
+            self._requests = []
+
+    def requests(self):
+        """(kind, status, seconds) for every request served since the last reset."""
+        with self._lock:
+            return list(self._requests)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Serve synthetic or saved job pages for offline runs.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--jobs-per-query', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--walkin-ratio', type=float, default=1.0)
+    parser.add_argument('--banner-ratio', type=float, default=0.5)
+    parser.add_argument('--fixtures', help="Directory of saved pages named after their URL path")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.host, args.port, args.jobs_per_query, args.latency_ms / 1000, args.jitter_ms / 1000,
+                           args.error_rate, args.walkin_ratio, args.banner_ratio, args.fixtures)
+    with server:
+        print(f"Serving on {server.origin}; point SCRAPER_BASE_URL at {server.origin}/walkin-jobs")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+DISCOVERED = 'discovered'
+FETCHED = 'fetched'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    meta TEXT,
+    last_error TEXT,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state);
+"""
+
+
+def url_key(url):
+    """64-bit fingerprint used by the in-memory membership index."""
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class Frontier:
+    """Persistent set of Apply URLs with discovered/fetched/failed state.
+
+    State lives in SQLite so a crashed run can resume; fetched URLs are also
+    kept as 64-bit fingerprints in memory so is_fetched() is an O(1) set lookup
+    even with millions of rows.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._fetched = {
+            url_key(url) for (url,) in self._conn.execute('SELECT url FROM frontier WHERE state = ?', (FETCHED,))
+        }
+
+    def reset(self):
+        """Forget every URL, for a fresh (non-resumed) run."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM frontier')
+            self._fetched.clear()
+
+    def add(self, url, meta=None):
+        """Record a discovered URL; URLs already known keep their state."""
+        self.add_many([(url, meta)])
+
+    def add_many(self, items):
+        """Record (url, meta) pairs in one transaction."""
+        now = time.time()
+        rows = [(url, DISCOVERED, json.dumps(meta) if meta is not None else None, now) for url, meta in items]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO frontier (url, state, meta, updated_at) VALUES (?, ?, ?, ?)', rows
+            )
+
+    def mark_fetched(self, url):
+        self.mark_fetched_many([url])
+
+    def mark_fetched_many(self, urls):
+        """Mark several URLs fetched in one transaction."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'UPDATE frontier SET state = ?, attempts = attempts + 1, last_error = NULL, updated_at = ? WHERE url = ?',
+                [(FETCHED, now, url) for url in urls],
+            )
+            self._fetched.update(url_key(url) for url in urls)
+
+    def mark_failed(self, url, error=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE frontier SET state = ?, attempts = attempts + 1, last_error = ?, updated_at = ? WHERE url = ?',
+                (FAILED, error, time.time(), url),
+            )
+
+    def is_fetched(self, url):
+        return url_key(url) in self._fetched
+
+    def __contains__(self, url):
+        with self._lock:
+            found = self._conn.execute('SELECT 1 FROM frontier WHERE url = ?', (url,)).fetchone()
+        return found is not None
+
+    def pending(self, retry_failed=True, max_attempts=None):
+        """(url, meta) pairs that still need fetching."""
+        states = (DISCOVERED, FAILED) if retry_failed else (DISCOVERED,)
+        query = f'SELECT url, meta FROM frontier WHERE state IN ({",".join("?" * len(states))})'
+        params = list(states)
+        if max_attempts is not None:
+            query += ' AND attempts < ?'
+            params.append(max_attempts)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [(url, json.loads(meta) if meta else None) for url, meta in rows]
+
+    def failed(self):
+        """(url, attempts, last_error) for every URL currently marked failed."""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT url, attempts, last_error FROM frontier WHERE state = ? ORDER BY url', (FAILED,)
+            ).fetchall()
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT state, COUNT(*) FROM frontier GROUP BY state').fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,232 @@
+import logging
+import os
+import threading
+
+import requests
+from lxml import etree, html as lxml_html
+from requests.adapters import HTTPAdapter
+
+import metrics
+from navigation import record as record_navigation
+from page_cache import get_cache
+from rate_control import limiter_for
+
+# Set SCRAPER_HTTP_FIRST=0 to always go straight to the Selenium path
+ENABLED = os.environ.get('SCRAPER_HTTP_FIRST', '1') != '0'
+POOL_SIZE = 100
+TIMEOUT = 10
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+BANNER_XPATH = '//*[@id="root"]/div/main/div[contains(@class, "styles_banner-container__bYQEf")]/img'
+
+# Same layouts the Selenium path in scrapper.py distinguishes
+DETAIL_XPATHS = {
+    True: {
+        'Job Title': '/html/body/div[1]/div/main/div[2]/div[1]/section[1]/div[1]/div[1]/header/h1',
+        'Company': '/html/body/div[1]/div/main/div[2]/div[1]/section[1]/div[1]/div[1]/div/a',
+        'Salary': '/html/body/div[1]/div/main/div[2]/div[1]/section[1]/div[1]/div[2]/div[1]/div[2]',
+        'Experience': '/html/body/div[1]/div/main/div[2]/div[1]/section[1]/div[1]/div[2]/div[1]/div[1]/span',
+    },
+    False: {
+        'Job Title': '/html/body/div[1]/div/main/div[1]/div[1]/section[1]/div[1]/div[1]/header/h1',
+        'Company': '/html/body/div[1]/div/main/div[1]/div[1]/section[1]/div[1]/div[1]/div/a',
+        'Salary': '/html/body/div[1]/div/main/div[1]/div[1]/section[1]/div[1]/div[2]/div[1]/div[2]/span',
+        'Experience': '/html/body/div[1]/div/main/div[1]/div[1]/section[1]/div[1]/div[2]/div[1]/div[1]/span',
+    },
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update(HEADERS)
+                _session = session
+    return _session
+
+
+def fetch_html(url, timeout=TIMEOUT):
+    """Download a page over the pooled session, or serve it from the page cache. Returns None on any failure."""
+    cache = get_cache()
+    if cache:
+        cached = cache.get(url)
+        if cached is not None:
+            return cached
+    record_navigation(url, 'http')
+    try:
+        # Every HTTP request to a host shares its adaptive limit with the browser loads
+        with limiter_for(url).slot() as slot, metrics.timed('http_fetch'):
+            response = get_session().get(url, timeout=timeout)
+            if response.status_code == 429 or response.status_code >= 500:
+                slot.fail()
+        if response.status_code != 200:
+            logging.info(f"HTTP {response.status_code} for {url}")
+            metrics.count('http_errors', status=response.status_code)
+            return None
+        if cache:
+            cache.put(url, response.text, response.status_code, 'http')
+        return response.text
+    except requests.RequestException as e:
+        logging.info(f"HTTP fetch failed for {url}: {e}")
+        metrics.count('http_errors', status=type(e).__name__)
+        return None
+
+
+def forget_page(url):
+    """Drop a cached HTTP copy that turned out unusable (an error or bot-check page served with 200)."""
+    cache = get_cache()
+    if cache:
+        cache.invalidate(url, 'http')
+
+
+def by_class(tree, class_name, scope='//'):
+    """Return elements carrying the given CSS class; use scope='.//' below an element."""
+    return tree.xpath(f'{scope}*[contains(concat(" ", normalize-space(@class), " "), " {class_name} ")]')
+
+
+def element_text(element):
+    """Approximate Selenium's .text: visible text with collapsed whitespace per line."""
+    lines = (' '.join(line.split()) for line in element.text_content().splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def inner_html(element):
+    """Serialized children of an element, like innerHTML."""
+    parts = [element.text or '']
+    parts.extend(lxml_html.tostring(child, encoding='unicode') for child in element)
+    return ''.join(parts).strip()
+
+
+def _first_text(tree, xpath):
+    found = tree.xpath(xpath)
+    return element_text(found[0]) if found else None
+
+
+def _first_class_text(tree, class_name):
+    found = by_class(tree, class_name)
+    return element_text(found[0]) if found else None
+
+
+@metrics.timed_function('parse_detail')
+def parse_detail_page(page_html):
+    """Parse every field the scrapers read from a job detail page.
+
+    Missing fields are returned as None so callers can decide whether to fall
+    back to the browser.
+    """
+    tree = lxml_html.fromstring(page_html)
+    has_banner = bool(tree.xpath(BANNER_XPATH))
+    details = {field: _first_text(tree, xpath) for field, xpath in DETAIL_XPATHS[has_banner].items()}
+
+    details['Time'] = _first_class_text(tree, 'styles_jhc__walkin__57j_D')
+    details['Venue'] = _first_class_text(tree, 'styles_jhc__venue__2cqi5')
+    exp_spans = tree.xpath('//*[contains(@class, "styles_jhc__exp__k_giM")]//span')
+    if exp_spans:
+        details['Experience'] = element_text(exp_spans[0])
+    details['Job Description'] = _first_class_text(tree, 'styles_job-desc-container__txpYf')
+    desc_inner = by_class(tree, 'styles_JDC__dang-inner-html__h0K4t')
+    details['Job Description HTML'] = inner_html(desc_inner[0]) if desc_inner else None
+    return details
+
+
+def fetch_detail_fields(url, required):
+    """Fetch a detail page over HTTP and return its fields.
+
+    Returns None when HTTP-first mode is disabled, the request fails or any
+    field in `required` is missing, which signals the caller to use Selenium.
+    """
+    if not ENABLED:
+        return None
+    page_html = fetch_html(url)
+    if not page_html:
+        metrics.count('browser_fallbacks', reason='fetch')
+        return None
+    try:
+        details = parse_detail_page(page_html)
+    except (ValueError, etree.ParserError) as e:
+        logging.info(f"Could not parse {url}: {e}")
+        metrics.count('browser_fallbacks', reason='parse')
+        forget_page(url)
+        return None
+    missing = [field for field in required if not details.get(field)]
+    if missing:
+        logging.info(f"HTTP fetch for {url} missing {missing}, falling back to browser.")
+        metrics.count('browser_fallbacks', reason='missing')
+        forget_page(url)
+        return None
+    return details
+
+
+def parse_total_jobs(page_html):
+    """Read the total job count from a listing page, or None if it is absent."""
+    return _total_jobs(lxml_html.fromstring(page_html))
+
+
+def _total_jobs(tree):
+    found = tree.xpath('//span[contains(@class, "styles_count-string__DlPaZ")]')
+    if not found:
+        return None
+    try:
+        return int(element_text(found[0]).split('of')[-1].strip().replace(',', ''))
+    except ValueError:
+        return None
+
+
+@metrics.timed_function('parse_listing')
+def parse_landing_page(page_html, page_url=None):
+    """(total jobs, page-1 job tuples) from one parse of a listing page; total is None if absent."""
+    tree = lxml_html.fromstring(page_html)
+    return _total_jobs(tree), _listing_tuples(tree, page_url)
+
+
+def parse_job_tuple(job):
+    """Fields of one .srp-jobtuple-wrapper element, with the Selenium path's defaults."""
+    title = by_class(job, 'title', './/')
+    company = by_class(job, 'comp-name', './/')
+    # Ads and placeholders have no company; the Selenium path skips them too
+    if not title or not title[0].get('href') or not company:
+        return None
+    experience = job.xpath('.//*[contains(@class, "exp-wrap")]//*[contains(concat(" ", normalize-space(@class), " "), " exp ")]')
+    location = by_class(job, 'locWdth', './/')
+    salary = job.xpath('.//*[contains(@class, "sal-wrap")]//*[contains(@class, "ni-job-tuple-icon")]//span')
+    salary_title = (salary[0].get('title') or '').strip() if salary else ''
+    return {
+        'Job Title': element_text(title[0]),
+        'Company': element_text(company[0]),
+        'Experience': element_text(experience[0]) if experience else 'N/A',
+        'Location': element_text(location[0]) if location else 'N/A',
+        'Salary': salary_title if salary else 'Not disclosed',
+        'Apply URL': title[0].get('href'),
+        'Walk-in': 'Yes' if by_class(job, 'ttc__walk-in', './/') else 'No',
+    }
+
+
+@metrics.timed_function('parse_listing')
+def parse_listing_page(page_html, page_url=None):
+    """Parse all job tuples on a listing page into plain dicts.
+
+    Relative hrefs are resolved against page_url, as Selenium's href attribute would be.
+    """
+    return _listing_tuples(lxml_html.fromstring(page_html), page_url)
+
+
+def _listing_tuples(tree, page_url):
+    if page_url:
+        tree.make_links_absolute(page_url)
+    jobs = (parse_job_tuple(job) for job in by_class(tree, 'srp-jobtuple-wrapper'))
+    return [job for job in jobs if job]
@@ -0,0 +1,75 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# SCRAPER_INCREMENTAL=1 stops paging at postings seen on the previous run
+ENABLED = os.environ.get('SCRAPER_INCREMENTAL', '0') == '1'
+# Pages fetched concurrently before checking whether to stop
+WINDOW = int(os.environ.get('SCRAPER_INCREMENTAL_WINDOW', '2'))
+# Fraction of a page's postings that must be known to stop paging
+KNOWN_RATIO = float(os.environ.get('SCRAPER_INCREMENTAL_RATIO', '0.8'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_urls (
+    query_key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    PRIMARY KEY (query_key, url)
+) WITHOUT ROWID;
+"""
+
+
+def query_key(base_url, query_params):
+    """Stable key for one input query row."""
+    return hashlib.sha1(f"{base_url}{query_params}".encode('utf-8')).hexdigest()
+
+
+class SeenUrls:
+    """Apply URLs seen per query across runs, for incremental crawling.
+
+    Scrapers call listed() when a listing page is read and written() once the
+    rows are on disk, so a posting whose detail fetch or write failed is not
+    treated as seen and is picked up again by the next run.
+    """
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._listed = {}  # Apply URL -> keys of the queries that listed it, until its row is written
+
+    def for_query(self, key):
+        """Every URL recorded for the query on earlier runs."""
+        with self._lock:
+            rows = self._conn.execute('SELECT url FROM seen_urls WHERE query_key = ?', (key,))
+            return {url for (url,) in rows}
+
+    def record(self, key, urls):
+        self._insert([(key, url) for url in urls])
+
+    def listed(self, key, urls):
+        """Note URLs read from a query's listing; they are recorded by written()."""
+        with self._lock:
+            for url in urls:
+                self._listed.setdefault(url, set()).add(key)
+
+    def written(self, urls):
+        """Record written URLs under every query that listed them."""
+        with self._lock:
+            pairs = [(key, url) for url in urls for key in self._listed.pop(url, ())]
+        self._insert(pairs)
+
+    def _insert(self, pairs):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO seen_urls (query_key, url, first_seen) VALUES (?, ?, ?)',
+                [(key, url, now) for key, url in pairs],
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
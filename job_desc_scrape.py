@@ -1,79 +1,137 @@
 import csv
 import concurrent.futures
+import os
+from queue import Queue
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 import logging
-from threading import Lock
+from browser import TimedWait, apply_profile, cache_page, chrome_options, chrome_service, load_page, log_page_stats_summary
+import metrics
+from driver_pool import DriverPool
+from rate_control import MAX_CONCURRENCY, all_stats, limiter_for
+from http_fetch import fetch_detail_fields
+from sinks import open_sink
+from frontier import Frontier
+from writers import END, QueueWriter
 
 # Setup logging
 logging.basicConfig(filename='job_scraper.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Lock for synchronized file access
-file_lock = Lock()
-
+MAX_WORKERS = MAX_CONCURRENCY  # Upper bound; the adaptive limiter decides how many load at once
+RECYCLE_AFTER = 50  # Pages served by one browser before it is restarted
+OUTPUT_FIELDNAMES = ['Apply URL', 'Job Description']
+WRITE_QUEUE_SIZE = 1000  # Workers only block once this many rows await the writer
+WRITE_BATCH_SIZE = 100
+MAX_ATTEMPTS = 3
+FRONTIER_DB = 'job_desc_frontier.db'
+FAILED_CSV = 'job_desc_failed.csv'
+# SCRAPER_RESUME=1 appends to the previous output and fetches only URLs not yet written
+RESUME = os.environ.get('SCRAPER_RESUME', '0') == '1'
+# Seconds between fsyncs of the output file
+FSYNC_INTERVAL = float(os.environ.get('SCRAPER_FSYNC_INTERVAL', '5'))
+
+@metrics.timed_function('browser_startup')
 def create_driver():
-    chrome_options = Options()
-    chrome_options.add_argument("--incognito")  # Run in headless mode
-    return webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=chrome_options)
+    driver = webdriver.Chrome(service=chrome_service(), options=chrome_options())
+    return apply_profile(driver)
+
+def write_description(row_queue, url, job_description):
+    """Hand a row to the writer thread; the worker never touches the file."""
+    row_queue.put({'Apply URL': url, 'Job Description': job_description})
+    logging.info(f"Queued description for URL: {url}")
 
-def scrape_job_description(url, output_csv):
+def scrape_job_description(url, row_queue, pool, frontier):
     logging.info(f"Starting scrape for URL: {url}")
-    driver = create_driver()
+    fields = fetch_detail_fields(url, ('Job Description',))
+    if fields:
+        logging.info(f"Fetched job description over HTTP for URL: {url}")
+        write_description(row_queue, url, fields['Job Description'])
+        return
+
+    driver = pool.checkout()
+    broken = False
     attempt = 0
-    job_description = "Failed to fetch description"
-    
-    while attempt < 3:
-        try:
-            driver.get(url)
-            logging.info(f"Loaded URL: {url}")
+    last_error = None
+    limiter = limiter_for(url)
 
+    try:
+        while attempt < MAX_ATTEMPTS:
             try:
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, 'styles_job-desc-container__txpYf'))
-                )
-                logging.info(f"Found job description container for URL: {url}")
-
                 try:
-                    read_more_button = driver.find_element(By.CLASS_NAME, 'styles_read-more__MyWkb')
-                    read_more_button.click()
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.CLASS_NAME, 'styles_JDC__dang-inner-html__h0K4t'))
-                    )
-                    logging.info(f"Clicked 'Read More' for URL: {url}")
-                except NoSuchElementException:
-                    logging.info(f"No 'Read More' button for URL: {url}")
-                
-                job_description_element = driver.find_element(By.CLASS_NAME, 'styles_job-desc-container__txpYf')
-                job_description = job_description_element.text
-                logging.info(f"Extracted job description for URL: {url}")
-
-                # Write to CSV in real-time
-                with file_lock:
-                    with open(output_csv, mode='a', newline='', encoding='utf-8') as outfile:
-                        writer = csv.DictWriter(outfile, fieldnames=['Apply URL', 'Job Description'])
-                        writer.writerow({'Apply URL': url, 'Job Description': job_description})
-                        logging.info(f"Written description for URL: {url}")
-                break
-
-            except TimeoutException:
-                logging.warning(f"Timeout occurred for URL: {url}")
+                    # The slot records load latency and timeouts for the host's concurrency limit
+                    with limiter.slot():
+                        load_page(driver, url)
+                        logging.info(f"Loaded URL: {url}")
+                        TimedWait(driver, 20).until(
+                            EC.presence_of_element_located((By.CLASS_NAME, 'styles_job-desc-container__txpYf'))
+                        )
+                        cache_page(driver, url)
+                    logging.info(f"Found job description container for URL: {url}")
+
+                    try:
+                        read_more_button = driver.find_element(By.CLASS_NAME, 'styles_read-more__MyWkb')
+                        read_more_button.click()
+                        TimedWait(driver, 10).until(
+                            EC.presence_of_element_located((By.CLASS_NAME, 'styles_JDC__dang-inner-html__h0K4t'))
+                        )
+                        logging.info(f"Clicked 'Read More' for URL: {url}")
+                    except NoSuchElementException:
+                        logging.info(f"No 'Read More' button for URL: {url}")
+
+                    with metrics.timed('extract_detail'):
+                        job_description_element = driver.find_element(By.CLASS_NAME, 'styles_job-desc-container__txpYf')
+                        job_description = job_description_element.text
+                    logging.info(f"Extracted job description for URL: {url}")
+
+                    # Queue for the writer thread
+                    write_description(row_queue, url, job_description)
+                    break
+
+                except TimeoutException:
+                    logging.warning(f"Timeout occurred for URL: {url}")
+                    last_error = "Timed out waiting for the job description"
+                    attempt += 1
+                    metrics.count('retries', phase='job_description')
+                    time.sleep(limiter.backoff_delay(attempt))
+
+            except WebDriverException as e:
+                logging.error(f"WebDriverException for URL: {url} - {str(e)}")
+                last_error = str(e)
                 attempt += 1
-                time.sleep(10)  # Increase delay before retrying
-
-        except WebDriverException as e:
-            logging.error(f"WebDriverException for URL: {url} - {str(e)}")
-            attempt += 1
-            time.sleep(10)
-
-    driver.quit()
-    logging.info(f"Driver closed for URL: {url}")
+                broken = True
+                if attempt >= MAX_ATTEMPTS:
+                    break
+                metrics.count('retries', phase='job_description')
+                pool.checkin(driver, broken=True)
+                driver = None
+                driver = pool.checkout()
+                broken = False
+                time.sleep(limiter.backoff_delay(attempt))
+    except Exception:
+        # e.g. urllib3 MaxRetryError once chromedriver died: the driver is not reused
+        broken = True
+        raise
+    finally:
+        # Every checked-out driver goes back, or the pool loses the slot for good
+        if driver is not None:
+            pool.checkin(driver, broken=broken)
+            logging.info(f"Driver returned to pool for URL: {url}")
+
+    if attempt >= MAX_ATTEMPTS:
+        # Failed URLs are not resubmitted on resume; they are listed in FAILED_CSV instead
+        logging.error(f"Giving up on URL after {MAX_ATTEMPTS} attempts: {url}")
+        frontier.mark_failed(url, last_error)
+
+def write_failed(frontier):
+    failed = frontier.failed()
+    with open(FAILED_CSV, mode='w', newline='', encoding='utf-8') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(['Apply URL', 'Attempts', 'Last Error'])
+        writer.writerows(failed)
+    logging.info(f"{len(failed)} failed URLs written to {FAILED_CSV}")
 
 def main():
     input_csv = 'all_job_listings_thread.csv'
@@ -81,26 +139,65 @@ def main():
 
     logging.info(f"Reading from input CSV: {input_csv}")
 
-    # Prepare output CSV file with header
-    with open(output_csv, mode='w', newline='', encoding='utf-8') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=['Apply URL', 'Job Description'])
-        writer.writeheader()
+    frontier = Frontier(FRONTIER_DB)
+    resume = RESUME and bool(frontier.counts())
+    if resume:
+        logging.info(f"Resuming from {FRONTIER_DB}: {frontier.counts()}")
+    else:
+        frontier.reset()
 
     with open(input_csv, mode='r', newline='', encoding='utf-8') as infile:
         reader = csv.DictReader(infile)
-        urls = [row['Apply URL'] for row in reader]
-        logging.info(f"URLs extracted: {len(urls)}")
+        frontier.add_many((row['Apply URL'], None) for row in reader)
+    # Written and permanently failed URLs are skipped without re-reading the output CSV
+    urls = [url for url, _ in frontier.pending(retry_failed=False)]
+    logging.info(f"URLs left to fetch: {len(urls)}")
 
     logging.info("Starting to process URLs")
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        futures = [executor.submit(scrape_job_description, url, output_csv) for url in urls]
+    pool = DriverPool(create_driver, size=MAX_WORKERS, recycle_after=RECYCLE_AFTER)
+    pool.prewarm()
+    row_queue = Queue(maxsize=WRITE_QUEUE_SIZE)
+    # The writer thread keeps the output open, writes in batches and fsyncs every FSYNC_INTERVAL seconds
+    sink = open_sink(output_csv, OUTPUT_FIELDNAMES, 'csv', append=resume)
+
+    def write_rows(rows):
+        # URLs are marked fetched only once their rows have been flushed
+        sink.write_rows(rows)
+        sink.flush()
+        frontier.mark_fetched_many([row['Apply URL'] for row in rows])
+
+    writer = QueueWriter(row_queue, write_rows, batch_size=WRITE_BATCH_SIZE,
+                         name='description writer', sync=sink.sync, sync_interval=FSYNC_INTERVAL)
+    writer.start()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    try:
+        futures = [executor.submit(scrape_job_description, url, row_queue, pool, frontier) for url in urls]
         for future in concurrent.futures.as_completed(futures):
             try:
                 future.result()
             except Exception as e:
                 logging.error(f"Exception occurred: {str(e)}")
-
+        executor.shutdown(wait=True)
+    except KeyboardInterrupt:
+        # Drop queued URLs; pages already loading finish and their rows are still written
+        logging.info("Interrupted; cancelling pending URLs and flushing written rows.")
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    finally:
+        # Rows queued before END are written and fsynced before the file is closed
+        row_queue.put(END)
+        writer.join()
+        sink.close()
+        pool.close()
+        logging.info(f"Concurrency stats: {all_stats()}")
+        logging.info(f"Frontier state: {frontier.counts()}")
+        write_failed(frontier)
+        frontier.close()
+    if writer.error:
+        raise writer.error
+
+    log_page_stats_summary()
     logging.info("Completed processing URLs")
 
 if __name__ == "__main__":
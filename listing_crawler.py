@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import threading
+from queue import Queue
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+from batch_extract import extract_listing_tuples
+from browser import TimedWait, cache_page, load_page
+from http_fetch import ENABLED as HTTP_ENABLED, fetch_html, forget_page, parse_landing_page, parse_listing_page
+from rate_control import MAX_CONCURRENCY
+
+COUNT_SELECTOR = 'span.styles_count-string__DlPaZ'
+
+_DONE = object()
+
+
+def page_url(base_url, page_number, query_params):
+    return f"{base_url}-{page_number}{query_params}"
+
+
+def http_landing_page(base_url, query_params):
+    """(total jobs, page-1 job tuples or None) from one HTTP fetch of a query's landing page, or None."""
+    if not HTTP_ENABLED:
+        return None
+    url = base_url + query_params
+    page_html = fetch_html(url)
+    if not page_html:
+        return None
+    total, jobs = parse_landing_page(page_html, url)
+    if total is None:
+        forget_page(url)
+        return None
+    return total, jobs or None
+
+
+def browser_landing_page(driver, base_url, query_params, timeout=10):
+    """(total jobs, page-1 job tuples or None) from one browser load of a query's landing page.
+
+    The count is 0 when it cannot be read, as the scripts' get_total_jobs always did.
+    """
+    load_page(driver, base_url + query_params)
+    try:
+        total_element = TimedWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, COUNT_SELECTOR))
+        )
+        cache_page(driver, base_url + query_params)
+        total = int(total_element.text.split('of')[-1].strip().replace(',', ''))
+    except (TimeoutException, NoSuchElementException, ValueError) as e:
+        logging.info(f"Could not read the job count of {base_url}{query_params}: {e}")
+        return 0, None
+    try:
+        jobs = extract_listing_tuples(driver)
+    except WebDriverException as e:
+        logging.info(f"Could not read the job tuples of {base_url}{query_params}: {e}")
+        jobs = None
+    return total, jobs or None
+
+
+def read_landing_page(driver, base_url, query_params):
+    """Job count and page-1 tuples of a query in one navigation, HTTP first.
+
+    The landing page (base_url + query_params) is page 1 of the listing, so
+    its tuples are handed to iter_query_pages as `first_page` instead of
+    loading page 1 a second time.
+    """
+    return http_landing_page(base_url, query_params) or browser_landing_page(driver, base_url, query_params)
+
+
+async def _fetch_page(base_url, page_number, query_params, semaphore):
+    url = page_url(base_url, page_number, query_params)
+    async with semaphore:
+        page_html = await asyncio.to_thread(fetch_html, url)
+    if not page_html:
+        return page_number, None
+    jobs = await asyncio.to_thread(parse_listing_page, page_html, url)
+    if not jobs:
+        logging.info(f"No job tuples in HTTP response for {url}")
+        forget_page(url)
+        return page_number, None
+    return page_number, jobs
+
+
+async def crawl_listing_pages(base_url, query_params, page_numbers, max_in_flight=MAX_CONCURRENCY):
+    """Fetch listing pages concurrently and yield (page_number, jobs) as they complete.
+
+    How many requests actually run at once is decided by the host's adaptive
+    limiter in fetch_html; `max_in_flight` only bounds the threads waiting on it.
+
+    jobs is a list of tuple dicts (see http_fetch.parse_job_tuple), or None
+    when the page could not be fetched or parsed over HTTP.
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+    tasks = [
+        asyncio.ensure_future(_fetch_page(base_url, page_number, query_params, semaphore))
+        for page_number in page_numbers
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def iter_listing_pages(base_url, query_params, page_numbers, max_in_flight=MAX_CONCURRENCY):
+    """Blocking iterator over crawl_listing_pages for the thread-based scripts.
+
+    The event loop runs in a background thread, so the caller can do blocking
+    work (e.g. Selenium walk-in lookups) per page without stalling the fetches.
+    When HTTP fetching is disabled every page is yielded with jobs=None.
+    """
+    page_numbers = list(page_numbers)
+    if not HTTP_ENABLED:
+        for page_number in page_numbers:
+            yield page_number, None
+        return
+
+    results = Queue()
+
+    async def produce():
+        async for item in crawl_listing_pages(base_url, query_params, page_numbers, max_in_flight):
+            results.put(item)
+
+    def run():
+        try:
+            asyncio.run(produce())
+        except Exception as e:
+            logging.error(f"Listing crawl failed for {base_url}{query_params}: {e}")
+        finally:
+            results.put(_DONE)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    seen = set()
+    while True:
+        item = results.get()
+        if item is _DONE:
+            break
+        seen.add(item[0])
+        yield item
+    thread.join()
+
+    # Pages lost to a crashed loop still need the browser fallback
+    for page_number in page_numbers:
+        if page_number not in seen:
+            yield page_number, None
+
+
+def iter_query_pages(base_url, query_params, max_pages, read_in_browser, known=None, window=None,
+                     known_ratio=0.8, first_page=None):
+    """Yield (page_number, jobs) for every page of a query, HTTP first with browser fallback.
+
+    read_in_browser(page_number) loads a page the HTTP crawl could not read and
+    returns its job tuples, or None to stop paging (no more jobs). `first_page`
+    holds page 1's tuples when they were already read with the job count.
+
+    With `known` (Apply URLs seen on earlier runs) pages are requested `window`
+    at a time, only unseen jobs are yielded, and paging stops after the window
+    in which some page is at least `known_ratio` known. Listings are sorted by
+    recency, so everything past that point was seen before.
+    """
+    page_numbers = list(range(1, max_pages + 1))
+    if known is None or not window:
+        window = len(page_numbers) or 1
+
+    for start in range(0, len(page_numbers), window):
+        batch = page_numbers[start:start + window]
+        fallback_pages = []
+        mostly_known = False
+
+        to_fetch = batch
+        if first_page and batch[0] == 1:
+            to_fetch = batch[1:]
+            mostly_known |= _is_mostly_known(first_page, known, known_ratio)
+            yield 1, _unseen(first_page, known)
+
+        for page_number, jobs in iter_listing_pages(base_url, query_params, to_fetch):
+            if jobs is None:
+                fallback_pages.append(page_number)
+                continue
+            mostly_known |= _is_mostly_known(jobs, known, known_ratio)
+            yield page_number, _unseen(jobs, known)
+
+        # Pages the HTTP crawl could not read are loaded in the browser
+        for page_number in sorted(fallback_pages):
+            jobs = read_in_browser(page_number)
+            if jobs is None:
+                return
+            mostly_known |= _is_mostly_known(jobs, known, known_ratio)
+            yield page_number, _unseen(jobs, known)
+
+        if mostly_known:
+            logging.info(f"Stopping after page {batch[-1]} of {base_url}{query_params}: postings already seen.")
+            return
+
+
+def _is_mostly_known(jobs, known, known_ratio):
+    if not known or not jobs:
+        return False
+    seen = sum(1 for job in jobs if job['Apply URL'] in known)
+    return seen / len(jobs) >= known_ratio
+
+
+def _unseen(jobs, known):
+    if not known:
+        return jobs
+    return [job for job in jobs if job['Apply URL'] not in known]
@@ -1,188 +1,211 @@
-import math
 import csv
-import threading
+import os
 import time
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from queue import Queue
+from browser import TimedWait, apply_profile, cache_page, chrome_options, chrome_service, load_page, log_page_stats_summary
+import metrics
+from driver_pool import DriverPool
+from rate_control import MAX_CONCURRENCY, all_stats, limiter_for
+from http_fetch import fetch_detail_fields
+from batch_extract import extract_listing_tuples
+from listing_crawler import iter_listing_pages, read_landing_page
+from query_planner import capped_pages
+from writers import END, QueueWriter
+from sinks import open_sink, output_path
+from normalize import normalize_file
+from stream_join import stream_join
 
 # Setup logging
 import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+MAX_WORKERS = 5
+DESCRIPTION_POOL_SIZE = MAX_CONCURRENCY  # Upper bound; the adaptive limiter decides how many load at once
+RECYCLE_AFTER = 50  # Pages served by one browser before it is restarted
+QUEUE_SIZE = 1000  # Rows buffered per output before producers block
+WRITE_BATCH_SIZE = 200
+MAX_ATTEMPTS = 3  # Browser loads per detail page before it is given up
+# SCRAPER_STREAMING_MERGE=0 falls back to loading both CSVs into pandas for the merge
+STREAMING_MERGE = os.environ.get('SCRAPER_STREAMING_MERGE', '1') == '1'
+# SCRAPER_NORMALIZE=1 writes merged_job_listings_normalized.csv with typed salary/experience/walk-in columns
+NORMALIZE = os.environ.get('SCRAPER_NORMALIZE', '0') == '1'
+
+JOB_FIELDNAMES = ['CITY ID', 'City', 'INDUSTRY ID', 'Job Title', 'Company', 'Experience', 'Location', 'Salary', 'Apply URL', 'Walk-in', 'Time', 'Venue']
+DESCRIPTION_FIELDNAMES = ['Apply URL', 'Job Description']
+
 # Setup WebDriver
+@metrics.timed_function('browser_startup')
 def setup_driver():
     try:
-        options = Options()
-        options.add_argument("--incognito")
-        # options.add_argument("--headless")  # Uncomment for headless mode
-
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+        driver = webdriver.Chrome(service=chrome_service(), options=chrome_options())
+        apply_profile(driver)
         logging.info("WebDriver setup successfully.")
         return driver
     except Exception as e:
         logging.error(f"An error occurred while setting up WebDriver: {e}")
         raise
 
-# Get max pages from the job listings
+# Get max pages and page 1's job tuples from one load of the query's landing page
 def get_max_pages(driver, base_url, query_params):
-    try:
-        driver.get(base_url + query_params)
-        wait = WebDriverWait(driver, 10)
-        total_pages_element = wait.until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, 'span.styles_count-string__DlPaZ'))
-        )
-        total_pages_text = total_pages_element.text
-
-        total_jobs_text = total_pages_text.split('of')[-1].strip()
-        total_jobs = int(total_jobs_text.replace(',', ''))
-        max_pages = min(math.ceil(total_jobs / 20), 15)  # Limit to 15 pages
-
-        logging.info(f"Total number of jobs: {total_jobs}")
-        logging.info(f"Maximum number of pages: {max_pages}")
-
-        return max_pages
-    except Exception as e:
-        logging.error(f"An error occurred while retrieving max pages: {e}")
-        return 1
+    total_jobs, first_page = read_landing_page(driver, base_url, query_params)
+    if not total_jobs:
+        logging.error("Could not read the total number of jobs; trying one page.")
+        return 1, first_page
+    max_pages = capped_pages(total_jobs)
+
+    logging.info(f"Total number of jobs: {total_jobs}")
+    logging.info(f"Maximum number of pages: {max_pages}")
+
+    return max_pages, first_page
+
+# Read walk-in time/venue (walk-in jobs only) and the description from one load of the detail page
+@metrics.timed_function('extract_detail')
+def read_job_details(driver, url, walkin):
+    time_text, venue_text = "N/A", "N/A"
+    if walkin:
+        time_elements = driver.find_elements(By.CSS_SELECTOR, '.styles_jhc__walkin__57j_D')
+        venue_elements = driver.find_elements(By.CSS_SELECTOR, '.styles_jhc__venue__2cqi5')
+        time_text = time_elements[0].text.strip() if time_elements else "N/A"
+        venue_text = venue_elements[0].text.strip() if venue_elements else "N/A"
 
-# Extract walk-in details from a job listing URL
-def extract_walkin_details(driver, apply_url):
     try:
-        driver.get(apply_url)
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, '.styles_jhc__walkin__57j_D'))
+        read_more_button = driver.find_element(By.CLASS_NAME, 'styles_read-more__MyWkb')
+        read_more_button.click()
+        TimedWait(driver, 10).until(
+            EC.presence_of_element_located((By.CLASS_NAME, 'styles_JDC__dang-inner-html__h0K4t'))
         )
-        time_element = driver.find_element(By.CSS_SELECTOR, '.styles_jhc__walkin__57j_D')
-        venue_element = driver.find_element(By.CSS_SELECTOR, '.styles_jhc__venue__2cqi5')
-        
-        time_text = time_element.text.strip()
-        venue_text = venue_element.text.strip()
-
-        return time_text, venue_text
+        logging.info(f"Clicked 'Read More' for URL: {url}")
     except NoSuchElementException:
-        return "N/A", "N/A"
-    except TimeoutException:
-        return "N/A", "N/A"
+        logging.info(f"No 'Read More' button for URL: {url}")
 
-# Scrape job description from a job listing URL
-def scrape_job_description(url, description_queue):
-    logging.info(f"Starting scrape for URL: {url}")
-    driver = setup_driver()
-    attempt = 0
-    job_description = "Failed to fetch description"
-    
-    while attempt < 3:
-        try:
-            driver.get(url)
-            logging.info(f"Loaded URL: {url}")
+    job_description = driver.find_element(By.CLASS_NAME, 'styles_job-desc-container__txpYf').text
+    return time_text, venue_text, job_description
 
-            try:
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, 'styles_job-desc-container__txpYf'))
-                )
-                logging.info(f"Found job description container for URL: {url}")
+# Fill in a job row's walk-in details and scrape its description, loading the detail page once
+def scrape_job_details(job_row, job_queue, description_queue, pool):
+    url = job_row['Apply URL']
+    walkin = job_row['Walk-in'] == "Yes"
+    logging.info(f"Starting scrape for URL: {url}")
+    try:
+        required = ('Time', 'Venue', 'Job Description') if walkin else ('Job Description',)
+        fields = fetch_detail_fields(url, required)
+        if fields:
+            if walkin:
+                job_row['Time'], job_row['Venue'] = fields['Time'], fields['Venue']
+            description_queue.put({'Apply URL': url, 'Job Description': fields['Job Description']})
+            logging.info(f"Fetched job details over HTTP for URL: {url}")
+            return
+
+        driver = pool.checkout()
+        broken = False
+        attempt = 0
+        limiter = limiter_for(url)
 
+        try:
+            while attempt < MAX_ATTEMPTS:
                 try:
-                    read_more_button = driver.find_element(By.CLASS_NAME, 'styles_read-more__MyWkb')
-                    read_more_button.click()
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.CLASS_NAME, 'styles_JDC__dang-inner-html__h0K4t'))
-                    )
-                    logging.info(f"Clicked 'Read More' for URL: {url}")
-                except NoSuchElementException:
-                    logging.info(f"No 'Read More' button for URL: {url}")
-                
-                job_description_element = driver.find_element(By.CLASS_NAME, 'styles_job-desc-container__txpYf')
-                job_description = job_description_element.text
-                logging.info(f"Extracted job description for URL: {url}")
-
-                # Add to queue for later processing
-                description_queue.put((url, job_description))
-                break
-
-            except TimeoutException:
-                logging.warning(f"Timeout occurred for URL: {url}")
-                attempt += 1
-                time.sleep(10)  # Increase delay before retrying
-
-        except WebDriverException as e:
-            logging.error(f"WebDriverException for URL: {url} - {str(e)}")
-            attempt += 1
-            time.sleep(10)
-
-    driver.quit()
-    logging.info(f"Driver closed for URL: {url}")
-
-# Process each job listing
-def process_job_listing(job, driver, city_info, description_queue, job_queue):
-    try:
-        job_title = job.find_element(By.CSS_SELECTOR, '.title').text
-        company = job.find_element(By.CSS_SELECTOR, '.comp-name').text
-        experience = job.find_element(By.CSS_SELECTOR, '.exp-wrap .exp').text if job.find_elements(By.CSS_SELECTOR, '.exp-wrap .exp') else "N/A"
-        location = job.find_element(By.CSS_SELECTOR, '.locWdth').text if job.find_elements(By.CSS_SELECTOR, '.locWdth') else "N/A"
-        salary_elements = job.find_elements(By.CSS_SELECTOR, '.sal-wrap .ni-job-tuple-icon span')
-        salary = salary_elements[0].get_attribute('title').strip() if salary_elements else "Not disclosed"
-
-        apply_url = job.find_element(By.CSS_SELECTOR, '.title').get_attribute('href')
-
-        # Check for walk-in details
-        walkin_tag = job.find_elements(By.CSS_SELECTOR, '.ttc__walk-in')
-        walkin = "Yes" if walkin_tag else "No"
-
-        time, venue = "N/A", "N/A"
-        if walkin == "Yes":
-            time, venue = extract_walkin_details(driver, apply_url)
-
-        # Add job listing to queue
-        job_queue.put({
-            'CITY ID': city_info['CITY ID'],
-            'City': city_info['City'],
-            'INDUSTRY ID': city_info['INDUSTRY ID'],
-            'Job Title': job_title,
-            'Company': company,
-            'Experience': experience,
-            'Location': location,
-            'Salary': salary,
-            'Apply URL': apply_url,
-            'Walk-in': walkin,
-            'Time': time,
-            'Venue': venue
-        })
-
-        # Scrape job description asynchronously
-        threading.Thread(target=scrape_job_description, args=(apply_url, description_queue)).start()
-
-        logging.info(f"Extracted job: {job_title} - {apply_url}")
-
-    except NoSuchElementException as e:
-        logging.error(f"Failed to extract job details. Error: {str(e)}")
-        return None
+                    try:
+                        # The slot records load latency and timeouts for the host's concurrency limit
+                        with limiter.slot():
+                            load_page(driver, url)
+                            logging.info(f"Loaded URL: {url}")
+                            TimedWait(driver, 20).until(
+                                EC.presence_of_element_located((By.CLASS_NAME, 'styles_job-desc-container__txpYf'))
+                            )
+                            cache_page(driver, url)
+                        logging.info(f"Found job description container for URL: {url}")
+
+                        job_row['Time'], job_row['Venue'], job_description = read_job_details(driver, url, walkin)
+                        logging.info(f"Extracted job details for URL: {url}")
+
+                        # Add to queue for later processing
+                        description_queue.put({'Apply URL': url, 'Job Description': job_description})
+                        break
+
+                    except TimeoutException:
+                        logging.warning(f"Timeout occurred for URL: {url}")
+                        attempt += 1
+                        metrics.count('retries', phase='job_details')
+                        time.sleep(limiter.backoff_delay(attempt))
+
+                except WebDriverException as e:
+                    logging.error(f"WebDriverException for URL: {url} - {str(e)}")
+                    attempt += 1
+                    broken = True
+                    if attempt >= MAX_ATTEMPTS:
+                        break
+                    metrics.count('retries', phase='job_details')
+                    pool.checkin(driver, broken=True)
+                    driver = None
+                    driver = pool.checkout()
+                    broken = False
+                    time.sleep(limiter.backoff_delay(attempt))
+        except Exception:
+            # e.g. urllib3 MaxRetryError once chromedriver died: the driver is not reused
+            broken = True
+            raise
+        finally:
+            # Every checked-out driver goes back, or the pool loses the slot for good
+            if driver is not None:
+                pool.checkin(driver, broken=broken)
+                logging.info(f"Driver returned to pool for URL: {url}")
+    finally:
+        # The listing row is written even when the detail page could not be read
+        job_queue.put(job_row)
+
+# Queue a job's detail scrape; the listing row is written once its walk-in details are in
+def enqueue_job(job_fields, city_info, submit_details):
+    submit_details({
+        'CITY ID': city_info['CITY ID'],
+        'City': city_info['City'],
+        'INDUSTRY ID': city_info['INDUSTRY ID'],
+        **job_fields,
+        'Time': "N/A",
+        'Venue': "N/A"
+    })
+
+    logging.info(f"Extracted job: {job_fields['Job Title']} - {job_fields['Apply URL']}")
 
 # Scrape jobs from a specific city
-def scrape_jobs(driver, base_url, query_params, city_info, job_queue, description_queue):
-    max_pages = get_max_pages(driver, base_url, query_params)
-    all_jobs = []
+def scrape_jobs(driver, base_url, query_params, city_info, submit_details):
+    max_pages, first_page = get_max_pages(driver, base_url, query_params)
+    page_numbers = range(1, max_pages + 1)
+    fallback_pages = []
+
+    # Page 1 came with the job count
+    if first_page:
+        logging.info(f"Found {len(first_page)} job listings on page 1.")
+        for job_fields in first_page:
+            enqueue_job(job_fields, city_info, submit_details)
+        page_numbers = range(2, max_pages + 1)
+
+    for page_number, jobs in iter_listing_pages(base_url, query_params, page_numbers):
+        if jobs is None:
+            fallback_pages.append(page_number)
+            continue
+        logging.info(f"Found {len(jobs)} job listings on page {page_number}.")
+        for job_fields in jobs:
+            enqueue_job(job_fields, city_info, submit_details)
 
-    for page_number in range(1, max_pages + 1):
+    # Pages the HTTP crawl could not read are loaded in the browser
+    for page_number in sorted(fallback_pages):
         page_url = f"{base_url}-{page_number}{query_params}"
         logging.info(f"Opening {page_url}")
 
         try:
-            driver.get(page_url)
-            WebDriverWait(driver, 30).until(
+            load_page(driver, page_url)
+            TimedWait(driver, 30).until(
                 EC.presence_of_all_elements_located((By.CSS_SELECTOR, '.srp-jobtuple-wrapper'))
             )
+            cache_page(driver, page_url)
 
-            job_listings = driver.find_elements(By.CSS_SELECTOR, '.srp-jobtuple-wrapper')
+            job_listings = extract_listing_tuples(driver)
             
             if not job_listings:
                 logging.info("No more jobs found. Exiting loop.")
@@ -190,8 +213,8 @@ def scrape_jobs(driver, base_url, query_params, city_info, job_queue, descriptio
 
             logging.info(f"Found {len(job_listings)} job listings on page {page_number}.")
 
-            for job in job_listings:
-                process_job_listing(job, driver, city_info, description_queue, job_queue)
+            for job_fields in job_listings:
+                enqueue_job(job_fields, city_info, submit_details)
 
         except TimeoutException as e:
             logging.error(f"TimeoutException: Unable to load page {page_url}. Error: {str(e)}")
@@ -201,7 +224,7 @@ def scrape_jobs(driver, base_url, query_params, city_info, job_queue, descriptio
             continue
 
 # Worker function for threading
-def worker(city, job_queue, description_queue):
+def worker(city, job_queue, submit_details, listing_pool):
     base_url = city['URL']
     city_info = {
         'CITY ID': city['CITY ID'],
@@ -211,54 +234,39 @@ def worker(city, job_queue, description_queue):
     query_params = '?wfhType=0&jobPostType=1&jobAge=1'
     
     try:
-        driver = setup_driver()
-        scrape_jobs(driver, base_url, query_params, city_info, job_queue, description_queue)
-        driver.quit()
+        with listing_pool.driver() as driver:
+            scrape_jobs(driver, base_url, query_params, city_info, submit_details)
     except Exception as e:
         logging.error(f"Error in worker function for city {city['City']}: {e}")
+    finally:
+        # Each city worker is one producer of the job listings writer
+        job_queue.put(END)
+
+def log_details_error(future):
+    if future.exception():
+        logging.error(f"Job details scrape failed: {future.exception()}")
+
+# Merge the job listing and description CSVs once both writers have finished
+def merge_csv_files():
+    if STREAMING_MERGE:
+        # Out-of-core hash join; memory is bounded by SCRAPER_MERGE_MEMORY_MB
+        rows = stream_join('all_job_listings.csv', 'all_job_descriptions.csv',
+                           lambda fieldnames: open_sink('merged_job_listings.csv', fieldnames))
+        logging.info(f"Merged {rows} rows into 'merged_job_listings'.")
+        return
 
-# Merge CSV files
-def merge_csv_files(job_queue, description_queue):
-    # Ensure files are created and opened
-    job_file = open('all_job_listings.csv', mode='w', newline='', encoding='utf-8')
-    description_file = open('all_job_descriptions.csv', mode='w', newline='', encoding='utf-8')
-    
-    job_fieldnames = ['CITY ID', 'City', 'INDUSTRY ID', 'Job Title', 'Company', 'Experience', 'Location', 'Salary', 'Apply URL', 'Walk-in', 'Time', 'Venue']
-    description_fieldnames = ['Apply URL', 'Job Description']
-    
-    job_writer = csv.DictWriter(job_file, fieldnames=job_fieldnames)
-    description_writer = csv.DictWriter(description_file, fieldnames=description_fieldnames)
-    
-    job_writer.writeheader()
-    description_writer.writeheader()
-
-    while True:
-        if not job_queue.empty():
-            job = job_queue.get()
-            job_writer.writerow(job)
-            job_file.flush()
-
-        if not description_queue.empty():
-            url, description = description_queue.get()
-            description_writer.writerow({'Apply URL': url, 'Job Description': description})
-            description_file.flush()
-
-        if job_queue.empty() and description_queue.empty():
-            break
-
-    job_file.close()
-    description_file.close()
-
-    # Merge CSV files
     job_listings_df = pd.read_csv('all_job_listings.csv')
     job_descriptions_df = pd.read_csv('all_job_descriptions.csv')
 
     # Merge on 'Apply URL'
     merged_df = pd.merge(job_listings_df, job_descriptions_df, on='Apply URL', how='left')
 
-    # Save the merged CSV
-    merged_df.to_csv('merged_job_listings.csv', index=False, encoding='utf-8')
-    logging.info("Merged CSV saved as 'merged_job_listings.csv'.")
+    # Save the merged output through the configured sink; every column is written as text
+    merged_df = merged_df.astype('string').astype(object)
+    merged_df = merged_df.where(merged_df.notna(), None)
+    with open_sink('merged_job_listings.csv', list(merged_df.columns)) as sink:
+        sink.write_rows(merged_df.to_dict('records'))
+    logging.info(f"Merged output saved as '{sink.path}'.")
 
 # Main function to start scraping
 def main():
@@ -266,22 +274,66 @@ def main():
         # Add city details here
     ]
     
-    job_queue = Queue()
-    description_queue = Queue()
+    job_queue = Queue(maxsize=QUEUE_SIZE)
+    description_queue = Queue(maxsize=QUEUE_SIZE)
     
-    # Start data collection threads
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [executor.submit(worker, city, job_queue, description_queue) for city in cities]
-        for future in as_completed(futures):
-            try:
-                future.result()
-            except Exception as e:
-                logging.error(f"An error occurred: {e}")
-
-    # Start merging thread
-    merge_thread = threading.Thread(target=merge_csv_files, args=(job_queue, description_queue))
-    merge_thread.start()
-    merge_thread.join()
+    listing_pool = DriverPool(setup_driver, size=MAX_WORKERS, recycle_after=RECYCLE_AFTER)
+    description_pool = DriverPool(setup_driver, size=DESCRIPTION_POOL_SIZE, recycle_after=RECYCLE_AFTER)
+    listing_pool.prewarm()
+    description_pool.prewarm()
+
+    with open('all_job_listings.csv', mode='w', newline='', encoding='utf-8') as job_file, \
+            open('all_job_descriptions.csv', mode='w', newline='', encoding='utf-8') as description_file:
+        job_writer = csv.DictWriter(job_file, fieldnames=JOB_FIELDNAMES)
+        description_writer = csv.DictWriter(description_file, fieldnames=DESCRIPTION_FIELDNAMES)
+        job_writer.writeheader()
+        description_writer.writeheader()
+
+        # Writers run alongside the scrapers and block on their queues until every producer sends END;
+        # the city workers and the details executor both produce job rows
+        job_writer_thread = QueueWriter(job_queue, job_writer.writerows, producers=len(cities) + 1,
+                                        flush=job_file.flush, batch_size=WRITE_BATCH_SIZE, name='job listings writer')
+        description_writer_thread = QueueWriter(description_queue, description_writer.writerows, producers=1,
+                                                flush=description_file.flush, batch_size=WRITE_BATCH_SIZE,
+                                                name='job descriptions writer')
+        job_writer_thread.start()
+        description_writer_thread.start()
+
+        details_executor = ThreadPoolExecutor(max_workers=DESCRIPTION_POOL_SIZE)
+
+        def submit_details(job_row):
+            future = details_executor.submit(scrape_job_details, job_row, job_queue, description_queue, description_pool)
+            future.add_done_callback(log_details_error)
+
+        try:
+            # Start data collection threads
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                futures = [executor.submit(worker, city, job_queue, submit_details, listing_pool) for city in cities]
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logging.error(f"An error occurred: {e}")
+        finally:
+            # Every detail scrape has queued its rows once the executor drains
+            details_executor.shutdown(wait=True)
+            job_queue.put(END)
+            description_queue.put(END)
+            job_writer_thread.join()
+            description_writer_thread.join()
+            # Prewarmed browsers are quit even when a worker raised or the run was interrupted
+            listing_pool.close()
+            description_pool.close()
+    for writer_thread in (job_writer_thread, description_writer_thread):
+        if writer_thread.error:
+            raise writer_thread.error
+
+    merge_csv_files()
+    if NORMALIZE:
+        normalize_file(output_path('merged_job_listings.csv'), 'merged_job_listings_normalized.csv')
+
+    logging.info(f"Concurrency stats: {all_stats()}")
+    log_page_stats_summary()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,335 @@
+import argparse
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import nullcontext
+from functools import wraps
+
+# SCRAPER_METRICS=1 records per-phase timings and counters; otherwise every hook is a no-op
+ENABLED = os.environ.get('SCRAPER_METRICS', '0') == '1'
+# 'prometheus' rewrites METRICS_PATH in text exposition format; 'json' appends one snapshot per line
+METRICS_FORMAT = os.environ.get('SCRAPER_METRICS_FORMAT', 'prometheus')
+# {pid} in the path gives every process its own file; by default only the main process
+# writes scraper_metrics.prom and multiprocessing workers (shard_runner work --processes N)
+# each write scraper_metrics.<pid>.prom, which `python metrics.py --merge` sums into one file
+METRICS_PATH = os.environ.get('SCRAPER_METRICS_PATH')
+DEFAULT_PATH = 'scraper_metrics.prom'
+WORKER_PATH = 'scraper_metrics.{pid}.prom'
+METRICS_INTERVAL = float(os.environ.get('SCRAPER_METRICS_INTERVAL', '15'))
+
+PREFIX = 'scraper'
+# Upper bounds in seconds, from an lxml parse of one page up to a slow browser start
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NOOP = nullcontext()
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations; the last bucket counts everything above BUCKETS[-1]."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the `fraction` quantile (max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 6),
+            'p95': round(self.quantile(0.95), 6),
+            'max': round(self.max, 6),
+        }
+
+
+_histograms = {}  # phase -> Histogram
+_counters = Counter()  # (name, sorted label items) -> value
+_lock = threading.Lock()
+
+
+def observe(phase, seconds):
+    """Record one duration of `phase`."""
+    if not ENABLED:
+        return
+    with _lock:
+        histogram = _histograms.get(phase)
+        if histogram is None:
+            histogram = _histograms[phase] = Histogram()
+        histogram.observe(seconds)
+    _ensure_exporter()
+
+
+class _Timer:
+    __slots__ = ('phase', 'started')
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.phase, time.perf_counter() - self.started)
+        return False
+
+
+def timed(phase):
+    """Context manager timing its block as `phase`; a shared no-op when metrics are off."""
+    if not ENABLED:
+        return _NOOP
+    return _Timer(phase)
+
+
+def timed_function(phase):
+    """Decorator timing every call as `phase`; returns the function untouched when metrics are off."""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, amount=1, **labels):
+    """Add `amount` to counter `name`, e.g. count('timeouts', phase='wait')."""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[(name, tuple(sorted(labels.items())))] += amount
+    _ensure_exporter()
+
+
+def count_missing(rows, missing=('N/A', None, '')):
+    """Count fields the scrapers could not read ('N/A' or empty) per column across `rows`."""
+    if not ENABLED:
+        return
+    missing_fields = Counter(field for row in rows for field, value in row.items() if value in missing)
+    if missing_fields:
+        with _lock:
+            for field, amount in missing_fields.items():
+                _counters[('missing_fields', (('field', field),))] += amount
+    _ensure_exporter()
+
+
+def snapshot():
+    """Per-phase summaries and counters recorded so far in this process."""
+    with _lock:
+        phases = {phase: histogram.summary() for phase, histogram in sorted(_histograms.items())}
+        counters = [
+            {'name': name, 'labels': dict(labels), 'value': value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+    return {'time': time.time(), 'pid': os.getpid(), 'phases': phases, 'counters': counters}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(items):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in items)
+
+
+def prometheus_text():
+    """Everything recorded so far in Prometheus text exposition format."""
+    with _lock:
+        histograms = {phase: (list(h.buckets), h.count, h.sum) for phase, h in sorted(_histograms.items())}
+        counters = sorted(_counters.items())
+    lines = []
+    if histograms:
+        name = f'{PREFIX}_phase_seconds'
+        lines.append(f'# HELP {name} Time spent in each scraper phase.')
+        lines.append(f'# TYPE {name} histogram')
+        for phase, (buckets, total, seconds) in histograms.items():
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS + ('+Inf',), buckets):
+                cumulative += bucket
+                lines.append(f'{name}_bucket{{{_labels([("phase", phase), ("le", bound)])}}} {cumulative}')
+            lines.append(f'{name}_sum{{{_labels([("phase", phase)])}}} {seconds}')
+            lines.append(f'{name}_count{{{_labels([("phase", phase)])}}} {total}')
+    declared = set()
+    for (counter, labels), value in counters:
+        name = f'{PREFIX}_{counter}_total'
+        if name not in declared:
+            declared.add(name)
+            lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name}{{{_labels(labels)}}} {value}' if labels else f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_path():
+    """METRICS_PATH, or the default for this process: per-pid inside a multiprocessing worker."""
+    if METRICS_PATH:
+        return METRICS_PATH
+    return WORKER_PATH if multiprocessing.parent_process() else DEFAULT_PATH
+
+
+def write_metrics(path=None, metrics_format=None):
+    """Write the current metrics: Prometheus text replaces the file, JSON appends a snapshot line."""
+    path = (path or metrics_path()).format(pid=os.getpid())
+    metrics_format = metrics_format or METRICS_FORMAT
+    if metrics_format == 'json':
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(snapshot()) + '\n')
+        return
+    if metrics_format != 'prometheus':
+        raise ValueError(f"Unknown metrics format: {metrics_format}")
+    # Per-pid, so processes sharing one path never rename each other's half-written file
+    partial = f'{path}.{os.getpid()}.tmp'
+    with open(partial, 'w', encoding='utf-8') as file:
+        file.write(prometheus_text())
+    # A scraper reading the file (node_exporter's textfile collector) never sees half of it
+    os.replace(partial, path)
+
+
+class MetricsExporter(threading.Thread):
+    """Writes the metrics every `interval` seconds and once more when stopped."""
+
+    def __init__(self, interval=METRICS_INTERVAL):
+        super().__init__(name='metrics exporter', daemon=True)
+        self.interval = interval
+        self._done = threading.Event()
+
+    def _write(self):
+        try:
+            write_metrics()
+        except OSError as e:
+            logging.warning(f"Could not write metrics: {e}")
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self._write()
+
+    def stop(self):
+        self._done.set()
+        if self.is_alive():
+            self.join()
+        self._write()
+
+
+_exporter = None
+_exporter_pid = None
+_exporter_lock = threading.Lock()
+
+
+def _ensure_exporter():
+    """Start the exporter on the first recorded metric, again in a forked child."""
+    global _exporter, _exporter_pid
+    if _exporter_pid == os.getpid():
+        return
+    with _exporter_lock:
+        if _exporter_pid == os.getpid():
+            return
+        _exporter = MetricsExporter()
+        _exporter_pid = os.getpid()
+        _exporter.start()
+        atexit.register(_exporter.stop)
+
+
+def log_metrics_summary():
+    if not ENABLED:
+        return
+    current = snapshot()
+    for phase, summary in current['phases'].items():
+        logging.info(f"Phase {phase}: {summary}")
+    for counter in current['counters']:
+        logging.info(f"Counter {counter['name']} {counter['labels']}: {counter['value']}")
+
+
+def merge_prometheus(paths, output):
+    """Sum the samples of several processes' Prometheus files into `output`.
+
+    Buckets are cumulative counts, so summing them series by series gives the
+    combined histogram.
+    """
+    families = {}  # metric family -> (HELP/TYPE lines, {series: value})
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                line = line.rstrip('\n')
+                if line.startswith('#'):
+                    # '# HELP name ...' and '# TYPE name ...' precede their family's samples
+                    comments, _ = families.setdefault(line.split()[2], ([], {}))
+                    if line not in comments:
+                        comments.append(line)
+                elif line:
+                    series, value = line.rsplit(' ', 1)
+                    name = series.split('{', 1)[0]
+                    for suffix in ('_bucket', '_sum', '_count'):
+                        if name.endswith(suffix) and name[:-len(suffix)] in families:
+                            name = name[:-len(suffix)]
+                    _, samples = families.setdefault(name, ([], {}))
+                    samples[series] = samples.get(series, 0) + float(value)
+    lines = []
+    for comments, samples in families.values():
+        lines.extend(comments)
+        lines.extend(f'{series} {value:g}' for series, value in samples.items())
+    partial = f'{output}.{os.getpid()}.tmp'
+    with open(partial, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+    os.replace(partial, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize JSON metrics files written with SCRAPER_METRICS_FORMAT=json, "
+                                                 "or merge per-process Prometheus files with --merge.")
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--merge', metavar='OUTPUT', help="Sum the given .prom files into OUTPUT")
+    args = parser.parse_args()
+
+    if args.merge:
+        merge_prometheus(args.paths, args.merge)
+        return
+
+    # Snapshots are cumulative, so the last one per process holds its totals
+    latest = {}
+    for path in args.paths:
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    entry = json.loads(line)
+                    latest[entry['pid']] = entry
+    for pid, entry in sorted(latest.items()):
+        print(f"Process {pid}:")
+        for phase, summary in entry['phases'].items():
+            print(f"  {phase:18} n={summary['count']:7d} mean={summary['mean'] * 1000:9.1f} ms "
+                  f"p50<={summary['p50'] * 1000:8.1f} ms p95<={summary['p95'] * 1000:8.1f} ms "
+                  f"total={summary['sum']:9.1f} s")
+        for counter in entry['counters']:
+            print(f"  {counter['name']} {counter['labels'] or ''}: {counter['value']}")
+
+
+if __name__ == "__main__":
+    main()
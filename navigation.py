@@ -0,0 +1,50 @@
+import logging
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+# Job detail pages live under /job-listings-...; everything else is a listing page
+JOB_PATH_MARKER = '/job-listings-'
+
+_loads = Counter()  # (kind, url) -> navigations
+_lock = threading.Lock()
+
+
+def record(url, kind):
+    """Count one navigation: kind is 'browser' (load_page) or 'http' (fetch_html)."""
+    with _lock:
+        _loads[(kind, url)] += 1
+
+
+def is_job_page(url):
+    return JOB_PATH_MARKER in urlsplit(url).path
+
+
+def navigation_summary():
+    """Navigations per job and per listing page across every driver and session in this process.
+
+    A URL fetched over HTTP and then loaded in the browser (fallback) counts
+    once per kind; `repeated` counts URLs loaded more than once the same way.
+    """
+    with _lock:
+        loads = dict(_loads)
+    summary = {}
+    for page_type, is_job in (('job', True), ('listing', False)):
+        counts = {key: count for key, count in loads.items() if is_job_page(key[1]) == is_job}
+        urls = {url for _, url in counts}
+        total = sum(counts.values())
+        summary[page_type] = {
+            'urls': len(urls),
+            'navigations': total,
+            'browser': sum(count for (kind, _), count in counts.items() if kind == 'browser'),
+            'http': sum(count for (kind, _), count in counts.items() if kind == 'http'),
+            'per_url': total / len(urls) if urls else 0.0,
+            'repeated': sum(1 for count in counts.values() if count > 1),
+        }
+    return summary
+
+
+def log_navigation_summary():
+    summary = navigation_summary()
+    logging.info(f"Navigations per job: {summary['job']}")
+    logging.info(f"Navigations per listing page: {summary['listing']}")
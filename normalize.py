@@ -0,0 +1,237 @@
+import argparse
+import logging
+import os
+import re
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from sinks import read_output
+
+CHUNK_SIZE = 200000
+
+# "1-4 Lacs PA", "50,000-1.5 Lacs P.A.", "5 Lacs P.A.", "1-1.5 Cr P.A.", "₹ 25,000 per month", "Rs. 15k-20k P.M."
+CURRENCY = r'(?:₹|rs\.?|inr)?\s*'
+UNITS = r'lacs?|lakhs?|cr|crores?|k'
+# The unit may follow both ends ("15k-20k") or only the upper one ("1-4 Lacs")
+SALARY_PATTERN = rf'^\s*{CURRENCY}([\d.,]+)\s*(?:({UNITS})\b\s*)?(?:-\s*{CURRENCY}([\d.,]+))?\s*(?:({UNITS})\b)?'
+SALARY_UNITS = {'lac': 1e5, 'lacs': 1e5, 'lakh': 1e5, 'lakhs': 1e5, 'cr': 1e7, 'crore': 1e7, 'crores': 1e7, 'k': 1e3}
+UNIT_NAMES = {'lac': 'lacs', 'lacs': 'lacs', 'lakh': 'lacs', 'lakhs': 'lacs', 'cr': 'crore', 'crore': 'crore',
+              'crores': 'crore', 'k': 'thousand'}
+# Values this large are already in rupees ("50,000" in "50,000-1.5 Lacs")
+RUPEE_THRESHOLD = 1000
+MONTHLY_PATTERN = r'p\.\s*m\.?|\bpm\b|per\s+month|/\s*month|\bmonthly\b'
+ANNUAL_PATTERN = r'p\.\s*a\.?|\bpa\b|per\s+annum|/\s*(?:year|annum)|\byearly\b|\bannual'
+
+# "3 - 7 years", "0 years", "3-7 Yrs"
+EXPERIENCE_PATTERN = r'(\d+(?:\.\d+)?)\s*(?:-\s*(\d+(?:\.\d+)?))?\s*(?:years?|yrs?)'
+
+# "2nd September - 11th September , 9.30 AM - 5.30 PM" or "31st August , 10.30 AM - 1.00 PM"
+DAY = r'(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)'
+CLOCK = r'(\d{1,2})[.:](\d{2})\s*([AaPp][Mm])'
+WALKIN_PATTERN = rf'^\s*{DAY}(?:\s*-\s*{DAY})?\s*,\s*{CLOCK}\s*-\s*{CLOCK}'
+# Schedule text that ended up in the Venue column
+SCHEDULE_TEXT = r'^\s*\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+[^,]*,\s*\d{1,2}[.:]\d{2}\s*[AaPp][Mm]'
+MONTHS = {name: number for number, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+
+VENUE_NOISE = r'\(\s*view on map\s*\)|^\s*(?:venue\s*address|venue|address)\s*[:\-]\s*'
+PINCODE_PATTERN = r'\b(\d{3})\s?(\d{3})\b'
+
+
+def _on_uniques(values, parse):
+    """Run `parse` over the distinct values only and broadcast the result back.
+
+    Scraped fields repeat heavily ("Not disclosed", a few hundred salary
+    bands and venues), so a million rows usually parse as a few thousand.
+    """
+    codes, uniques = pd.factorize(values)
+    # Missing values (code -1) map to an extra all-missing row at the end
+    parsed = parse(pd.Series(list(uniques) + [None], dtype='string'))
+    codes = np.where(codes < 0, len(uniques), codes)
+    result = parsed.iloc[codes]
+    result.index = values.index
+    return result
+
+
+def _number(values):
+    return pd.to_numeric(values.str.replace(',', '', regex=False), errors='coerce')
+
+
+def normalize_salary(salary):
+    """Annual salary range in rupees, with the unit and pay period the text stated.
+
+    Monthly figures ("P.M.", "per month") are multiplied by 12. Salary Unit is
+    'rupees', 'thousand', 'lacs' or 'crore'; Salary Period is 'monthly',
+    'annual', or missing when the text does not say (amounts are then taken
+    as annual, the site's convention). Small numbers with no unit ("3-5")
+    are ambiguous, so their range is left missing rather than guessed.
+    """
+    return _on_uniques(salary, _parse_salary)
+
+
+def _parse_salary(salary):
+    parts = salary.str.extract(SALARY_PATTERN, flags=re.IGNORECASE)
+    # "1-4 Lacs": the lower end takes the upper end's unit; "2 Lacs": the only unit is the lower one's
+    unit_name = parts[3].fillna(parts[1]).str.lower()
+    unit = unit_name.map(SALARY_UNITS).astype(float).to_numpy()
+    low_unit = parts[1].str.lower().map(SALARY_UNITS).astype(float).fillna(unit_name.map(SALARY_UNITS).astype(float))
+    low = _number(parts[0]).to_numpy(dtype=float)
+    high = _number(parts[2]).to_numpy(dtype=float)
+    high_is_low = np.isnan(high)
+    high = np.where(high_is_low, low, high)
+    # Per value: large numbers are rupees; small ones need a unit, else they stay missing
+    low = np.where(low >= RUPEE_THRESHOLD, low, low * low_unit.to_numpy())
+    high = np.where(high >= RUPEE_THRESHOLD, high, high * np.where(high_is_low, low_unit.to_numpy(), unit))
+
+    monthly = salary.str.contains(MONTHLY_PATTERN, case=False, regex=True).fillna(False).to_numpy(dtype=bool)
+    annual = salary.str.contains(ANNUAL_PATTERN, case=False, regex=True).fillna(False).to_numpy(dtype=bool)
+    months = np.where(monthly, 12, 1)
+    disclosed = ~np.isnan(_number(parts[0]).to_numpy(dtype=float))
+    named_unit = unit_name.map(UNIT_NAMES).to_numpy(dtype=object)
+    named_unit = np.where(pd.isna(named_unit) & ~np.isnan(low), 'rupees', named_unit)
+    return pd.DataFrame({
+        'Salary Min': low * months,
+        'Salary Max': high * months,
+        'Salary Unit': pd.Series(np.where(disclosed, named_unit, None), index=salary.index, dtype='string'),
+        'Salary Period': pd.Series(np.where(monthly, 'monthly', np.where(annual, 'annual', None)),
+                                   index=salary.index, dtype='string'),
+        'Salary Disclosed': disclosed,
+    }, index=salary.index)
+
+
+def normalize_experience(experience):
+    """Experience range in years."""
+    return _on_uniques(experience, _parse_experience)
+
+
+def _parse_experience(experience):
+    parts = experience.str.extract(EXPERIENCE_PATTERN, flags=re.IGNORECASE)
+    low = pd.to_numeric(parts[0], errors='coerce').astype(float)
+    high = pd.to_numeric(parts[1], errors='coerce').astype(float).fillna(low)
+    return pd.DataFrame({'Experience Min': low, 'Experience Max': high}, index=experience.index)
+
+
+def _clock(hour, minute, meridiem):
+    """24-hour "HH:MM" from 12-hour parts."""
+    pm = meridiem.str.upper().eq('PM').fillna(False).to_numpy(dtype=bool)
+    hour = pd.to_numeric(hour, errors='coerce').astype(float) % 12 + np.where(pm, 12, 0)
+    minute = pd.to_numeric(minute, errors='coerce').astype(float)
+    return (hour.astype('Int64').astype('string').str.zfill(2) + ':'
+            + minute.astype('Int64').astype('string').str.zfill(2))
+
+
+def _date(day, month_name, year):
+    month = month_name.str[:3].str.lower().map(MONTHS).astype(float)
+    day = pd.to_numeric(day, errors='coerce').astype(float)
+    return pd.to_datetime(pd.DataFrame({'year': year, 'month': month, 'day': day}), errors='coerce')
+
+
+def normalize_walkin_time(walkin_time, year=None):
+    """Walk-in date range and daily hours from the listing's schedule text.
+
+    The site omits the year; `year` (default: this year) is used for the start
+    date, and an end date in an earlier month rolls over to the next year.
+    """
+    year = year or date.today().year
+    return _on_uniques(walkin_time, lambda values: _parse_walkin_time(values, year))
+
+
+def _parse_walkin_time(walkin_time, year):
+    parts = walkin_time.str.extract(WALKIN_PATTERN)
+    start = _date(parts[0], parts[1], year)
+    end_day = parts[2].fillna(parts[0])
+    end_month = parts[3].fillna(parts[1])
+    end = _date(end_day, end_month, year)
+    end = end.where(~(end < start), end + pd.DateOffset(years=1))
+    return pd.DataFrame({
+        'Walk-in Start Date': start,
+        'Walk-in End Date': end,
+        'Walk-in Start Time': _clock(parts[4], parts[5], parts[6]),
+        'Walk-in End Time': _clock(parts[7], parts[8], parts[9]),
+    }, index=walkin_time.index)
+
+
+def normalize_venue(venue):
+    """Venue text without boilerplate plus its PIN code.
+
+    Some pages put the schedule in the venue slot; those become missing.
+    """
+    return _on_uniques(venue, _parse_venue)
+
+
+def _parse_venue(text):
+    is_schedule = text.str.contains(SCHEDULE_TEXT, regex=True).fillna(False).to_numpy(dtype=bool)
+    cleaned = (
+        text.str.replace(VENUE_NOISE, '', regex=True, case=False)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip(' ,.;-')
+    )
+    blank = cleaned.isin(['', 'N/A']).to_numpy(dtype=bool)
+    cleaned = cleaned.mask(is_schedule | blank)
+    pincode = cleaned.str.extract(PINCODE_PATTERN)
+    return pd.DataFrame({
+        'Venue Normalized': cleaned,
+        'Venue Pincode': pincode[0] + pincode[1],
+    }, index=text.index)
+
+
+def normalize_frame(df, year=None):
+    """Add typed Salary/Experience/walk-in/venue columns next to the raw ones."""
+    parts = [df]
+    if 'Salary' in df:
+        parts.append(normalize_salary(df['Salary']))
+    if 'Experience' in df:
+        parts.append(normalize_experience(df['Experience']))
+    if 'Time' in df:
+        parts.append(normalize_walkin_time(df['Time'], year))
+    if 'Venue' in df:
+        parts.append(normalize_venue(df['Venue']))
+    return pd.concat(parts, axis=1)
+
+
+def normalize_file(input_path, output_path, year=None, chunksize=CHUNK_SIZE):
+    """Normalize scraper output into a CSV or Parquet file; returns the row count.
+
+    CSV input is processed in chunks; other sink formats are loaded whole.
+    """
+    if input_path.endswith('.csv'):
+        chunks = pd.read_csv(input_path, dtype=str, chunksize=chunksize)
+    else:
+        chunks = [read_output(input_path)]
+    rows = 0
+    parquet_writer = None
+    try:
+        for chunk in chunks:
+            chunk = normalize_frame(chunk, year)
+            if output_path.endswith('.parquet'):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(output_path, table.schema, compression='zstd')
+                parquet_writer.write_table(table.cast(parquet_writer.schema))
+            else:
+                chunk.to_csv(output_path, mode='a' if rows else 'w', header=not rows, index=False, encoding='utf-8')
+            rows += len(chunk)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+    logging.info(f"Normalized {rows} rows from {input_path} into {output_path}")
+    return rows
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Add typed salary, experience, walk-in and venue columns.")
+    parser.add_argument('input', help="Scraper output (.csv, .parquet, .arrow or .db)")
+    parser.add_argument('output', nargs='?', help="CSV or .parquet output (default: <input>_normalized.csv)")
+    parser.add_argument('--year', type=int, help="Year of the walk-in dates (default: this year)")
+    args = parser.parse_args()
+    output = args.output or os.path.splitext(args.input)[0] + '_normalized.csv'
+    normalize_file(args.input, output, args.year)
+
+
+if __name__ == "__main__":
+    main()
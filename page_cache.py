@@ -0,0 +1,241 @@
+import argparse
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from navigation import is_job_page
+
+# SCRAPER_PAGE_CACHE=1 serves pages fetched within the TTL from PAGE_CACHE_DB instead of the live site
+ENABLED = os.environ.get('SCRAPER_PAGE_CACHE', '0') == '1'
+PAGE_CACHE_DB = os.environ.get('SCRAPER_PAGE_CACHE_DB', 'page_cache.db')
+# Listing pages change as jobs are posted; detail pages rarely change once published
+LISTING_TTL = float(os.environ.get('SCRAPER_CACHE_LISTING_TTL', str(60 * 60)))
+DETAIL_TTL = float(os.environ.get('SCRAPER_CACHE_DETAIL_TTL', str(7 * 24 * 60 * 60)))
+MAX_BYTES = int(os.environ.get('SCRAPER_PAGE_CACHE_MB', '1024')) * 1024 * 1024
+# Eviction frees space down to this fraction of MAX_BYTES so it does not run on every store
+LOW_WATERMARK = 0.9
+
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = ('src', 'sid', 'xp', 'px')
+SCRIPT_PATTERN = re.compile(r'<script\b[^>]*>.*?</script\s*>', re.IGNORECASE | re.DOTALL)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    source TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access);
+"""
+
+
+def normalize_url(url):
+    """Cache identity of a URL: lowercase host, no fragment, sorted query without tracking parameters."""
+    parts = urlsplit(url.strip())
+    params = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name not in TRACKING_PARAMS and not name.startswith('utm_')
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', urlencode(params), ''))
+
+
+def cache_key(url, source):
+    """Browser and HTTP copies of a page are kept apart: the raw HTML may lack what the browser renders."""
+    return hashlib.blake2b(f'{source} {normalize_url(url)}'.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def strip_scripts(page_html):
+    """Rendered HTML without <script> elements, so replaying it in a browser runs no page code."""
+    return SCRIPT_PATTERN.sub('', page_html)
+
+
+class PageCache:
+    """Compressed HTML of fetched pages keyed by normalized URL and source ('http' or 'browser').
+
+    Hits are served while younger than the page's TTL (LISTING_TTL or
+    DETAIL_TTL). The store is bounded by `max_bytes` of compressed data;
+    the least recently used pages are evicted first. Safe to share between
+    threads; several processes can open the same file.
+    """
+
+    def __init__(self, path=PAGE_CACHE_DB, max_bytes=MAX_BYTES, listing_ttl=LISTING_TTL, detail_ttl=DETAIL_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.listing_ttl = listing_ttl
+        self.detail_ttl = detail_ttl
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stores': 0, 'evictions': 0}
+        if zstandard is not None:
+            self._codec, self._compress = 'zstd', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress
+        else:
+            self._codec, self._compress = 'zlib', lambda data: zlib.compress(data, ZLIB_LEVEL)
+
+    def ttl_for(self, url):
+        return self.detail_ttl if is_job_page(url) else self.listing_ttl
+
+    def _decompress(self, codec, data):
+        if codec == 'zlib':
+            return zlib.decompress(data)
+        if zstandard is None:
+            raise RuntimeError(f"Page cached with {codec} needs zstandard: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    def get(self, url, source='http'):
+        """Cached HTML of `url` from `source` if it was fetched within its TTL, else None."""
+        key = cache_key(url, source)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT fetched_at, codec, data FROM pages WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            if now - row[0] > self.ttl_for(url):
+                self._stats['expired'] += 1
+                return None
+            with self._conn:
+                self._conn.execute('UPDATE pages SET last_access = ? WHERE key = ?', (now, key))
+            self._stats['hits'] += 1
+        return self._decompress(row[1], row[2]).decode('utf-8')
+
+    def put(self, url, page_html, status=200, source='http'):
+        """Store a fetched page without its scripts; `source` records whether it came over HTTP or from the browser."""
+        raw = strip_scripts(page_html).encode('utf-8')
+        now = time.time()
+        # zstd compressors are not safe for concurrent use, so compression happens under the lock
+        with self._lock:
+            data = self._compress(raw)
+            key = cache_key(url, source)
+            with self._conn:
+                old = self._conn.execute('SELECT size FROM pages WHERE key = ?', (key,)).fetchone()
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO pages (key, url, source, status, fetched_at, last_access, codec, size, data) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, normalize_url(url), source, status, now, now, self._codec, len(data), data),
+                )
+            self._bytes += len(data) - (old[0] if old else 0)
+            self._stats['stores'] += 1
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used pages until the store is under the low watermark."""
+        target = self.max_bytes * LOW_WATERMARK
+        with self._conn:
+            # Other processes may have stored pages too, so start from the real total
+            self._bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+            victims = []
+            freed = 0
+            for key, size in self._conn.execute('SELECT key, size FROM pages ORDER BY last_access'):
+                if self._bytes - freed <= target:
+                    break
+                victims.append((key,))
+                freed += size
+            self._conn.executemany('DELETE FROM pages WHERE key = ?', victims)
+        self._bytes -= freed
+        self._stats['evictions'] += len(victims)
+
+    def invalidate(self, url, source='http'):
+        """Forget a cached page, e.g. one that turned out to be an error page."""
+        key = cache_key(url, source)
+        with self._lock, self._conn:
+            row = self._conn.execute('SELECT size FROM pages WHERE key = ?', (key,)).fetchone()
+            if row:
+                self._conn.execute('DELETE FROM pages WHERE key = ?', (key,))
+                self._bytes -= row[0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM pages')
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pages'] = self._conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+        stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses'] + stats['expired']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The process-wide cache when SCRAPER_PAGE_CACHE is set, else None."""
+    global _cache
+    if not ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PageCache()
+    return _cache
+
+
+def log_cache_stats():
+    if _cache is not None:
+        logging.info(f"Page cache: {_cache.stats()}")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Inspect or clear the page cache.")
+    parser.add_argument('--db', default=PAGE_CACHE_DB)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('stats', help="Pages and bytes stored")
+    commands.add_parser('clear', help="Drop every cached page")
+    get_parser = commands.add_parser('get', help="Print a cached page, ignoring its TTL")
+    get_parser.add_argument('url')
+    get_parser.add_argument('--source', choices=['http', 'browser'], default='http')
+    args = parser.parse_args()
+
+    cache = PageCache(args.db)
+    try:
+        if args.command == 'stats':
+            print(cache.stats())
+        elif args.command == 'clear':
+            cache.clear()
+            logging.info(f"Cleared {args.db}")
+        else:
+            cache.listing_ttl = cache.detail_ttl = float('inf')
+            page_html = cache.get(args.url, args.source)
+            if page_html is None:
+                raise SystemExit(f"{args.url} is not cached")
+            print(page_html)
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import logging
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, quote, urlencode
+
+from listing_crawler import http_landing_page
+
+# The site stops paginating after this many pages of JOBS_PER_PAGE results
+PAGE_CAP = 15
+JOBS_PER_PAGE = 20
+CAP_JOBS = PAGE_CAP * JOBS_PER_PAGE
+# Sub-queries counted and crawled at once
+PLANNER_WORKERS = int(os.environ.get('SCRAPER_PLANNER_WORKERS', '4'))
+MAX_DEPTH = 12
+# A split whose sub-query counts add up to more than this many times the parent's is not
+# narrowing anything (e.g. the site ignored the facet), so the parent is crawled instead
+MAX_OVERLAP = float(os.environ.get('SCRAPER_PLANNER_MAX_OVERLAP', '10'))
+
+# Facets split in this order; a facet with several values is bisected
+SPLIT_FACETS = ('industryTypeIdGid', 'functionAreaIdGid', 'qbusinessSize')
+# Experience is single-valued on the site and matches postings whose range contains it, so
+# one sub-query per year up to the filter's maximum leaves no posting out
+EXPERIENCE_FACET = 'experience'
+MAX_EXPERIENCE = 30
+EXPERIENCE_BANDS = tuple(str(years) for years in range(MAX_EXPERIENCE + 1))
+
+
+def capped_pages(total_jobs, jobs_per_page=JOBS_PER_PAGE):
+    """Pages the site will actually serve for a query."""
+    return min(math.ceil(total_jobs / jobs_per_page), PAGE_CAP)
+
+
+def split_query(query_params):
+    """Narrower sub-queries whose union covers `query_params`, or [] if it cannot be split.
+
+    Facets with several values are bisected, so the halves are disjoint. The
+    experience split overlaps instead: a "2-5 Yrs" posting matches the bands
+    2 through 5, and claims (UrlClaims) keep it from being crawled twice.
+    """
+    params = parse_qsl(query_params.lstrip('?'), keep_blank_values=True)
+    for facet in SPLIT_FACETS:
+        values = [value for name, value in params if name == facet]
+        if len(values) < 2:
+            continue
+        others = [(name, value) for name, value in params if name != facet]
+        half = len(values) // 2
+        return [
+            '?' + urlencode(others + [(facet, value) for value in part], quote_via=quote)
+            for part in (values[:half], values[half:])
+        ]
+    if not any(name == EXPERIENCE_FACET for name, _ in params):
+        return ['?' + urlencode(params + [(EXPERIENCE_FACET, band)], quote_via=quote) for band in EXPERIENCE_BANDS]
+    return []
+
+
+def narrows(total, counts):
+    """Whether sub-query counts show a split really divided a query of `total` jobs."""
+    return max(counts, default=0) < total and sum(counts) <= total * MAX_OVERLAP
+
+
+class QueryPlanner:
+    """Splits queries that exceed the page cap into sub-queries that fit.
+
+    `read_in_browser(query_params)` is the fallback used when the landing page
+    cannot be read over HTTP; it returns (total jobs, page-1 tuples or None)
+    like listing_crawler.browser_landing_page and is called from one thread at
+    a time. Page-1 tuples read while counting are kept for the plan, so the
+    crawl never loads a sub-query's first page twice.
+    """
+
+    def __init__(self, base_url, read_in_browser=None, workers=PLANNER_WORKERS):
+        self.base_url = base_url
+        self.read_in_browser = read_in_browser
+        self.workers = workers
+        self._count_lock = threading.Lock()
+        self._first_pages = {}
+
+    def count(self, query_params):
+        landing = http_landing_page(self.base_url, query_params)
+        if landing is None and self.read_in_browser:
+            with self._count_lock:
+                landing = self.read_in_browser(query_params)
+        total, jobs = landing or (0, None)
+        if jobs:
+            with self._count_lock:
+                self._first_pages[query_params] = jobs
+        return total or 0
+
+    def plan(self, query_params, total=None):
+        """[(sub-query, total jobs, page-1 tuples or None)] covering the query, each within the cap where possible."""
+        total = self.count(query_params) if total is None else total
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                return self._plan(executor, query_params, total, 0)
+        finally:
+            self._first_pages.clear()
+
+    def _plan(self, executor, query_params, total, depth):
+        first_page = self._first_pages.pop(query_params, None)
+        if total <= CAP_JOBS:
+            return [(query_params, total, first_page)] if total else []
+        children = split_query(query_params) if depth < MAX_DEPTH else []
+        if not children:
+            logging.warning(f"Query still has {total} jobs after splitting; only {CAP_JOBS} are reachable: {query_params}")
+            return [(query_params, total, first_page)]
+        counts = list(executor.map(self.count, children))
+        logging.info(f"Split query with {total} jobs into {len(children)} sub-queries with {counts} jobs")
+        if not narrows(total, counts):
+            logging.warning(f"Splitting did not narrow the query with {total} jobs (sub-queries: {counts}); "
+                            f"crawling it unsplit, only {CAP_JOBS} are reachable: {query_params}")
+            return [(query_params, total, first_page)]
+        plan = []
+        for child, child_total in zip(children, counts):
+            plan.extend(self._plan(executor, child, child_total, depth + 1))
+        return plan
+
+
+class UrlClaims:
+    """Apply URLs already taken by some sub-query, shared across worker threads."""
+
+    def __init__(self):
+        self._urls = set()
+        self._lock = threading.Lock()
+
+    def claim(self, jobs):
+        """The jobs whose Apply URL no other sub-query has claimed yet."""
+        fresh = []
+        with self._lock:
+            for job in jobs:
+                if job['Apply URL'] not in self._urls:
+                    self._urls.add(job['Apply URL'])
+                    fresh.append(job)
+        return fresh
+
+    def __len__(self):
+        return len(self._urls)
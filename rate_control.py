@@ -0,0 +1,149 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Upper bound for concurrent page loads per host; worker pools are sized to this
+MAX_CONCURRENCY = int(os.environ.get('SCRAPER_MAX_CONCURRENCY', '10'))
+INITIAL_CONCURRENCY = int(os.environ.get('SCRAPER_INITIAL_CONCURRENCY', '4'))
+# Page loads slower than this (seconds) count as unhealthy
+LATENCY_TARGET = float(os.environ.get('SCRAPER_LATENCY_TARGET', '10'))
+ERROR_RATE_TARGET = 0.1
+SAMPLE_WINDOW = 20
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+
+
+class Slot:
+    """Outcome of one request made under AdaptiveLimiter.slot()."""
+
+    def __init__(self):
+        self.ok = True
+
+    def fail(self):
+        self.ok = False
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit shared by every worker talking to one host.
+
+    After each full window of healthy samples (low error rate, latency under
+    target) the limit grows by one. A failed or slow request halves it, at most
+    once per `limit` completions, so requests that were already in flight when
+    the limit was cut do not cut it again.
+    """
+
+    def __init__(self, name, initial=INITIAL_CONCURRENCY, min_limit=1, max_limit=MAX_CONCURRENCY,
+                 latency_target=LATENCY_TARGET, error_rate_target=ERROR_RATE_TARGET, window=SAMPLE_WINDOW):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.error_rate_target = error_rate_target
+        self.window = window
+        self._limit = max(min_limit, min(initial, max_limit))
+        self._in_flight = 0
+        self._samples = deque(maxlen=window)
+        self._since_change = 0
+        self._since_decrease = self._limit
+        self._totals = {'requests': 0, 'errors': 0, 'increases': 0, 'decreases': 0}
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= self._limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        """Hold one concurrency slot; the time spent and any exception are recorded.
+
+        The yielded Slot's fail() records an unhealthy sample without raising,
+        e.g. for an HTTP 503 the caller handles itself.
+        """
+        self.acquire()
+        started = time.monotonic()
+        slot = Slot()
+        ok = False
+        try:
+            yield slot
+            ok = slot.ok
+        finally:
+            self.release()
+            self.record(time.monotonic() - started, ok)
+
+    def record(self, latency, ok):
+        with self._cond:
+            self._samples.append((latency, ok))
+            self._since_change += 1
+            self._since_decrease += 1
+            self._totals['requests'] += 1
+            if not ok:
+                self._totals['errors'] += 1
+
+            if not ok or latency > self.latency_target:
+                if self._since_decrease >= self._limit:
+                    self._since_decrease = 0
+                    self._set_limit(max(self.min_limit, self._limit // 2), 'decreases')
+            elif self._since_change >= self.window and self._healthy():
+                self._set_limit(min(self.max_limit, self._limit + 1), 'increases')
+
+    def _healthy(self):
+        errors = sum(1 for _, ok in self._samples if not ok)
+        slow = sum(1 for latency, _ in self._samples if latency > self.latency_target)
+        return errors / len(self._samples) <= self.error_rate_target and slow <= len(self._samples) // 2
+
+    def _set_limit(self, limit, direction):
+        self._since_change = 0
+        if limit == self._limit:
+            return
+        logging.info(f"Concurrency limit for {self.name}: {self._limit} -> {limit}")
+        self._limit = limit
+        self._totals[direction] += 1
+        self._cond.notify_all()
+
+    def backoff_delay(self, attempt):
+        """Jittered exponential delay before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+    def stats(self):
+        with self._cond:
+            errors = sum(1 for _, ok in self._samples if not ok)
+            latencies = [latency for latency, _ in self._samples]
+            return {
+                'host': self.name,
+                'limit': self._limit,
+                'in_flight': self._in_flight,
+                'error_rate': errors / len(self._samples) if self._samples else 0.0,
+                'avg_latency': sum(latencies) / len(latencies) if latencies else 0.0,
+                **self._totals,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(url):
+    """The process-wide limiter for the URL's host."""
+    host = urlsplit(url).netloc
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = AdaptiveLimiter(host)
+        return _limiters[host]
+
+
+def all_stats():
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return [limiter.stats() for limiter in limiters]
@@ -1,23 +1,23 @@
 import time
-import math
 import csv
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from browser import TimedWait, apply_profile, cache_page, chrome_options, chrome_service, load_page, log_page_stats_summary
+import metrics
+from batch_extract import extract_listing_tuples
+from listing_crawler import iter_listing_pages, read_landing_page
+from query_planner import capped_pages
 
+LOCAL_CHROMEDRIVER = '/Users/manishkumar/scrapper/FINAL/chromedriver'
+
+@metrics.timed_function('browser_startup')
 def setup_driver():
     try:
-        options = Options()
-        options.add_argument("--incognito")
-        # options.add_argument("--headless")  # Uncomment for headless mode
-
-        # Path to the local chromedriver
-        service = Service('/Users/manishkumar/scrapper/FINAL/chromedriver')
-        driver = webdriver.Chrome(service=service, options=options)
+        # Local chromedriver unless SCRAPER_CHROMEDRIVER overrides it
+        driver = webdriver.Chrome(service=chrome_service(LOCAL_CHROMEDRIVER), options=chrome_options())
+        apply_profile(driver)
    
         print("WebDriver setup successfully.")
         return driver
@@ -27,33 +27,25 @@ def setup_driver():
 
 # Get max pages from the job listings
 def get_max_pages(driver, base_url, query_params):
-    try:
-        driver.get(base_url + query_params)
-        wait = WebDriverWait(driver, 10)
-        total_pages_element = wait.until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, 'span.styles_count-string__DlPaZ'))
-        )
-        total_pages_text = total_pages_element.text
-
-        total_jobs_text = total_pages_text.split('of')[-1].strip()
-        total_jobs = int(total_jobs_text.replace(',', ''))
-        max_pages = min(math.ceil(total_jobs / 20), 15)  # Limit to 15 pages
+    total_jobs, first_page = read_landing_page(driver, base_url, query_params)
+    if not total_jobs:
+        print("Could not read the total number of jobs; trying one page.")
+        return 1, first_page
+    max_pages = capped_pages(total_jobs)
 
-        print(f"Total number of jobs: {total_jobs}")
-        print(f"Maximum number of pages: {max_pages}")
+    print(f"Total number of jobs: {total_jobs}")
+    print(f"Maximum number of pages: {max_pages}")
 
-        return max_pages
-    except Exception as e:
-        print(f"An error occurred while retrieving max pages: {e}")
-        return 1
+    return max_pages, first_page
 
 # Extract walk-in details from a job listing URL
 def extract_walkin_details(driver, apply_url):
     try:
-        driver.get(apply_url)
-        WebDriverWait(driver, 30).until(
+        load_page(driver, apply_url)
+        TimedWait(driver, 30).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, '.styles_jhc__walkin__57j_D'))
         )
+        cache_page(driver, apply_url)
         time_element = driver.find_element(By.CSS_SELECTOR, '.styles_jhc__walkin__57j_D')
         venue_element = driver.find_element(By.CSS_SELECTOR, '.styles_jhc__venue__2cqi5')
         
@@ -66,62 +58,58 @@ def extract_walkin_details(driver, apply_url):
     except TimeoutException:
         return "N/A", "N/A"
 
-# Process each job listing
-def process_job_listing(job, driver, city_info):
-    try:
-        job_title = job.find_element(By.CSS_SELECTOR, '.title').text
-        company = job.find_element(By.CSS_SELECTOR, '.comp-name').text
-        experience = job.find_element(By.CSS_SELECTOR, '.exp-wrap .exp').text if job.find_elements(By.CSS_SELECTOR, '.exp-wrap .exp') else "N/A"
-        location = job.find_element(By.CSS_SELECTOR, '.locWdth').text if job.find_elements(By.CSS_SELECTOR, '.locWdth') else "N/A"
-        salary_elements = job.find_elements(By.CSS_SELECTOR, '.sal-wrap .ni-job-tuple-icon span')
-        salary = salary_elements[0].get_attribute('title').strip() if salary_elements else "Not disclosed"
-
-        apply_url = job.find_element(By.CSS_SELECTOR, '.title').get_attribute('href')
-
-        # Check for walk-in details
-        walkin_tag = job.find_elements(By.CSS_SELECTOR, '.ttc__walk-in')
-        walkin = "Yes" if walkin_tag else "No"
-
-        time, venue = "N/A", "N/A"
-        if walkin == "Yes":
-            time, venue = extract_walkin_details(driver, apply_url)
-
-        print(f"Extracted job: {job_title} - {apply_url}")
-
-        return {
-            'CITY ID': city_info['CITY ID'],
-            'City': city_info['City'],
-            'INDUSTRY ID': city_info['INDUSTRY ID'],
-            'Job Title': job_title,
-            'Company': company,
-            'Experience': experience,
-            'Location': location,
-            'Salary': salary,
-            'Apply URL': apply_url,
-            'Walk-in': walkin,
-            'Time': time,
-            'Venue': venue
-        }
-    except NoSuchElementException as e:
-        print(f"Failed to extract job details. Error: {str(e)}")
-        return None
+# Add city columns and walk-in details to the listing fields
+def build_job_row(job_fields, driver, city_info):
+    time, venue = "N/A", "N/A"
+    if job_fields['Walk-in'] == "Yes":
+        time, venue = extract_walkin_details(driver, job_fields['Apply URL'])
+
+    print(f"Extracted job: {job_fields['Job Title']} - {job_fields['Apply URL']}")
+
+    return {
+        'CITY ID': city_info['CITY ID'],
+        'City': city_info['City'],
+        'INDUSTRY ID': city_info['INDUSTRY ID'],
+        **job_fields,
+        'Time': time,
+        'Venue': venue
+    }
 
 # Scrape jobs from a specific city
 def scrape_jobs(driver, base_url, query_params, city_info):
-    max_pages = get_max_pages(driver, base_url, query_params)
+    max_pages, first_page = get_max_pages(driver, base_url, query_params)
+    page_numbers = range(1, max_pages + 1)
     all_jobs = []
+    fallback_pages = []
+
+    # Page 1 came with the job count
+    if first_page:
+        print(f"Found {len(first_page)} job listings on page 1.")
+        for job_fields in first_page:
+            all_jobs.append(build_job_row(job_fields, driver, city_info))
+        page_numbers = range(2, max_pages + 1)
+
+    for page_number, jobs in iter_listing_pages(base_url, query_params, page_numbers):
+        if jobs is None:
+            fallback_pages.append(page_number)
+            continue
+        print(f"Found {len(jobs)} job listings on page {page_number}.")
+        for job_fields in jobs:
+            all_jobs.append(build_job_row(job_fields, driver, city_info))
 
-    for page_number in range(1, max_pages + 1):
+    # Pages the HTTP crawl could not read are loaded in the browser
+    for page_number in sorted(fallback_pages):
         page_url = f"{base_url}-{page_number}{query_params}"
         print(f"Opening {page_url}")
 
         try:
-            driver.get(page_url)
-            WebDriverWait(driver, 30).until(
+            load_page(driver, page_url)
+            TimedWait(driver, 30).until(
                 EC.presence_of_all_elements_located((By.CSS_SELECTOR, '.srp-jobtuple-wrapper'))
             )
+            cache_page(driver, page_url)
 
-            job_listings = driver.find_elements(By.CSS_SELECTOR, '.srp-jobtuple-wrapper')
+            job_listings = extract_listing_tuples(driver)
             
             if not job_listings:
                 print("No more jobs found. Exiting loop.")
@@ -129,10 +117,8 @@ def scrape_jobs(driver, base_url, query_params, city_info):
 
             print(f"Found {len(job_listings)} job listings on page {page_number}.")
 
-            for job in job_listings:
-                job_data = process_job_listing(job, driver, city_info)
-                if job_data:
-                    all_jobs.append(job_data)
+            for job_fields in job_listings:
+                all_jobs.append(build_job_row(job_fields, driver, city_info))
 
         except TimeoutException as e:
             print(f"TimeoutException: Unable to load page {page_url}. Error: {str(e)}")
@@ -170,13 +156,16 @@ def main():
             driver.quit()
             print(f"WebDriver for {city_info['City']} closed successfully.")
 
+    log_page_stats_summary()
+
     try:
         with open('all_job_listings.csv', 'w', newline='', encoding='utf-8') as csvfile:
             fieldnames = ['CITY ID', 'City', 'INDUSTRY ID', 'Job Title', 'Company', 'Experience', 'Location', 'Salary', 'Apply URL', 'Walk-in', 'Time', 'Venue']
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
-            for job in all_job_data:
-                writer.writerow(job)
+            metrics.count_missing(all_job_data)
+            with metrics.timed('write'):
+                writer.writerows(all_job_data)
         print("All job data successfully written to all_job_listings.csv.")
     except Exception as e:
         print(f"An error occurred while saving job data to CSV: {e}")
@@ -1,95 +1,97 @@
-import time
-import math
 import csv
+import os
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import Queue
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
+from browser import TimedWait, apply_profile, cache_page, chrome_options, chrome_service, load_page, log_page_stats_summary
+import metrics
+from http_fetch import fetch_detail_fields
+from batch_extract import extract_listing_tuples
+import incremental
+from incremental import SeenUrls, query_key
+from listing_crawler import browser_landing_page, iter_query_pages, read_landing_page
+from driver_pool import DriverPool
+from sinks import DURABLE_FORMATS, OUTPUT_FORMAT, open_sink
+import desc_store
+import dedupe
+from writers import END, QueueWriter
+from query_planner import PLANNER_WORKERS, QueryPlanner, UrlClaims, capped_pages
+from rate_control import MAX_CONCURRENCY, limiter_for
 
+DETAIL_WORKERS = MAX_CONCURRENCY  # Upper bound; the adaptive limiter decides how many load at once
+DETAIL_QUEUE_SIZE = 100  # Listing stage blocks once this many jobs await details
+ROW_QUEUE_SIZE = 500
+WRITE_BATCH_SIZE = 100
+RECYCLE_AFTER = 50  # Detail pages served by one browser before it is restarted
+SEEN_DB = 'walkin_filters_seen.db'
+# SCRAPER_BASE_URL points the scraper at another host, e.g. fixture_server.py for offline runs
+BASE_URL = os.environ.get('SCRAPER_BASE_URL', 'https://www.naukri.com/walkin-jobs')
+OUTPUT_CSV = 'all_job_listings_params_test1page.csv'
+
+_END = END  # End-of-stream marker on the detail and row queues
+
+@metrics.timed_function('browser_startup')
 def setup_driver():
     """Set up the WebDriver for Chrome."""
     try:
-        chrome_options = Options()
-        chrome_options.add_argument("--incognito")
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver = webdriver.Chrome(service=chrome_service(), options=chrome_options())
+        apply_profile(driver)
         print("WebDriver setup successfully.")
         return driver
     except WebDriverException as e:
         print(f"An error occurred while setting up WebDriver: {e}")
         raise
 
-def get_total_jobs(driver, base_url, query_params):
-    """Retrieve the total number of jobs."""
-    driver.get(base_url + query_params)
-    try:
-        wait = WebDriverWait(driver, 10)
-        total_pages_element = wait.until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, 'span.styles_count-string__DlPaZ'))
-        )
-        total_jobs_text = total_pages_element.text.split('of')[-1].strip()
-        total_jobs = int(total_jobs_text.replace(',', ''))
-        return total_jobs
-    except (TimeoutException, NoSuchElementException, ValueError) as e:
-        print(f"An error occurred while retrieving total jobs: ")
-        return 0
-
 def calculate_max_pages(total_jobs, jobs_per_page=20):
-    """Calculate the maximum number of pages."""
-    return math.ceil(total_jobs / jobs_per_page)
+    """Calculate the maximum number of pages the site will serve."""
+    return capped_pages(total_jobs, jobs_per_page)
 
-def extract_job_details(job):
-    """Extract basic details from a job element."""
-    try:
-        job_title = job.find_element(By.CSS_SELECTOR, '.title').text
-        company = job.find_element(By.CSS_SELECTOR, '.comp-name').text
-        salary_elements = job.find_elements(By.CSS_SELECTOR, '.sal-wrap .ni-job-tuple-icon span')
-        salary = salary_elements[0].get_attribute('title').strip() if salary_elements else "Not disclosed"
-        apply_url = job.find_element(By.CSS_SELECTOR, '.title').get_attribute('href')
-        return job_title, company, salary, apply_url
-    except NoSuchElementException as e:
-        print(f"Failed to extract job details: {e}")
-        return "N/A", "N/A", "N/A", "N/A"
-
-def extract_walkin_details(driver, apply_url):
+def extract_walkin_details(pool, apply_url):
     """Extract walk-in details from a job listing."""
-    try:
-        driver.get(apply_url)
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, '.styles_jhc__walkin__57j_D'))
-        )
-        time_element = driver.find_element(By.CSS_SELECTOR, '.styles_jhc__walkin__57j_D').text.strip()
-        venue_element = driver.find_element(By.CSS_SELECTOR, '.styles_jhc__venue__2cqi5').text.strip()
-
-        # Extract the experience
-        experience_element = driver.find_element(By.CSS_SELECTOR, '.styles_jhc__exp__k_giM span').text.strip() if driver.find_elements(By.CSS_SELECTOR, '.styles_jhc__exp__k_giM span') else "N/A"
-        
+    fields = fetch_detail_fields(apply_url, ('Time', 'Venue', 'Job Description HTML'))
+    if fields:
+        return fields['Experience'] or "N/A", fields['Time'], fields['Venue'], fields['Job Description HTML']
+
+    with pool.driver() as driver:
         try:
-            read_more_button = driver.find_element(By.CLASS_NAME, "styles_read-more-link__dD_5h")
-            read_more_button.click()
-            WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.CLASS_NAME, "styles_JDC__dang-inner-html__h0K4t"))
-            )
-        except NoSuchElementException:
-            pass
+            # The slot records load latency and timeouts for the host's concurrency limit
+            with limiter_for(apply_url).slot():
+                load_page(driver, apply_url)
+                TimedWait(driver, 30).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, '.styles_jhc__walkin__57j_D'))
+                )
+                cache_page(driver, apply_url)
+            time_element = driver.find_element(By.CSS_SELECTOR, '.styles_jhc__walkin__57j_D').text.strip()
+            venue_element = driver.find_element(By.CSS_SELECTOR, '.styles_jhc__venue__2cqi5').text.strip()
+
+            # Extract the experience
+            experience_element = driver.find_element(By.CSS_SELECTOR, '.styles_jhc__exp__k_giM span').text.strip() if driver.find_elements(By.CSS_SELECTOR, '.styles_jhc__exp__k_giM span') else "N/A"
 
-        job_desc_element = driver.find_element(By.CLASS_NAME, "styles_JDC__dang-inner-html__h0K4t")
-        job_desc = job_desc_element.get_attribute('innerHTML').strip()
+            try:
+                read_more_button = driver.find_element(By.CLASS_NAME, "styles_read-more-link__dD_5h")
+                read_more_button.click()
+                TimedWait(driver, 10).until(
+                    EC.visibility_of_element_located((By.CLASS_NAME, "styles_JDC__dang-inner-html__h0K4t"))
+                )
+            except NoSuchElementException:
+                pass
 
-        return experience_element, time_element, venue_element, job_desc
+            job_desc_element = driver.find_element(By.CLASS_NAME, "styles_JDC__dang-inner-html__h0K4t")
+            job_desc = job_desc_element.get_attribute('innerHTML').strip()
 
-    except (NoSuchElementException, TimeoutException) as e:
-        print(f"Failed to extract walk-in details: {e}")
-        return "N/A", "N/A", "N/A", "N/A"
+            return experience_element, time_element, venue_element, job_desc
 
-def write_job_to_csv(writer, city_info, job_details):
-    """Write job details to the CSV file."""
-    job_data = {
+        except (NoSuchElementException, TimeoutException) as e:
+            print(f"Failed to extract walk-in details: {e}")
+            return "N/A", "N/A", "N/A", "N/A"
+
+def build_job_row(city_info, job_details):
+    """Map job details onto the output CSV columns."""
+    return {
         'City Key': city_info['City Key'],
         'City': city_info['City'],
         'INDUSTRY ID': city_info['INDUSTRY ID'],
@@ -103,92 +105,240 @@ def write_job_to_csv(writer, city_info, job_details):
         'Venue': job_details[7],
         'Job Description': job_details[8]
     }
-    writer.writerow(job_data)
 
-def process_job(driver, job, city_info, writer):
-    """Process and extract details from a single job listing."""
-    try:
-        job_details = extract_job_details(job)
-        walkin = "Yes" if job.find_elements(By.CSS_SELECTOR, '.ttc__walk-in') else "No"
-        
-        if walkin == "Yes":
-            experience, time, venue, job_desc = extract_walkin_details(driver, job_details[3])
-        else:
-            experience, time, venue, job_desc = "N/A", "N/A", "N/A", "N/A"
-        
-        write_job_to_csv(writer, city_info, job_details + (walkin, experience, time, venue, job_desc))
-    except Exception as e:
-        print(f"Error processing job: {e}")
-
-
-
-def scrape_jobs(driver, base_url, query_params, city_info, writer):
-    """Scrape job listings from multiple pages."""
-    total_jobs = get_total_jobs(driver, base_url, query_params)
+def process_job(pool, job_fields, city_info):
+    """Add walk-in details to a job's listing fields and return its output row."""
+    job_details = (job_fields['Job Title'], job_fields['Company'], job_fields['Salary'], job_fields['Apply URL'])
+    walkin = job_fields['Walk-in']
+    if walkin == "Yes":
+        experience, time, venue, job_desc = extract_walkin_details(pool, job_details[3])
+    else:
+        experience, time, venue, job_desc = "N/A", "N/A", "N/A", "N/A"
+
+    return build_job_row(city_info, job_details + (walkin, experience, time, venue, job_desc))
+
+def detail_worker(detail_queue, row_queue, pool, store=None):
+    """Detail stage: fetch walk-in details for queued jobs until the end marker arrives.
+
+    With a description store the row carries the description hash, not its HTML.
+    """
+    while True:
+        item = detail_queue.get()
+        if item is _END:
+            break
+        city_info, job_fields, tags = item
+        try:
+            row = process_job(pool, job_fields, city_info)
+            row.update(tags)
+            row_queue.put(store.store_row(row) if store else row)
+        except Exception as e:
+            print(f"Error processing job {job_fields['Apply URL']}: {e}")
+
+def queue_jobs(jobs, city_info, detail_queue, row_queue=None, deduper=None):
+    """Listing stage output: put plain job data on the bounded detail queue.
+
+    With a deduper, a listing that near-duplicates one already queued skips the
+    detail stage and goes straight to the writer, pointing at the earlier posting.
+    """
+    for job_fields in jobs:
+        tags = {}
+        if deduper:
+            cluster, duplicate_of = deduper.check(job_fields)
+            tags = {dedupe.CLUSTER_COLUMN: cluster, dedupe.DUPLICATE_COLUMN: duplicate_of}
+            if duplicate_of:
+                row = build_job_row(city_info, (job_fields['Job Title'], job_fields['Company'], job_fields['Salary'],
+                                                job_fields['Apply URL'], job_fields['Walk-in'],
+                                                "N/A", "N/A", "N/A", "N/A"))
+                # The description was not fetched; leaving the key out keeps it empty with or without a description store
+                del row['Job Description']
+                row.update(tags)
+                row_queue.put(row)
+                continue
+        detail_queue.put((city_info, job_fields, tags))
+
+def scrape_jobs(driver, base_url, query_params, city_info, detail_queue, seen=None, row_queue=None, deduper=None,
+                total_jobs=None, claims=None, first_page=None):
+    """Scrape job listings from multiple pages.
+
+    `claims` is shared by the sub-queries of one split query so each Apply URL is queued once.
+    """
+    if total_jobs is None:
+        # One load gives the count and page 1, so page 1 is not loaded again below
+        total_jobs, first_page = read_landing_page(driver, base_url, query_params)
     max_pages = calculate_max_pages(total_jobs)
     print(f"Total jobs: {total_jobs}, Max pages: {max_pages}")
+    key = query_key(base_url, query_params)
+    known = seen.for_query(key) if seen else None
 
-    for page_number in range(1, max_pages + 1):
+    def read_in_browser(page_number):
         page_url = f"{base_url}-{page_number}{query_params}"
         print(f"Opening {page_url}")
-
         try:
-            driver.get(page_url)
-            WebDriverWait(driver, 30).until(
+            load_page(driver, page_url)
+            TimedWait(driver, 30).until(
                 EC.presence_of_all_elements_located((By.CSS_SELECTOR, '.srp-jobtuple-wrapper'))
             )
-            job_listings = driver.find_elements(By.CSS_SELECTOR, '.srp-jobtuple-wrapper')
-            print(f"Found {len(job_listings)} job listings on page {page_number}.")
-
-            if not job_listings:
-                print("No more jobs found. Exiting loop.")
-                break
-
-            # Use ThreadPoolExecutor to process job listings concurrently
-            with ThreadPoolExecutor(max_workers=20) as executor:
-                futures = [executor.submit(process_job, driver, job, city_info, writer) for job in job_listings]
-                for future in as_completed(futures):
-                    future.result()  # To raise exceptions if any
-
-            print(f"Completed page {page_number}.")
-
+            cache_page(driver, page_url)
+            job_listings = extract_listing_tuples(driver)
         except TimeoutException as e:
             print(f"TimeoutException: Unable to load page {page_url}. Error: {e}")
-            continue
+            return []
         except Exception as e:
             print(f"Error while processing page {page_url}: {e}")
-            continue
+            return []
+
+        if not job_listings:
+            print("No more jobs found. Exiting loop.")
+            return None
+        return job_listings
+
+    pages = iter_query_pages(base_url, query_params, max_pages, read_in_browser,
+                             known, incremental.WINDOW, incremental.KNOWN_RATIO, first_page)
+    for page_number, jobs in pages:
+        print(f"Found {len(jobs)} new job listings on page {page_number}.")
+        if seen:
+            # Recorded as seen only once the writer has written their rows
+            seen.listed(key, [job['Apply URL'] for job in jobs])
+        if claims is not None:
+            jobs = claims.claim(jobs)
+        queue_jobs(jobs, city_info, detail_queue, row_queue, deduper)
+        print(f"Queued page {page_number}.")
+
+def scrape_planned_query(listing_pool, base_url, plan, city_info, detail_queue, seen, row_queue, deduper):
+    """Crawl the sub-queries of a split query in parallel, deduplicating by Apply URL."""
+    claims = UrlClaims()
+
+    def scrape_sub_query(sub_query, total_jobs, first_page):
+        with listing_pool.driver() as driver:
+            scrape_jobs(driver, base_url, sub_query, city_info, detail_queue, seen, row_queue, deduper,
+                        total_jobs, claims, first_page)
+
+    with ThreadPoolExecutor(max_workers=PLANNER_WORKERS) as executor:
+        futures = [executor.submit(scrape_sub_query, *planned) for planned in plan]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error while scraping a sub-query for {city_info['City']}: {e}")
+    print(f"Queued {len(claims)} unique jobs from {len(plan)} sub-queries for {city_info['City']}.")
+
+class WalkinScraper:
+    """Browsers, pools and stores kept open across every batch of queries one process scrapes."""
+
+    def __init__(self, base_url=BASE_URL):
+        self.base_url = base_url
+        self.driver = setup_driver()
+        self.detail_pool = DriverPool(setup_driver, size=DETAIL_WORKERS, recycle_after=RECYCLE_AFTER)
+        self.detail_pool.prewarm()
+        # Browsers for sub-queries of split queries; only started when a query exceeds the page cap
+        self.listing_pool = DriverPool(setup_driver, size=PLANNER_WORKERS, recycle_after=RECYCLE_AFTER)
+        self.seen = SeenUrls(SEEN_DB) if incremental.ENABLED else None
+        self.store = desc_store.open_store()
+        self.deduper = dedupe.ListingDeduper() if dedupe.ENABLED else None
+        self.planner = QueryPlanner(base_url, lambda query_params: browser_landing_page(self.driver, base_url, query_params))
+
+        self.fieldnames = [
+            'City Key', 'City', 'INDUSTRY ID', 'Job Title', 'Company', 
+            'Salary', 'Apply URL', 'Walk-in','Experience', 'Time', 'Venue', 'Job Description'
+        ]
+        if self.store:
+            self.fieldnames = desc_store.row_fieldnames(self.fieldnames)
+        if self.deduper:
+            self.fieldnames = self.fieldnames + [dedupe.CLUSTER_COLUMN, dedupe.DUPLICATE_COLUMN]
+
+    def scrape_query(self, query, detail_queue, row_queue):
+        city_info = {
+            'City Key': query['City Key'],
+            'City': query['City'],
+            'INDUSTRY ID': query['INDUSTRY ID']
+        }
+        query_params = query['query']
+        # Queries past the page cap are split into sub-queries that each fit
+        plan = self.planner.plan(query_params)
+        if len(plan) > 1:
+            scrape_planned_query(self.listing_pool, self.base_url, plan, city_info, detail_queue, self.seen,
+                                 row_queue, self.deduper)
+        elif plan:
+            sub_query, total_jobs, first_page = plan[0]
+            scrape_jobs(self.driver, self.base_url, sub_query, city_info, detail_queue, self.seen, row_queue,
+                        self.deduper, total_jobs, first_page=first_page)
+
+    def scrape(self, query_rows, output, defer_seen=False):
+        """Scrape params.csv rows into `output` (a CSV name; the extension follows the sink format).
+
+        Returns the Apply URLs written. Their postings are recorded as seen as
+        each batch is written (for Parquet and Arrow, whose rows are buffered,
+        once the file is closed), or, with `defer_seen`, only when the caller
+        passes them to mark_seen(), e.g. once a shard is published.
+        """
+        detail_queue = Queue(maxsize=DETAIL_QUEUE_SIZE)
+        row_queue = Queue(maxsize=ROW_QUEUE_SIZE)
+        written = []
+        durable = OUTPUT_FORMAT in DURABLE_FORMATS
+        with open_sink(output, self.fieldnames) as sink:
+            def write_rows(rows):
+                sink.write_rows(rows)
+                sink.flush()
+                urls = [row['Apply URL'] for row in rows]
+                written.extend(urls)
+                if durable and not defer_seen:
+                    self.mark_seen(urls)
+
+            # Writer stage: the only thread that touches the output sink
+            writer_thread = QueueWriter(row_queue, write_rows, batch_size=WRITE_BATCH_SIZE, name='row writer')
+            writer_thread.start()
+            detail_threads = [
+                threading.Thread(target=detail_worker, args=(detail_queue, row_queue, self.detail_pool, self.store))
+                for _ in range(DETAIL_WORKERS)
+            ]
+            for thread in detail_threads:
+                thread.start()
+
+            try:
+                for query in query_rows:
+                    self.scrape_query(query, detail_queue, row_queue)
+            finally:
+                # Drain the pipeline stage by stage before the file is closed
+                for _ in detail_threads:
+                    detail_queue.put(_END)
+                for thread in detail_threads:
+                    thread.join()
+                row_queue.put(_END)
+                writer_thread.join()
+        if writer_thread.error:
+            raise writer_thread.error
+        if not durable and not defer_seen:
+            self.mark_seen(written)
+        return written
+
+    def mark_seen(self, urls):
+        """Record written postings for incremental runs."""
+        if self.seen:
+            self.seen.written(urls)
+
+    def close(self):
+        self.driver.quit()
+        self.listing_pool.close()
+        self.detail_pool.close()
+        if self.seen:
+            self.seen.close()
+        if self.store:
+            self.store.close()
+        if self.deduper:
+            print(f"Skipped detail fetches for {self.deduper.duplicates} near-duplicate listings.")
+        log_page_stats_summary()
+        print("Driver closed and process completed.")
 
 def main():
     with open('params.csv', 'r') as file:
         reader = csv.DictReader(file)
         query_urls = list(reader)
 
-    driver = setup_driver()
-
+    scraper = WalkinScraper()
     try:
-        base_url = 'https://www.naukri.com/walkin-jobs'
-
-        with open('all_job_listings_params_test1page.csv', 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = [
-                'City Key', 'City', 'INDUSTRY ID', 'Job Title', 'Company', 
-                'Salary', 'Apply URL', 'Walk-in','Experience', 'Time', 'Venue', 'Job Description'
-            ]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for query in query_urls:
-                city_info = {
-                    'City Key': query['City Key'],
-                    'City': query['City'],
-                    'INDUSTRY ID': query['INDUSTRY ID']
-                }
-                query_params = query['query']
-                scrape_jobs(driver, base_url, query_params, city_info, writer)
-
+        scraper.scrape(query_urls, OUTPUT_CSV)
     finally:
-        driver.quit()
-        print("Driver closed and process completed.")
+        scraper.close()
 
 if __name__ == "__main__":
     main()
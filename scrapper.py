@@ -1,21 +1,49 @@
-import math
 import csv
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import Queue
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
+from browser import TimedWait, apply_profile, cache_page, chrome_options, chrome_service, load_page, log_page_stats_summary
+import metrics
+from batch_extract import extract_listing_tuples
+from http_fetch import fetch_detail_fields
+import incremental
+from incremental import SeenUrls, query_key
+from listing_crawler import browser_landing_page, iter_query_pages, read_landing_page
+from frontier import FETCHED, Frontier
+from sinks import DURABLE_FORMATS, OUTPUT_FORMAT, open_sink
+import desc_store
+from query_planner import PLANNER_WORKERS, QueryPlanner, UrlClaims, capped_pages
+from driver_pool import DriverPool
+from writers import END, QueueWriter
 
+DETAIL_FIELDS = ('Job Title', 'Company', 'Experience', 'Salary', 'Time', 'Venue', 'Job Description')
+
+FRONTIER_DB = 'scrapper_frontier.db'
+# Fetched URLs are remembered across runs; SCRAPER_RESET=1 forgets them and rewrites the output
+RESET = os.environ.get('SCRAPER_RESET', '0') == '1'
+# SCRAPER_RESUME=1 skips URL discovery and only fetches what the frontier still holds
+RESUME = os.environ.get('SCRAPER_RESUME', '0') == '1'
+MAX_ATTEMPTS = 3  # Runs that may fail on a URL before it is no longer retried
+WRITE_QUEUE_SIZE = 500
+RECYCLE_AFTER = 50  # Listing pages served by one sub-query browser before it is restarted
+WRITE_BATCH_SIZE = 100
+SEEN_DB = 'scrapper_seen.db'
+# SCRAPER_BASE_URL points the scraper at another host, e.g. fixture_server.py for offline runs
+BASE_URL = os.environ.get('SCRAPER_BASE_URL', 'https://www.naukri.com/walkin-jobs')
+
+_url_file_lock = threading.Lock()  # Guards jobs_url_scrap.csv across sub-query threads
+
+@metrics.timed_function('browser_startup')
 def setup_driver():
     """Set up the WebDriver for Chrome."""
     try:
-        chrome_options = Options()
-        chrome_options.add_argument("--incognito")
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver = webdriver.Chrome(service=chrome_service(), options=chrome_options())
+        apply_profile(driver)
         print("WebDriver setup successfully.")
         return driver
     except WebDriverException as e:
@@ -24,67 +52,83 @@ def setup_driver():
 
 def get_job_listings(driver, url):
     """Retrieve job listings from a given URL."""
-    driver.get(url)
+    load_page(driver, url)
     try:
-        WebDriverWait(driver, 30).until(
+        TimedWait(driver, 30).until(
             EC.presence_of_all_elements_located((By.CSS_SELECTOR, '.srp-jobtuple-wrapper'))
         )
-        job_elements = driver.find_elements(By.CSS_SELECTOR, '.srp-jobtuple-wrapper')
-        job_urls = []
-        for job in job_elements:
-            try:
-                apply_url = job.find_element(By.CSS_SELECTOR, '.title').get_attribute('href')
-                job_urls.append(apply_url)
-                print(f"Captured apply URL: {apply_url}")
-            except NoSuchElementException:
-                continue
-        return job_urls
+        cache_page(driver, url)
+        return extract_listing_tuples(driver)
     except TimeoutException as e:
         print(f"TimeoutException: Unable to load page {url}. Error: {e}")
         return []
 
-def get_total_jobs(driver, base_url, query_params):
-    """Retrieve the total number of jobs."""
-    driver.get(base_url + query_params)
-    try:
-        wait = WebDriverWait(driver, 10)
-        total_pages_element = wait.until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, 'span.styles_count-string__DlPaZ'))
-        )
-        total_jobs_text = total_pages_element.text.split('of')[-1].strip()
-        total_jobs = int(total_jobs_text.replace(',', ''))
-        return total_jobs
-    except (TimeoutException, NoSuchElementException, ValueError) as e:
-        print(f"An error occurred while retrieving total jobs: {e}")
-        return 0
-
 def calculate_max_pages(total_jobs, jobs_per_page=20):
-    """Calculate the maximum number of pages."""
-    return math.ceil(total_jobs / jobs_per_page)
+    """Calculate the maximum number of pages the site will serve."""
+    return capped_pages(total_jobs, jobs_per_page)
 
-def scrape_jobs(driver, base_url, query_params, city_key, city, industry_id, writer):
+def scrape_jobs(driver, base_url, query_params, city_key, city, industry_id, writer, frontier, seen=None,
+                total_jobs=None, claims=None, first_page=None):
     """Scrape job URLs from multiple pages."""
-    total_jobs = get_total_jobs(driver, base_url, query_params)
+    if total_jobs is None:
+        # One load gives the count and page 1, so page 1 is not loaded again below
+        total_jobs, first_page = read_landing_page(driver, base_url, query_params)
     max_pages = calculate_max_pages(total_jobs)
-    
-    for page_number in range(1, max_pages + 1):
+    key = query_key(base_url, query_params)
+    known = seen.for_query(key) if seen else None
+
+    def read_in_browser(page_number):
         page_url = f"{base_url}-{page_number}{query_params}"
         print(f"Opening {page_url}")
+        return get_job_listings(driver, page_url)
 
-        job_urls = get_job_listings(driver, page_url)
-        for url in job_urls:
-            writer.writerow({
-                'City Key': city_key,
-                'City': city,
-                'INDUSTRY ID': industry_id,
-                'Apply URL': url
-            })
+    pages = iter_query_pages(base_url, query_params, max_pages, read_in_browser,
+                             known, incremental.WINDOW, incremental.KNOWN_RATIO, first_page)
+    for page_number, jobs in pages:
+        if seen:
+            # New postings are recorded as seen once step 2 has written their rows
+            seen.listed(key, [job['Apply URL'] for job in jobs])
+            seen.written([job['Apply URL'] for job in jobs if frontier.is_fetched(job['Apply URL'])])
+        if claims is not None:
+            jobs = claims.claim(jobs)
+        new_jobs = [job for job in jobs if not frontier.is_fetched(job['Apply URL'])]
+        rows = [{
+            'City Key': city_key,
+            'City': city,
+            'INDUSTRY ID': industry_id,
+            'Apply URL': job['Apply URL']
+        } for job in new_jobs]
+        for row in rows:
+            print(f"Captured apply URL: {row['Apply URL']}")
+        # Sub-queries of a split query share the URL file
+        with _url_file_lock:
+            writer.writerows(rows)
+        # Added page by page, so URLs found before a failed query are still fetched in step 2
+        frontier.add_many((row['Apply URL'], {field: row[field] for field in ('City Key', 'City', 'INDUSTRY ID')})
+                          for row in rows)
+        print(f"Completed page {page_number}: {len(new_jobs)} new, {len(jobs) - len(new_jobs)} already fetched.")
+
+def scrape_planned_query(listing_pool, base_url, plan, city_key, city, industry_id, writer, frontier, seen):
+    """Crawl the sub-queries of a split query in parallel, deduplicating by Apply URL."""
+    claims = UrlClaims()
 
-        print(f"Completed page {page_number}.")
+    def scrape_sub_query(sub_query, total_jobs, first_page):
+        with listing_pool.driver() as driver:
+            scrape_jobs(driver, base_url, sub_query, city_key, city, industry_id, writer, frontier, seen,
+                        total_jobs, claims, first_page)
+
+    with ThreadPoolExecutor(max_workers=PLANNER_WORKERS) as executor:
+        futures = [executor.submit(scrape_sub_query, *planned) for planned in plan]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error while scraping a sub-query for {city}: {e}")
+    print(f"Captured {len(claims)} unique URLs from {len(plan)} sub-queries for {city}.")
 
 def expand_read_more(driver):
     try:
-        read_more = WebDriverWait(driver, 2).until(
+        read_more = TimedWait(driver, 2).until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, "p.styles_read-more__MyWkb a.styles_read-more-link__dD_5h"))
         )
         read_more.click()
@@ -108,9 +152,15 @@ def scrape_job_description(driver):
 
 def extract_job_details(driver, url):
     """Extract job details from the job URL."""
-    driver.get(url)
+    fields = fetch_detail_fields(url, DETAIL_FIELDS)
+    if fields:
+        job_details = {field: fields[field] for field in DETAIL_FIELDS}
+        print(f"Extracted details over HTTP: {job_details}")
+        return job_details
+
+    load_page(driver, url)
     try:
-        wait = WebDriverWait(driver, 3)
+        wait = TimedWait(driver, 3)
         
         try:
             banner_element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '#root > div > main > div.styles_banner-container__bYQEf > img')))
@@ -135,18 +185,21 @@ def extract_job_details(driver, url):
             venue_element = wait.until(EC.presence_of_element_located((By.XPATH, '/html/body/div[1]/div/main/div[1]/div[1]/section[1]/div[1]/div[2]/div[4]/span')))
             experience_element = wait.until(EC.presence_of_element_located((By.XPATH, '/html/body/div[1]/div/main/div[1]/div[1]/section[1]/div[1]/div[2]/div[1]/div[1]/span')))
 
-        expand_read_more(driver)
+        # Every field rendered, so the page is cached before "read more" changes it
+        cache_page(driver, url)
+        # scrape_job_description expands "read more" itself; a second attempt only waits out its timeout
         job_description = scrape_job_description(driver)
         
-        job_details = {
-            'Job Title': title_element.text,
-            'Company': company_element.text,
-            'Experience': experience_element.text,
-            'Salary': salary_element.text,
-            'Time': time_element.text,
-            'Venue': venue_element.text,
-            'Job Description': job_description,
-        }
+        with metrics.timed('extract_detail'):
+            job_details = {
+                'Job Title': title_element.text,
+                'Company': company_element.text,
+                'Experience': experience_element.text,
+                'Salary': salary_element.text,
+                'Time': time_element.text,
+                'Venue': venue_element.text,
+                'Job Description': job_description,
+            }
         print(f"Extracted details: {job_details}")
         return job_details
         
@@ -157,67 +210,121 @@ def extract_job_details(driver, url):
         print(f"Element not found on {url}: {e}")
         return {}
 
+def write_details(driver, job_urls, row_queue, frontier, store=None):
+    """Extract each pending URL's details and queue the row for the writer thread."""
+    for url, job in job_urls:
+        city_key = job['City Key']
+        city = job['City']
+        industry_id = job['INDUSTRY ID']
+
+        job_details = extract_job_details(driver, url)
+        if job_details:
+            job_details.update({
+                'City Key': city_key,
+                'City': city,
+                'INDUSTRY ID': industry_id,
+                'Apply URL': url,
+                'Walk-in': 'Yes'  # Assuming all scraped jobs are walk-ins
+            })
+            if store:
+                job_details = store.store_row(job_details)
+            row_queue.put(job_details)
+        else:
+            frontier.mark_failed(url, "No job details extracted")
+
 def main():
     driver = setup_driver()
+    # Browsers for sub-queries of split queries; only started when a query exceeds the page cap
+    listing_pool = DriverPool(setup_driver, size=PLANNER_WORKERS, recycle_after=RECYCLE_AFTER)
+    frontier = Frontier(FRONTIER_DB)
+    seen = SeenUrls(SEEN_DB) if incremental.ENABLED else None
+    store = desc_store.open_store()
+    if RESET:
+        frontier.reset()
+    resume = RESUME and bool(frontier.counts())
+    # Rows of URLs fetched by earlier runs are already in the output, so it is continued
+    append = bool(frontier.counts().get(FETCHED))
+    print(f"Frontier {FRONTIER_DB}: {frontier.counts()}")
     
     # Step 1: Extract job URLs
     try:
-        with open('params_input.csv', 'r') as file:
-            reader = csv.DictReader(file)
-            query_urls = list(reader)
+        if not resume:
+            with open('params_input.csv', 'r') as file:
+                reader = csv.DictReader(file)
+                query_urls = list(reader)
 
-        base_url = 'https://www.naukri.com/walkin-jobs'
+            base_url = BASE_URL
+            planner = QueryPlanner(base_url, lambda query_params: browser_landing_page(driver, base_url, query_params))
 
-        with open('jobs_url_scrap.csv', 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['City Key', 'City', 'INDUSTRY ID', 'Apply URL']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
+            with open('jobs_url_scrap.csv', 'w', newline='', encoding='utf-8') as csvfile:
+                fieldnames = ['City Key', 'City', 'INDUSTRY ID', 'Apply URL']
+                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                writer.writeheader()
 
-            for query in query_urls:
-                query_params = query['query']
-                city_key = query['City Key']
-                city = query['City']
-                industry_id = query['INDUSTRY ID']
+                for query in query_urls:
+                    query_params = query['query']
+                    city_key = query['City Key']
+                    city = query['City']
+                    industry_id = query['INDUSTRY ID']
 
-                scrape_jobs(driver, base_url, query_params, city_key, city, industry_id, writer)
-                print(f"Completed scraping URLs for city: {city}")
+                    # Queries past the page cap are split into sub-queries that each fit
+                    plan = planner.plan(query_params)
+                    if len(plan) > 1:
+                        scrape_planned_query(listing_pool, base_url, plan, city_key, city, industry_id, writer,
+                                             frontier, seen)
+                    elif plan:
+                        sub_query, total_jobs, first_page = plan[0]
+                        scrape_jobs(driver, base_url, sub_query, city_key, city, industry_id, writer, frontier,
+                                    seen, total_jobs, first_page=first_page)
+                    print(f"Completed scraping URLs for city: {city}")
 
     except Exception as e:
         print(f"An error occurred during URL scraping: {e}")
     
     # Step 2: Extract job details
     try:
-        with open('jobs_url_scrap.csv', 'r', newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            job_urls = list(reader)
-
-        with open('output_scrap.csv', 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['City Key', 'City', 'INDUSTRY ID', 'Job Title', 'Company', 'Salary', 'Apply URL', 'Walk-in', 'Experience', 'Time', 'Venue', 'Job Description']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for job in job_urls:
-                url = job['Apply URL']
-                city_key = job['City Key']
-                city = job['City']
-                industry_id = job['INDUSTRY ID']
-
-                job_details = extract_job_details(driver, url)
-                if job_details:
-                    job_details.update({
-                        'City Key': city_key,
-                        'City': city,
-                        'INDUSTRY ID': industry_id,
-                        'Apply URL': url,
-                        'Walk-in': 'Yes'  # Assuming all scraped jobs are walk-ins
-                    })
-                    writer.writerow(job_details)
+        job_urls = frontier.pending(max_attempts=MAX_ATTEMPTS)
+        print(f"{len(job_urls)} job URLs left to fetch.")
+
+        # A URL is marked fetched only once its row is on disk, so buffered formats fall back to CSV
+        output_format = OUTPUT_FORMAT if OUTPUT_FORMAT in DURABLE_FORMATS else 'csv'
+        fieldnames = ['City Key', 'City', 'INDUSTRY ID', 'Job Title', 'Company', 'Salary', 'Apply URL', 'Walk-in', 'Experience', 'Time', 'Venue', 'Job Description']
+        if store:
+            fieldnames = desc_store.row_fieldnames(fieldnames)
+        with open_sink('output_scrap.csv', fieldnames, output_format, append=append) as sink:
+            def write_rows(rows):
+                # One transaction per batch; URLs are marked fetched and seen only once their rows are written
+                sink.write_rows(rows)
+                sink.flush()
+                urls = [row['Apply URL'] for row in rows]
+                frontier.mark_fetched_many(urls)
+                if seen:
+                    seen.written(urls)
+
+            row_queue = Queue(maxsize=WRITE_QUEUE_SIZE)
+            writer = QueueWriter(row_queue, write_rows, batch_size=WRITE_BATCH_SIZE, name='detail writer')
+            writer.start()
+            try:
+                write_details(driver, job_urls, row_queue, frontier, store)
+            finally:
+                row_queue.put(END)
+                writer.join()
+            if writer.error:
+                raise writer.error
 
     except Exception as e:
         print(f"An error occurred during job details extraction: {e}")
 
     finally:
         driver.quit()
+        listing_pool.close()
+        print(f"Frontier state: {frontier.counts()}")
+        frontier.close()
+        if seen:
+            seen.close()
+        if store:
+            store.close()
+        log_page_stats_summary()
 
 if __name__ == "__main__":
     main()
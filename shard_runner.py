@@ -0,0 +1,187 @@
+import argparse
+import csv
+import glob
+import logging
+import multiprocessing
+import os
+
+from sinks import OUTPUT_FORMAT, EXTENSIONS, open_sink, output_path, read_output
+from work_queue import LeaseKeeper, open_queue, worker_name
+
+QUERY_UNIT = 'query'
+SHARD_DIR = os.environ.get('SCRAPER_SHARD_DIR', 'shards')
+PARTIAL = '.partial'
+
+
+def shard_path(shard_dir, unit, worker=None):
+    """CSV-style name of a unit's output; the sink swaps in its own extension.
+
+    With `worker` it is that worker's partial file: a worker whose lease
+    expired and the one that re-leased the unit never write the same file.
+    """
+    name = f'{unit}.{worker}{PARTIAL}' if worker else unit
+    return os.path.join(shard_dir, f'{name}.csv')
+
+
+def enqueue(queue, params_path, retry_failed=False):
+    """Add every params.csv row as a query unit; rows already queued are skipped."""
+    with open(params_path, 'r') as file:
+        rows = list(csv.DictReader(file))
+    added = queue.add_many(QUERY_UNIT, rows)
+    retried = queue.retry_failed() if retry_failed else 0
+    logging.info(f"Queued {added} new of {len(rows)} query units, retrying {retried} failed: {queue.counts()}")
+
+
+def _discard(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def run_worker(queue_url, shard_dir):
+    """Lease query units until none are left, writing each unit's rows to its own shard file.
+
+    A shard is written under a per-worker .partial name and renamed only once
+    the unit was marked done while the lease was still held, so compaction
+    never sees half a unit and a unit redone after a lost lease overwrites
+    rather than duplicates.
+    """
+    from scrape_jobs_thread_walkin_filters import WalkinScraper
+
+    queue = open_queue(queue_url)
+    worker = worker_name()
+    scraper = None
+    done = 0
+    try:
+        queue.requeue_expired()
+        while True:
+            leased = queue.lease(worker, QUERY_UNIT)
+            if leased is None:
+                break
+            unit, query = leased
+            # Browsers start only once there is work for this process
+            scraper = scraper or WalkinScraper()
+            partial = output_path(shard_path(shard_dir, unit, worker))
+            if os.path.exists(partial):
+                os.remove(partial)
+            logging.info(f"{worker} scraping {unit}: {query['City']} / {query['INDUSTRY ID']}")
+            with LeaseKeeper(queue, unit, worker) as keeper:
+                try:
+                    written = scraper.scrape([query], shard_path(shard_dir, unit, worker), defer_seen=True)
+                except Exception as e:
+                    logging.error(f"{worker} failed {unit}: {e}")
+                    queue.fail(unit, worker, str(e))
+                    _discard(partial)
+                    continue
+            # complete() succeeds only while the lease is still ours, so only then is the shard published
+            if keeper.lost.is_set() or not queue.complete(unit, worker):
+                logging.warning(f"{worker} lost the lease on {unit}; discarding its output")
+                _discard(partial)
+                continue
+            os.replace(partial, output_path(shard_path(shard_dir, unit)))
+            # Postings count as seen only once their shard is published
+            scraper.mark_seen(written)
+            done += 1
+    finally:
+        if scraper:
+            scraper.close()
+        queue.close()
+    logging.info(f"{worker} finished {done} units")
+    return done
+
+
+def work(queue_url, shard_dir, processes=1):
+    """Run `processes` workers on this node; other nodes can run their own against the same queue."""
+    os.makedirs(shard_dir, exist_ok=True)
+    if processes == 1:
+        run_worker(queue_url, shard_dir)
+        return
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(queue_url, shard_dir), name=f'shard worker {n}')
+        for n in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        if process.exitcode:
+            logging.error(f"{process.name} exited with code {process.exitcode}")
+
+
+def compact(shard_dir, output, output_format=None):
+    """Merge every finished shard into one output, keeping the first row per Apply URL.
+
+    Shards are read one at a time; columns follow the first shard. Returns the row count.
+    """
+    output_format = output_format or OUTPUT_FORMAT
+    shards = sorted(
+        path for path in glob.glob(os.path.join(shard_dir, '*' + EXTENSIONS[output_format]))
+        if PARTIAL not in os.path.basename(path)
+    )
+    if not shards:
+        logging.warning(f"No shards in {shard_dir}")
+        return 0
+
+    fieldnames = None
+    seen_urls = set()
+    rows = 0
+    sink = None
+    try:
+        for path in shards:
+            df = read_output(path)
+            if fieldnames is None:
+                fieldnames = list(df.columns)
+                sink = open_sink(output, fieldnames, output_format)
+            df = df.reindex(columns=fieldnames).astype(object)
+            df = df.where(df.notna(), None)
+            batch = []
+            for row in df.to_dict('records'):
+                if row['Apply URL'] in seen_urls:
+                    continue
+                seen_urls.add(row['Apply URL'])
+                batch.append(row)
+            sink.write_rows(batch)
+            rows += len(batch)
+    finally:
+        if sink:
+            sink.close()
+    logging.info(f"Compacted {len(shards)} shards into {output_path(output, output_format)}: {rows} rows")
+    return rows
+
+
+def main():
+    from scrape_jobs_thread_walkin_filters import OUTPUT_CSV
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(process)d - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Sharded walk-in scraper over a shared lease queue.")
+    parser.add_argument('--queue', help="Work queue: a path or sqlite:///path (default: SCRAPER_WORK_QUEUE)")
+    parser.add_argument('--shard-dir', default=SHARD_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    enqueue_parser = commands.add_parser('enqueue', help="Queue params.csv rows as work units")
+    enqueue_parser.add_argument('params', nargs='?', default='params.csv')
+    enqueue_parser.add_argument('--retry-failed', action='store_true')
+    work_parser = commands.add_parser('work', help="Lease and scrape units until the queue is empty")
+    work_parser.add_argument('--processes', type=int, default=1)
+    compact_parser = commands.add_parser('compact', help="Merge shard outputs into one file")
+    compact_parser.add_argument('output', nargs='?', default=OUTPUT_CSV)
+    commands.add_parser('status', help="Show unit counts and failed units")
+    args = parser.parse_args()
+
+    if args.command == 'work':
+        work(args.queue, args.shard_dir, args.processes)
+    elif args.command == 'compact':
+        compact(args.shard_dir, args.output)
+    else:
+        queue = open_queue(args.queue)
+        try:
+            if args.command == 'enqueue':
+                enqueue(queue, args.params, args.retry_failed)
+            else:
+                print(queue.counts())
+                for unit, attempts, error in queue.failed():
+                    print(f"{unit}\t{attempts}\t{error}")
+        finally:
+            queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+import csv
+import logging
+from abc import ABC, abstractmethod
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+# SCRAPER_OUTPUT_FORMAT=parquet|arrow writes columnar output instead of CSV (needs pyarrow);
+# SCRAPER_OUTPUT_FORMAT=sqlite upserts into a database that accumulates across runs
+OUTPUT_FORMAT = os.environ.get('SCRAPER_OUTPUT_FORMAT', 'csv')
+ROW_GROUP_SIZE = int(os.environ.get('SCRAPER_ROW_GROUP_SIZE', '5000'))
+
+# Low-cardinality columns stored once per row group and referenced by index
+DICTIONARY_COLUMNS = ('City Key', 'CITY ID', 'City', 'INDUSTRY ID', 'Company', 'Walk-in', 'Location', 'Experience')
+# Large text columns get a stronger codec than the rest of the file
+TEXT_COLUMNS = ('Job Description', 'Job Description HTML')
+TEXT_COMPRESSION_LEVEL = 9
+
+EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow', 'sqlite': '.db'}
+# Formats whose rows are on disk once flush() returns
+DURABLE_FORMATS = ('csv', 'sqlite')
+
+SQLITE_TABLE = 'jobs'
+SQLITE_KEY = 'Apply URL'
+SQLITE_INDEXES = ('City Key', 'CITY ID', 'INDUSTRY ID', 'Walk-in')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise RuntimeError("Parquet and Arrow output need pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+class CsvSink:
+    """csv.DictWriter behind the common sink interface."""
+
+    def __init__(self, path, fieldnames, append=False):
+        self.path = path
+        self.fieldnames = fieldnames
+        self._file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+
+    def write_rows(self, rows):
+        self._writer.writerows(rows)
+
+    def flush(self):
+        self._file.flush()
+
+    def sync(self):
+        """Flush and fsync so the rows survive a crash."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ColumnarSink(ABC):
+    """Buffers rows and writes them as one record batch per `row_group_size` rows.
+
+    Every column is a string, as scraped; missing keys become nulls. Subclasses
+    implement _open() to create the pyarrow writer for their file format.
+    """
+
+    def __init__(self, path, fieldnames, append=False, row_group_size=ROW_GROUP_SIZE):
+        if append:
+            raise ValueError(f"Cannot append to {path}; columnar files are written once")
+        self.path = path
+        self.fieldnames = fieldnames
+        self.row_group_size = row_group_size
+        self._pa = _pyarrow()
+        self.schema = self._schema()
+        self._rows = []
+        self._written = 0
+        self._writer = self._open()
+
+    def _schema(self):
+        pa = self._pa
+        return pa.schema([pa.field(name, pa.string()) for name in self.fieldnames])
+
+    @abstractmethod
+    def _open(self):
+        """The pyarrow writer that record batches go to."""
+
+    def _batch(self, rows):
+        pa = self._pa
+        columns = [pa.array([row.get(name) for row in rows], type=pa.string()) for name in self.fieldnames]
+        return pa.RecordBatch.from_arrays(columns, schema=self.schema)
+
+    def _write_batch(self, batch):
+        self._writer.write_batch(batch)
+
+    def write_rows(self, rows):
+        self._rows.extend(rows)
+        while len(self._rows) >= self.row_group_size:
+            self._write_group(self._rows[:self.row_group_size])
+            del self._rows[:self.row_group_size]
+
+    def _write_group(self, rows):
+        self._write_batch(self._batch(rows))
+        self._written += len(rows)
+
+    def flush(self):
+        # Row groups are only written once full so the file is not split into tiny groups
+        pass
+
+    def close(self):
+        if self._rows:
+            self._write_group(self._rows)
+            self._rows = []
+        self._writer.close()
+        logging.info(f"Wrote {self._written} rows to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetSink(_ColumnarSink):
+    """Parquet file with dictionary-encoded categorical columns and zstd text columns."""
+
+    def _open(self):
+        import pyarrow.parquet as pq
+        dictionary = [name for name in self.fieldnames if name in DICTIONARY_COLUMNS]
+        compression = {name: 'zstd' if name in TEXT_COLUMNS else 'snappy' for name in self.fieldnames}
+        compression_level = {name: TEXT_COMPRESSION_LEVEL for name in self.fieldnames if name in TEXT_COLUMNS}
+        return pq.ParquetWriter(self.path, self.schema, use_dictionary=dictionary,
+                                compression=compression, compression_level=compression_level or None)
+
+    def _write_batch(self, batch):
+        self._writer.write_batch(batch, row_group_size=self.row_group_size)
+
+
+class ArrowSink(_ColumnarSink):
+    """Arrow IPC stream; categorical columns are dictionary arrays, buffers are zstd compressed.
+
+    The stream format is used because each batch carries its own dictionary,
+    which the IPC file format does not allow.
+    """
+
+    def _schema(self):
+        pa = self._pa
+        return pa.schema([
+            pa.field(name, pa.dictionary(pa.int32(), pa.string()) if name in DICTIONARY_COLUMNS else pa.string())
+            for name in self.fieldnames
+        ])
+
+    def _open(self):
+        pa = self._pa
+        options = pa.ipc.IpcWriteOptions(compression='zstd')
+        return pa.ipc.new_stream(self.path, self.schema, options=options)
+
+    def _batch(self, rows):
+        pa = self._pa
+        columns = []
+        for field in self.schema:
+            values = pa.array([row.get(field.name) for row in rows], type=pa.string())
+            columns.append(values.dictionary_encode() if pa.types.is_dictionary(field.type) else values)
+        return pa.RecordBatch.from_arrays(columns, schema=self.schema)
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqliteSink:
+    """Upserts rows into an SQLite table keyed by Apply URL.
+
+    The database outlives a single run: a job seen again keeps its first_seen
+    timestamp, gets a new last_seen, and has its other columns refreshed
+    (a missing value never overwrites a stored one). Each write_rows call is
+    one transaction, so rows should come from a single writer thread.
+
+    "New walk-ins in Chennai today" then becomes an indexed query:
+        SELECT * FROM jobs WHERE "City Key" = ? AND "Walk-in" = 'Yes'
+          AND first_seen >= date('now')
+    """
+
+    def __init__(self, path, fieldnames, append=True):
+        if SQLITE_KEY not in fieldnames:
+            raise ValueError(f"SQLite output needs an '{SQLITE_KEY}' column")
+        self.path = path
+        self.fieldnames = fieldnames
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_table()
+        self._upsert = self._upsert_sql()
+
+    def _create_table(self):
+        table = _quote(SQLITE_TABLE)
+        with self._conn:
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} ({_quote(SQLITE_KEY)} TEXT PRIMARY KEY, '
+                'first_seen TEXT NOT NULL, last_seen TEXT NOT NULL)'
+            )
+            # Scripts write different column sets into the same table
+            existing = {row[1] for row in self._conn.execute(f'PRAGMA table_info({table})')}
+            for name in self.fieldnames:
+                if name not in existing:
+                    self._conn.execute(f'ALTER TABLE {table} ADD COLUMN {_quote(name)} TEXT')
+            indexed = [name for name in SQLITE_INDEXES if name in self.fieldnames] + ['first_seen', 'last_seen']
+            for name in indexed:
+                index = _quote(f'{SQLITE_TABLE}_{name.lower().replace(" ", "_").replace("-", "_")}')
+                self._conn.execute(f'CREATE INDEX IF NOT EXISTS {index} ON {table} ({_quote(name)})')
+
+    def _upsert_sql(self):
+        columns = list(self.fieldnames) + ['first_seen', 'last_seen']
+        updates = [f'{_quote(name)} = COALESCE(excluded.{_quote(name)}, {_quote(name)})'
+                   for name in self.fieldnames if name != SQLITE_KEY]
+        updates.append('last_seen = excluded.last_seen')
+        return (
+            f'INSERT INTO {_quote(SQLITE_TABLE)} ({", ".join(_quote(name) for name in columns)}) '
+            f'VALUES ({", ".join("?" * len(columns))}) '
+            f'ON CONFLICT ({_quote(SQLITE_KEY)}) DO UPDATE SET {", ".join(updates)}'
+        )
+
+    def write_rows(self, rows):
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        values = [
+            [None if row.get(name) is None else str(row[name]) for name in self.fieldnames] + [now, now]
+            for row in rows
+        ]
+        with self._conn:
+            self._conn.executemany(self._upsert, values)
+
+    def flush(self):
+        # Every write_rows call has already committed
+        pass
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+SINKS = {'csv': CsvSink, 'parquet': ParquetSink, 'arrow': ArrowSink, 'sqlite': SqliteSink}
+
+
+def output_path(path, output_format=None):
+    """`path` with its extension swapped for the chosen format's."""
+    output_format = output_format or OUTPUT_FORMAT
+    return os.path.splitext(path)[0] + EXTENSIONS[output_format]
+
+
+def open_sink(path, fieldnames, output_format=None, append=False):
+    """Open the configured sink; `path` is the CSV name, its extension follows the format.
+
+    append=True continues an existing CSV; SQLite output always accumulates.
+    """
+    output_format = output_format or OUTPUT_FORMAT
+    if output_format not in SINKS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    if output_format == 'sqlite':
+        return SqliteSink(output_path(path, output_format), fieldnames)
+    return SINKS[output_format](output_path(path, output_format), fieldnames, append=append)
+
+
+def read_output(path, columns=None, filters=None):
+    """Load a sink's output into pandas, keeping only `columns`.
+
+    `filters` uses pyarrow's [(column, op, value)] form. Parquet reads only the
+    requested columns and skips row groups the filters rule out, SQLite turns
+    them into an indexed WHERE clause; Arrow and CSV apply both after loading.
+    """
+    import pandas as pd
+    extension = os.path.splitext(path)[1]
+    if extension == '.parquet':
+        return pd.read_parquet(path, columns=columns, filters=filters)
+    if extension == '.db':
+        select = ', '.join(_quote(name) for name in columns) if columns else '*'
+        where = [f'{_quote(column)} {_sql_op(op, value)}' for column, op, value in filters or []]
+        params = [item for _, op, value in filters or [] for item in (value if op == 'in' else [value])]
+        query = f'SELECT {select} FROM {_quote(SQLITE_TABLE)}'
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        # sqlite3's context manager only commits, so the connection is closed explicitly
+        conn = sqlite3.connect(path)
+        try:
+            return pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+    if extension == '.arrow':
+        pa = _pyarrow()
+        with pa.ipc.open_stream(path) as reader:
+            table = reader.read_all()
+        if filters:
+            table = table.filter(_expression(filters))
+        if columns:
+            table = table.select(columns)
+        return table.to_pandas()
+
+    filters = filters or []
+    usecols = list(dict.fromkeys(list(columns) + [column for column, _, _ in filters])) if columns else None
+    df = pd.read_csv(path, usecols=usecols, dtype=str)
+    for column, op, value in filters:
+        df = df[_compare(df[column], op, value)]
+    return df[columns] if columns else df
+
+
+def _expression(filters):
+    import pyarrow.dataset as ds
+    expression = None
+    for column, op, value in filters:
+        term = _compare(ds.field(column), op, value)
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def _compare(left, op, value):
+    if op in ('=', '=='):
+        return left == value
+    if op == '!=':
+        return left != value
+    if op == 'in':
+        return left.isin(value)
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _sql_op(op, value):
+    if op in ('=', '=='):
+        return '= ?'
+    if op == '!=':
+        return '!= ?'
+    if op == 'in':
+        return f'IN ({", ".join("?" * len(value))})'
+    raise ValueError(f"Unsupported filter operator: {op}")
@@ -0,0 +1,120 @@
+import csv
+import logging
+import os
+import sys
+import tempfile
+import zlib
+
+# Memory the join may use for one partition's descriptions
+MEMORY_BUDGET = int(os.environ.get('SCRAPER_MERGE_MEMORY_MB', '256')) * 1024 * 1024
+# Python strings and dict entries take a few times their size on disk
+MEMORY_OVERHEAD = 4
+WRITE_BATCH_SIZE = 1000
+KEY = 'Apply URL'
+
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+
+def partition_count(build_path, memory_budget=MEMORY_BUDGET):
+    """Partitions needed so one partition of the build file fits the budget."""
+    size = os.path.getsize(build_path) * MEMORY_OVERHEAD
+    return max(1, -(-size // memory_budget))
+
+
+def _partition(path, partitions, directory, name):
+    """Split a CSV into `partitions` files by a stable hash of its key column."""
+    with open(path, newline='', encoding='utf-8') as source:
+        reader = csv.reader(source)
+        header = next(reader)
+        key_index = header.index(KEY)
+        files = [open(os.path.join(directory, f'{name}-{n}.csv'), 'w', newline='', encoding='utf-8')
+                 for n in range(partitions)]
+        try:
+            writers = [csv.writer(file) for file in files]
+            for row in reader:
+                writers[zlib.crc32(row[key_index].encode('utf-8')) % partitions].writerow(row)
+        finally:
+            for file in files:
+                file.close()
+    return header, [file.name for file in files]
+
+
+def _read_rows(path, header=None):
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        if header is None:
+            next(reader)
+        yield from reader
+
+
+def _join_partition(probe_rows, build_rows, probe_key, build_key, build_values, sink, width):
+    """Left join: every probe row once per matching build row, or once with empty build columns."""
+    table = {}
+    for row in build_rows:
+        table.setdefault(row[build_key], []).append([row[index] for index in build_values])
+    missing = [[None] * width]
+
+    batch = []
+    for row in probe_rows:
+        for values in table.get(row[probe_key], missing):
+            batch.append(row + values)
+        if len(batch) >= WRITE_BATCH_SIZE:
+            sink.write_rows(batch)
+            batch = []
+    if batch:
+        sink.write_rows(batch)
+
+
+class _RowSink:
+    """Turns joined lists into dicts for a sinks.* sink."""
+
+    def __init__(self, sink, fieldnames):
+        self.sink = sink
+        self.fieldnames = fieldnames
+        self.rows = 0
+
+    def write_rows(self, rows):
+        self.sink.write_rows([dict(zip(self.fieldnames, row)) for row in rows])
+        self.rows += len(rows)
+
+
+def stream_join(probe_path, build_path, open_output, memory_budget=MEMORY_BUDGET, tmp_dir=None):
+    """Left join two CSVs on Apply URL with memory bounded by `memory_budget`.
+
+    The build side (descriptions) is hash-partitioned to disk so that one
+    partition's rows fit the budget; the probe side (listings) is partitioned
+    the same way and streamed against each partition's in-memory table. When
+    the build file already fits, nothing is spilled. Output columns match
+    pd.merge(probe, build, on='Apply URL', how='left'); row order follows the
+    partitions rather than the probe file.
+
+    `open_output(fieldnames)` must return a sink (see sinks.open_sink).
+    Returns the number of rows written.
+    """
+    with open(probe_path, newline='', encoding='utf-8') as file:
+        probe_header = next(csv.reader(file))
+    with open(build_path, newline='', encoding='utf-8') as file:
+        build_header = next(csv.reader(file))
+    build_values = [index for index, name in enumerate(build_header) if name != KEY]
+    fieldnames = probe_header + [build_header[index] for index in build_values]
+    probe_key = probe_header.index(KEY)
+    build_key = build_header.index(KEY)
+
+    partitions = partition_count(build_path, memory_budget)
+    logging.info(f"Joining {probe_path} with {build_path} in {partitions} partition(s)")
+    with open_output(fieldnames) as sink:
+        output = _RowSink(sink, fieldnames)
+        if partitions == 1:
+            _join_partition(_read_rows(probe_path), _read_rows(build_path), probe_key, build_key,
+                            build_values, output, len(build_values))
+            return output.rows
+
+        with tempfile.TemporaryDirectory(prefix='merge-', dir=tmp_dir) as directory:
+            _, build_parts = _partition(build_path, partitions, directory, 'build')
+            _, probe_parts = _partition(probe_path, partitions, directory, 'probe')
+            for probe_part, build_part in zip(probe_parts, build_parts):
+                _join_partition(_read_rows(probe_part, probe_header), _read_rows(build_part, build_header),
+                                probe_key, build_key, build_values, output, len(build_values))
+                os.remove(probe_part)
+                os.remove(build_part)
+        return output.rows
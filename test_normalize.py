@@ -0,0 +1,66 @@
+import math
+
+import pandas as pd
+import pytest
+
+from normalize import normalize_experience, normalize_salary, normalize_walkin_time
+
+
+def salary(text):
+    return normalize_salary(pd.Series([text], dtype='string')).iloc[0]
+
+
+@pytest.mark.parametrize('text, low, high, unit, period', [
+    ('1-4 Lacs PA', 1e5, 4e5, 'lacs', 'annual'),
+    ('50,000-1.5 Lacs P.A.', 5e4, 1.5e5, 'lacs', 'annual'),
+    ('5 Lacs P.A.', 5e5, 5e5, 'lacs', 'annual'),
+    ('1-1.5 Cr P.A.', 1e7, 1.5e7, 'crore', 'annual'),
+    ('5 Lacs - 8 Lacs', 5e5, 8e5, 'lacs', None),
+    ('2 Lacs', 2e5, 2e5, 'lacs', None),
+    # Monthly figures are annualized
+    ('15,000-20,000 P.M.', 1.8e5, 2.4e5, 'rupees', 'monthly'),
+    ('₹ 25,000 per month', 3e5, 3e5, 'rupees', 'monthly'),
+    ('Rs. 15k-20k P.M.', 1.8e5, 2.4e5, 'thousand', 'monthly'),
+])
+def test_salary(text, low, high, unit, period):
+    row = salary(text)
+    assert row['Salary Min'] == low
+    assert row['Salary Max'] == high
+    assert row['Salary Unit'] == unit
+    assert (pd.isna(row['Salary Period']) if period is None else row['Salary Period'] == period)
+    assert row['Salary Disclosed']
+
+
+def test_salary_without_unit_is_not_guessed():
+    row = salary('3-5')
+    assert math.isnan(row['Salary Min']) and math.isnan(row['Salary Max'])
+
+
+@pytest.mark.parametrize('text', ['Not disclosed', None])
+def test_salary_not_disclosed(text):
+    row = salary(text)
+    assert not row['Salary Disclosed']
+    assert math.isnan(row['Salary Min'])
+
+
+@pytest.mark.parametrize('text, low, high', [
+    ('3 - 7 years', 3, 7),
+    ('3-7 Yrs', 3, 7),
+    ('0 years', 0, 0),
+])
+def test_experience(text, low, high):
+    row = normalize_experience(pd.Series([text], dtype='string')).iloc[0]
+    assert (row['Experience Min'], row['Experience Max']) == (low, high)
+
+
+@pytest.mark.parametrize('text, start, end, start_time, end_time', [
+    ('2nd September - 11th September , 9.30 AM - 5.30 PM', '2024-09-02', '2024-09-11', '09:30', '17:30'),
+    ('31st August , 10.30 AM - 1.00 PM', '2024-08-31', '2024-08-31', '10:30', '13:00'),
+    # An end date in an earlier month rolls over into the next year
+    ('28th December - 3rd January , 9.00 AM - 12.00 PM', '2024-12-28', '2025-01-03', '09:00', '12:00'),
+])
+def test_walkin_time(text, start, end, start_time, end_time):
+    row = normalize_walkin_time(pd.Series([text], dtype='string'), year=2024).iloc[0]
+    assert row['Walk-in Start Date'] == pd.Timestamp(start)
+    assert row['Walk-in End Date'] == pd.Timestamp(end)
+    assert (row['Walk-in Start Time'], row['Walk-in End Time']) == (start_time, end_time)
@@ -0,0 +1,54 @@
+from urllib.parse import parse_qsl
+
+import pytest
+
+from query_planner import CAP_JOBS, MAX_EXPERIENCE, PAGE_CAP, QueryPlanner, capped_pages, split_query
+
+
+def params(query):
+    return parse_qsl(query.lstrip('?'))
+
+
+@pytest.mark.parametrize('total, pages', [(0, 0), (1, 1), (20, 1), (21, 2), (300, PAGE_CAP), (450, PAGE_CAP)])
+def test_capped_pages(total, pages):
+    assert capped_pages(total) == pages
+
+
+def test_split_bisects_multi_valued_facet():
+    halves = split_query('?k=walkin&industryTypeIdGid=1&industryTypeIdGid=2&industryTypeIdGid=3')
+    assert [[value for name, value in params(half) if name == 'industryTypeIdGid'] for half in halves] == [['1'], ['2', '3']]
+    assert all(('k', 'walkin') in params(half) for half in halves)
+
+
+@pytest.mark.parametrize('low, high', [(4, 4), (8, 9), (11, 14), (16, 20), (0, 0), (MAX_EXPERIENCE, MAX_EXPERIENCE)])
+def test_experience_bands_cover_every_range(low, high):
+    bands = [int(dict(params(query))['experience']) for query in split_query('?k=walkin')]
+    assert any(low <= band <= high for band in bands)
+
+
+def test_query_with_experience_is_not_split_again():
+    assert split_query('?k=walkin&experience=3') == []
+
+
+class CountingPlanner(QueryPlanner):
+    """Planner whose counts come from a function instead of the site."""
+
+    def __init__(self, count):
+        super().__init__('https://example.invalid/walkin-jobs', workers=2)
+        self._count = count
+
+    def count(self, query_params):
+        return self._count(query_params)
+
+
+def test_plan_splits_until_every_query_fits():
+    planner = CountingPlanner(lambda query: 100 if 'experience' in query else 450)
+    plan = planner.plan('?k=walkin')
+    assert len(plan) == MAX_EXPERIENCE + 1
+    assert all(total <= CAP_JOBS for _, total, _ in plan)
+
+
+def test_plan_keeps_query_when_split_does_not_narrow():
+    # e.g. a site that ignores the facet and reports the parent's count for every sub-query
+    planner = CountingPlanner(lambda query: 450)
+    assert planner.plan('?k=walkin') == [('?k=walkin', 450, None)]
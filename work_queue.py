@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+# A worker that stops renewing for this long loses its unit to another worker
+LEASE_SECONDS = float(os.environ.get('SCRAPER_LEASE_SECONDS', '300'))
+MAX_ATTEMPTS = 3
+# SCRAPER_WORK_QUEUE picks the backend: a path or sqlite:///path
+WORK_QUEUE = os.environ.get('SCRAPER_WORK_QUEUE', 'work_queue.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS units_state ON units (kind, state, lease_expires);
+"""
+
+
+def unit_id(kind, payload):
+    """Stable id for a work unit, so enqueueing the same rows twice is a no-op."""
+    data = json.dumps(payload, sort_keys=True).encode('utf-8')
+    return kind + '-' + hashlib.blake2b(data, digest_size=10).hexdigest()
+
+
+def worker_name():
+    """host-pid, unique across the processes of every node sharing a queue."""
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+class SqliteWorkQueue:
+    """Lease-based work queue in one SQLite file.
+
+    A worker leases a unit for `lease_seconds` and must renew it while it is
+    working; units whose lease expired are handed out again, so a crashed or
+    hung worker only delays its unit. Every state change is a single
+    IMMEDIATE transaction, so any number of processes on one host (or hosts
+    sharing a filesystem with working POSIX locks) can use the same file.
+    """
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _transaction(self, statements):
+        """Run statements(conn) inside BEGIN IMMEDIATE so concurrent leases never overlap."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = statements(self._conn)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    def add_many(self, kind, payloads):
+        """Enqueue payloads as units of `kind`; returns how many were new."""
+        now = time.time()
+        rows = [(unit_id(kind, payload), kind, json.dumps(payload), PENDING, now) for payload in payloads]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO units (id, kind, payload, state, updated_at) VALUES (?, ?, ?, ?, ?)', rows
+            )
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    def lease(self, worker, kind=None, max_attempts=MAX_ATTEMPTS):
+        """(unit id, payload) of the next pending or expired unit, now leased to `worker`, or None.
+
+        An expired unit that already used up `max_attempts` (it keeps killing
+        its workers) is not handed out again; requeue_expired() marks it failed.
+        """
+        now = time.time()
+
+        def take(conn):
+            query = ('SELECT id, payload FROM units WHERE '
+                     '(state = ? OR (state = ? AND lease_expires < ? AND attempts < ?))')
+            params = [PENDING, LEASED, now, max_attempts]
+            if kind is not None:
+                query += ' AND kind = ?'
+                params.append(kind)
+            row = conn.execute(query + ' LIMIT 1', params).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE units SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? '
+                'WHERE id = ?',
+                (LEASED, worker, now + self.lease_seconds, now, row[0]),
+            )
+            return row[0], json.loads(row[1])
+        return self._transaction(take)
+
+    def _update_owned(self, unit, worker, assignments, params):
+        now = time.time()
+
+        def update(conn):
+            cursor = conn.execute(
+                f'UPDATE units SET {assignments}, updated_at = ? WHERE id = ? AND owner = ? AND state = ?',
+                list(params) + [now, unit, worker, LEASED],
+            )
+            return cursor.rowcount == 1
+        return self._transaction(update)
+
+    def renew(self, unit, worker):
+        """Extend the lease; False means it expired and the unit was taken by another worker."""
+        return self._update_owned(unit, worker, 'lease_expires = ?', [time.time() + self.lease_seconds])
+
+    def complete(self, unit, worker):
+        """Mark a leased unit done; False if the lease had already been lost."""
+        return self._update_owned(unit, worker, 'state = ?, owner = NULL, lease_expires = NULL, last_error = NULL',
+                                  [DONE])
+
+    def fail(self, unit, worker, error=None, max_attempts=MAX_ATTEMPTS):
+        """Give a unit back for retry, or mark it failed once it used up `max_attempts`."""
+        def release(conn):
+            row = conn.execute('SELECT attempts FROM units WHERE id = ? AND owner = ? AND state = ?',
+                               (unit, worker, LEASED)).fetchone()
+            if row is None:
+                return False
+            state = FAILED if row[0] >= max_attempts else PENDING
+            conn.execute(
+                'UPDATE units SET state = ?, owner = NULL, lease_expires = NULL, last_error = ?, updated_at = ? '
+                'WHERE id = ?',
+                (state, error, time.time(), unit),
+            )
+            return True
+        return self._transaction(release)
+
+    def requeue_expired(self, max_attempts=MAX_ATTEMPTS):
+        """Put units with expired leases back to pending (or failed, if out of attempts); returns how many."""
+        now = time.time()
+
+        def requeue(conn):
+            cursor = conn.execute(
+                'UPDATE units SET state = CASE WHEN attempts < ? THEN ? ELSE ? END, owner = NULL, '
+                "lease_expires = NULL, last_error = COALESCE(last_error, 'lease expired'), updated_at = ? "
+                'WHERE state = ? AND lease_expires < ?',
+                (max_attempts, PENDING, FAILED, now, LEASED, now),
+            )
+            return cursor.rowcount
+        return self._transaction(requeue)
+
+    def retry_failed(self):
+        """Make failed units pending again with a fresh attempt budget."""
+        def retry(conn):
+            cursor = conn.execute('UPDATE units SET state = ?, attempts = 0, updated_at = ? WHERE state = ?',
+                                  (PENDING, time.time(), FAILED))
+            return cursor.rowcount
+        return self._transaction(retry)
+
+    def failed(self):
+        """(unit id, attempts, last_error) for every failed unit."""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT id, attempts, last_error FROM units WHERE state = ? ORDER BY id', (FAILED,)
+            ).fetchall()
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT state, COUNT(*) FROM units GROUP BY state').fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Backends by URL scheme; any class with the SqliteWorkQueue methods can be registered here
+BACKENDS = {
+    'sqlite': SqliteWorkQueue,
+}
+
+
+def open_queue(url=None, lease_seconds=LEASE_SECONDS):
+    """Open a work queue from a 'scheme://location' URL; a bare path means SQLite."""
+    url = url or WORK_QUEUE
+    scheme, separator, location = url.partition('://')
+    if not separator:
+        scheme, location = 'sqlite', url
+    elif scheme == 'sqlite':
+        location = location[1:] if location.startswith('/') else location
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unknown work queue backend: {scheme}")
+    return BACKENDS[scheme](location, lease_seconds=lease_seconds)
+
+
+class LeaseKeeper(threading.Thread):
+    """Renews one unit's lease in the background while the caller works on it.
+
+    `lost` is set once a renewal fails, meaning another worker now owns the unit.
+    """
+
+    def __init__(self, queue, unit, worker, interval=None):
+        super().__init__(name=f'lease {unit}', daemon=True)
+        self.queue = queue
+        self.unit = unit
+        self.worker = worker
+        self.interval = interval or queue.lease_seconds / 3
+        self.lost = threading.Event()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            try:
+                renewed = self.queue.renew(self.unit, self.worker)
+            except sqlite3.Error:
+                continue
+            if not renewed:
+                self.lost.set()
+                return
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self.join()
+        return False
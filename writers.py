@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+from queue import Empty
+
+import metrics
+
+# Producers put END on the queue when they are done; any other item is a row
+END = object()
+
+
+class QueueWriter(threading.Thread):
+    """Single writer thread that drains a row queue in batches.
+
+    It blocks on the queue instead of polling, hands rows to `write_rows` in
+    batches of up to `batch_size`, calls `flush` once per batch, and stops only
+    after each of the `producers` registered producers has put END. After a
+    write error it keeps taking and discarding items until then, so producers
+    never block on a full queue, and `error` holds the exception. When `sync`
+    is given it is called at most every `sync_interval` seconds and once more
+    before the thread exits, so written rows reach the disk.
+    """
+
+    def __init__(self, row_queue, write_rows, producers=1, flush=None, batch_size=500,
+                 name='writer', log_interval=30.0, sync=None, sync_interval=5.0):
+        super().__init__(name=name)
+        self.row_queue = row_queue
+        self.write_rows = write_rows
+        self.flush = flush
+        self.producers = producers
+        self.batch_size = batch_size
+        self.log_interval = log_interval
+        self.sync = sync
+        self.sync_interval = sync_interval
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {
+            'rows': 0,
+            'batches': 0,
+            'syncs': 0,
+            'producers_done': 0,
+            'discarded': 0,
+            'max_queue_depth': 0,
+            'started': None,
+            'finished': None,
+        }
+        self.error = None
+
+    def _take(self, block):
+        item = self.row_queue.get() if block else self.row_queue.get_nowait()
+        depth = self.row_queue.qsize()
+        if depth > self._stats['max_queue_depth']:
+            self._stats['max_queue_depth'] = depth
+        return item
+
+    def run(self):
+        self._stats['started'] = time.monotonic()
+        last_log = self._stats['started']
+        remaining = self.producers
+        try:
+            while remaining:
+                batch = []
+                item = self._take(block=True)
+                while True:
+                    if item is END:
+                        remaining -= 1
+                        with self._lock:
+                            self._stats['producers_done'] += 1
+                    else:
+                        batch.append(item)
+                    if not remaining or len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._take(block=False)
+                    except Empty:
+                        break
+
+                if batch:
+                    self._write(batch)
+                if time.monotonic() - last_log >= self.log_interval:
+                    last_log = time.monotonic()
+                    logging.info(f"{self.name} stats: {self.stats()}")
+        except Exception as e:
+            self.error = e
+            logging.error(f"{self.name} stopped writing after an error: {e}")
+            # Producers block on a full bounded queue, so it is drained until they are all done
+            while remaining:
+                if self._take(block=True) is END:
+                    remaining -= 1
+                else:
+                    self._stats['discarded'] += 1
+            raise
+        finally:
+            if self.sync and self.error is None:
+                self._sync()
+            self._stats['finished'] = time.monotonic()
+            logging.info(f"{self.name} finished: {self.stats()}")
+
+    def _write(self, batch):
+        metrics.count_missing(batch)
+        with metrics.timed('write'):
+            self.write_rows(batch)
+            if self.flush:
+                self.flush()
+        with self._lock:
+            self._stats['rows'] += len(batch)
+            self._stats['batches'] += 1
+        if self.sync and time.monotonic() - self._last_sync >= self.sync_interval:
+            self._sync()
+
+    def _sync(self):
+        self.sync()
+        self._last_sync = time.monotonic()
+        with self._lock:
+            self._stats['syncs'] += 1
+
+    def stats(self):
+        """Rows written, throughput and queue depth so far."""
+        with self._lock:
+            snapshot = dict(self._stats)
+        started = snapshot.pop('started')
+        finished = snapshot.pop('finished')
+        elapsed = ((finished or time.monotonic()) - started) if started else 0.0
+        snapshot['elapsed'] = elapsed
+        snapshot['rows_per_sec'] = snapshot['rows'] / elapsed if elapsed else 0.0
+        snapshot['queue_depth'] = self.row_queue.qsize()
+        snapshot['producers'] = self.producers
+        return snapshot